@@ -1,4 +1,3 @@
-import os
 import copy
 import json
 import uuid
@@ -13,6 +12,13 @@ from typing import Dict, Any
 from plugins_func.loadplugins import auto_import_modules
 from config.logger import setup_logging
 from core.utils.dialogue import Message, Dialogue
+from core.utils.sentence_segmenter import SentenceSegmenter
+from core.utils.latency_stats import LatencyStats
+from core.utils.speculative_stream import SpeculativeStream
+from core.utils.audio_frame_stream import AudioFrameStream
+from core.utils.tts_cache import tts_cache
+from core.utils.tts_scheduler import tts_scheduler
+from core.utils.tts_pool import tts_pool
 from core.handle.textHandle import handleTextMessage
 from core.utils.util import (
     get_string_no_punctuation_or_emoji,
@@ -20,9 +26,9 @@ from core.utils.util import (
     get_ip_info,
     initialize_modules,
 )
-from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError
 from core.handle.sendAudioHandle import sendAudioMessage
-from core.handle.receiveAudioHandle import handleAudioMessage
+from core.handle.receiveAudioHandle import handleAudioMessage, processAudioMessage
 from core.handle.functionHandler import FunctionHandler
 from plugins_func.register import Action, ActionResponse
 from core.auth import AuthMiddleware, AuthenticationError
@@ -33,6 +39,11 @@ from core.utils.output_counter import add_device_output
 
 TAG = __name__
 
+# 所有连接共用的首包音频耗时统计
+first_audio_stats = LatencyStats("首包音频")
+# 意图识别与对话同时请求时，对话提前开始的时间(即每轮节省的耗时)
+speculative_intent_stats = LatencyStats("意图预测")
+
 auto_import_modules("plugins_func.functions")
 
 
@@ -42,7 +53,16 @@ class TTSException(RuntimeError):
 
 class ConnectionHandler:
     def __init__(
-        self, config: Dict[str, Any], _vad, _asr, _llm, _tts, _memory, _intent
+        self,
+        config: Dict[str, Any],
+        _vad,
+        _asr,
+        _llm,
+        _tts,
+        _memory,
+        _intent,
+        _audio_executor=None,
+        _executor=None,
     ):
         self.config = copy.deepcopy(config)
         self.logger = setup_logging()
@@ -69,18 +89,32 @@ class ConnectionHandler:
         self.stop_event = threading.Event()
         self.tts_queue = queue.Queue()
         self.audio_play_queue = queue.Queue()
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        # 阻塞任务(TTS、插件函数、组件初始化)使用服务端共享线程池，不再每个连接单独建线程池
+        self.executor = _executor
+        self.own_executor = _executor is None
+        if self.own_executor:
+            self.executor = ThreadPoolExecutor(max_workers=10)
+        # 当前进行中的对话协程
+        self.chat_task = None
+        # 音频接入相关：共享线程池执行解码与VAD，有界队列形成背压
+        self.audio_executor = _audio_executor
+        self.audio_ingest_queue = asyncio.Queue(
+            maxsize=int(self.config.get("audio_ingest", {}).get("queue_size", 50))
+        )
+        self.audio_ingest_task = None
 
         # 依赖的组件
         self.vad = _vad
         self.asr = _asr
         self.llm = _llm
         self.tts = _tts
+        # 设备单独配置的TTS来自实例池，断开时需要交还
+        self.private_tts = False
         self.memory = _memory
         self.intent = _intent
 
-        # vad相关变量
-        self.client_audio_buffer = bytearray()
+        # vad相关变量，每个连接持有独立的VAD上下文，只共享模型权重
+        self.vad_context = self.vad.create_context()
         self.client_have_voice = False
         self.client_have_voice_last_time = 0.0
         self.client_no_voice_last_time = 0.0
@@ -88,6 +122,7 @@ class ConnectionHandler:
 
         # asr相关变量
         self.asr_audio = []
+        self.asr_stream = None
         self.asr_server_receive = True
 
         # llm相关变量
@@ -97,6 +132,10 @@ class ConnectionHandler:
         # tts相关变量
         self.tts_first_text_index = -1
         self.tts_last_text_index = -1
+        # 提交到TTS调度器还未完成的任务，打断或断开时取消
+        self.tts_futures = set()
+        # 本轮对话大模型输出第一个token的时间，用于统计首包音频耗时
+        self.llm_first_token_time = None
 
         # iot相关变量
         self.iot_descriptors = {}
@@ -110,6 +149,8 @@ class ConnectionHandler:
 
         self.close_after_chat = False  # 是否在聊天结束后关闭连接
         self.use_function_call_mode = False
+        # 意图识别与对话大模型同时请求
+        self.speculative_intent = False
 
         self.timeout_task = None
         self.timeout_seconds = (
@@ -156,6 +197,8 @@ class ConnectionHandler:
 
             # 启动超时检查任务
             self.timeout_task = asyncio.create_task(self._check_timeout())
+            # 启动音频消费任务
+            self.audio_ingest_task = asyncio.create_task(self._audio_ingest_loop())
 
             self.welcome_msg = self.config["xiaozhi"]
             self.welcome_msg["session_id"] = self.session_id
@@ -214,6 +257,15 @@ class ConnectionHandler:
         elif isinstance(message, bytes):
             await handleAudioMessage(self, message)
 
+    async def _audio_ingest_loop(self):
+        """按接收顺序消费音频包，解码与VAD交给线程池，事件循环只负责I/O"""
+        while not self.stop_event.is_set():
+            audio = await self.audio_ingest_queue.get()
+            try:
+                await processAudioMessage(self, audio)
+            except Exception as e:
+                self.logger.bind(tag=TAG).error(f"音频处理出错: {e}")
+
     def _initialize_components(self, private_config):
         """初始化组件"""
         if private_config is not None:
@@ -255,6 +307,10 @@ class ConnectionHandler:
             self.logger.bind(tag=TAG).error(f"获取差异化配置失败: {e}")
             private_config = {}
 
+        # 分句规则可按设备单独配置
+        if private_config.get("sentence_segment", None) is not None:
+            self.config["sentence_segment"] = private_config["sentence_segment"]
+
         init_tts = False
         if private_config.get("TTS", None) is not None:
             init_tts = True
@@ -279,6 +335,10 @@ class ConnectionHandler:
             modules = {}
         if modules.get("tts", None) is not None:
             self.tts = modules["tts"]
+            self.private_tts = True
+            if self.stop_event.is_set():
+                # 初始化期间连接已关闭
+                self._release_private_tts()
         if modules.get("prompt", None) is not None:
             self.change_system_prompt(modules["prompt"])
             private_config["prompt"] = None
@@ -340,6 +400,7 @@ class ConnectionHandler:
             modules = {}
         if modules.get("vad", None) is not None:
             self.vad = modules["vad"]
+            self.vad_context = self.vad.create_context()
         if modules.get("asr", None) is not None:
             self.asr = modules["asr"]
         if modules.get("llm", None) is not None:
@@ -376,6 +437,12 @@ class ConnectionHandler:
                 "llm"
             ]
 
+            self.speculative_intent = bool(
+                intent_config[self.config["selected_module"]["Intent"]].get(
+                    "speculative", False
+                )
+            )
+
             if intent_llm_name and intent_llm_name in self.config["LLM"]:
                 # 如果配置了专用LLM，则创建独立的LLM实例
                 from core.utils import llm as llm_utils
@@ -408,74 +475,61 @@ class ConnectionHandler:
         # 更新系统prompt至上下文
         self.dialogue.update_system_message(self.prompt)
 
-    def chat(self, query):
-
-        self.dialogue.put(Message(role="user", content=query))
+    async def chat(self, query, intent_gate=None):
+        """
+        intent_gate: 意图识别结果，不为空时与意图识别同时请求大模型，输出先缓存，
+        结果为True(继续聊天)时放行缓存的输出，为False时取消本次对话
+        """
+        user_message = Message(role="user", content=query)
+        if intent_gate is None:
+            self.dialogue.put(user_message)
 
         response_message = []
-        processed_chars = 0  # 跟踪已处理的字符位置
         try:
             # 使用带记忆的对话
-            future = asyncio.run_coroutine_threadsafe(
-                self.memory.query_memory(query), self.loop
-            )
-            memory_str = future.result()
+            memory_str = await self.memory.query_memory(query)
 
             self.logger.bind(tag=TAG).debug(f"记忆内容: {memory_str}")
-            llm_responses = self.llm.response(
-                self.session_id, self.dialogue.get_llm_dialogue_with_memory(memory_str)
-            )
+            llm_dialogue = self.dialogue.get_llm_dialogue_with_memory(memory_str)
+            if intent_gate is not None:
+                # 意图确认前不写入对话记录，请求中临时带上用户这句话
+                self.dialogue.getMessages(user_message, llm_dialogue)
+            llm_responses = self.llm.aresponse(self.session_id, llm_dialogue)
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"LLM 处理出错 {query}: {e}")
             return None
 
+        if intent_gate is not None:
+            llm_responses = SpeculativeStream(llm_responses)
+            if not await intent_gate:
+                await llm_responses.aclose()
+                self.logger.bind(tag=TAG).debug(f"意图已处理，取消对话请求: {query}")
+                return None
+            saved_ms = (time.monotonic() - llm_responses.start_time) * 1000
+            self.logger.bind(tag=TAG).debug(
+                f"意图确认为继续聊天，对话提前{saved_ms:.0f}ms开始，已缓存{llm_responses.buffered}个token"
+            )
+            speculative_intent_stats.record(saved=saved_ms)
+            self.dialogue.put(user_message)
+
         self.llm_finish_task = False
+        self.llm_first_token_time = None
         text_index = 0
-        for content in llm_responses:
+        segmenter = self.create_segmenter()
+        async for content in llm_responses:
+            if self.llm_first_token_time is None:
+                self.llm_first_token_time = time.monotonic()
             response_message.append(content)
             if self.client_abort:
                 break
 
-            # 合并当前全部文本并处理未分割部分
-            full_text = "".join(response_message)
-            current_text = full_text[processed_chars:]  # 从未处理的位置开始
-
-            # 查找最后一个有效标点
-            punctuations = ("。", "？", "！", "；", "：")
-            last_punct_pos = -1
-            for punct in punctuations:
-                pos = current_text.rfind(punct)
-                if pos > last_punct_pos:
-                    last_punct_pos = pos
-
-            # 找到分割点则处理
-            if last_punct_pos != -1:
-                segment_text_raw = current_text[: last_punct_pos + 1]
-                segment_text = get_string_no_punctuation_or_emoji(segment_text_raw)
-                if segment_text:
-                    # 强制设置空字符，测试TTS出错返回语音的健壮性
-                    # if text_index % 2 == 0:
-                    #     segment_text = " "
-                    text_index += 1
-                    self.recode_first_last_text(segment_text, text_index)
-                    future = self.executor.submit(
-                        self.speak_and_play, segment_text, text_index
-                    )
-                    self.tts_queue.put(future)
-                    processed_chars += len(segment_text_raw)  # 更新已处理字符位置
+            # 按标点切出完整片段送入TTS
+            for segment_text_raw in segmenter.feed(content):
+                text_index = self.speak_segment(segment_text_raw, text_index)
+        await llm_responses.aclose()
 
         # 处理最后剩余的文本
-        full_text = "".join(response_message)
-        remaining_text = full_text[processed_chars:]
-        if remaining_text:
-            segment_text = get_string_no_punctuation_or_emoji(remaining_text)
-            if segment_text:
-                text_index += 1
-                self.recode_first_last_text(segment_text, text_index)
-                future = self.executor.submit(
-                    self.speak_and_play, segment_text, text_index
-                )
-                self.tts_queue.put(future)
+        text_index = self.speak_segment(segmenter.flush(), text_index)
 
         self.llm_finish_task = True
         self.dialogue.put(Message(role="assistant", content="".join(response_message)))
@@ -484,7 +538,7 @@ class ConnectionHandler:
         )
         return True
 
-    def chat_with_function_calling(self, query, tool_call=False):
+    async def chat_with_function_calling(self, query, tool_call=False):
         self.logger.bind(tag=TAG).debug(f"Chat with function calling start: {query}")
         """Chat with function calling for intent detection using streaming"""
 
@@ -496,21 +550,17 @@ class ConnectionHandler:
         if hasattr(self, "func_handler"):
             functions = self.func_handler.get_functions()
         response_message = []
-        processed_chars = 0  # 跟踪已处理的字符位置
 
         try:
             start_time = time.time()
 
             # 使用带记忆的对话
-            future = asyncio.run_coroutine_threadsafe(
-                self.memory.query_memory(query), self.loop
-            )
-            memory_str = future.result()
+            memory_str = await self.memory.query_memory(query)
 
             # self.logger.bind(tag=TAG).info(f"对话记录: {self.dialogue.get_llm_dialogue_with_memory(memory_str)}")
 
             # 使用支持functions的streaming接口
-            llm_responses = self.llm.response_with_functions(
+            llm_responses = self.llm.aresponse_with_functions(
                 self.session_id,
                 self.dialogue.get_llm_dialogue_with_memory(memory_str),
                 functions=functions,
@@ -520,7 +570,10 @@ class ConnectionHandler:
             return None
 
         self.llm_finish_task = False
+        if not tool_call:
+            self.llm_first_token_time = None
         text_index = 0
+        segmenter = self.create_segmenter()
 
         # 处理流式响应
         tool_call_flag = False
@@ -529,7 +582,7 @@ class ConnectionHandler:
         function_arguments = ""
         content_arguments = ""
 
-        for response in llm_responses:
+        async for response in llm_responses:
             content, tools_call = response
 
             if "content" in response:
@@ -553,6 +606,8 @@ class ConnectionHandler:
 
             if content is not None and len(content) > 0:
                 if not tool_call_flag:
+                    if self.llm_first_token_time is None:
+                        self.llm_first_token_time = time.monotonic()
                     response_message.append(content)
 
                     if self.client_abort:
@@ -562,33 +617,9 @@ class ConnectionHandler:
                     # self.logger.bind(tag=TAG).debug(f"大模型返回时间: {end_time - start_time} 秒, 生成token={content}")
 
                     # 处理文本分段和TTS逻辑
-                    # 合并当前全部文本并处理未分割部分
-                    full_text = "".join(response_message)
-                    current_text = full_text[processed_chars:]  # 从未处理的位置开始
-
-                    # 查找最后一个有效标点
-                    punctuations = ("。", "？", "！", "；", "：")
-                    last_punct_pos = -1
-                    for punct in punctuations:
-                        pos = current_text.rfind(punct)
-                        if pos > last_punct_pos:
-                            last_punct_pos = pos
-
-                    # 找到分割点则处理
-                    if last_punct_pos != -1:
-                        segment_text_raw = current_text[: last_punct_pos + 1]
-                        segment_text = get_string_no_punctuation_or_emoji(
-                            segment_text_raw
-                        )
-                        if segment_text:
-                            text_index += 1
-                            self.recode_first_last_text(segment_text, text_index)
-                            future = self.executor.submit(
-                                self.speak_and_play, segment_text, text_index
-                            )
-                            self.tts_queue.put(future)
-                            # 更新已处理字符位置
-                            processed_chars += len(segment_text_raw)
+                    for segment_text_raw in segmenter.feed(content):
+                        text_index = self.speak_segment(segment_text_raw, text_index)
+        await llm_responses.aclose()
 
         # 处理function call
         if tool_call_flag:
@@ -606,9 +637,13 @@ class ConnectionHandler:
                     except Exception as e:
                         bHasError = True
                         response_message.append(a)
+                        for segment_text_raw in segmenter.feed(a):
+                            text_index = self.speak_segment(segment_text_raw, text_index)
                 else:
                     bHasError = True
                     response_message.append(content_arguments)
+                    for segment_text_raw in segmenter.feed(content_arguments):
+                        text_index = self.speak_segment(segment_text_raw, text_index)
                 if bHasError:
                     self.logger.bind(tag=TAG).error(
                         f"function call error: {content_arguments}"
@@ -626,26 +661,22 @@ class ConnectionHandler:
 
                 # 处理MCP工具调用
                 if self.mcp_manager.is_mcp_tool(function_name):
-                    result = self._handle_mcp_tool_call(function_call_data)
+                    result = await self._handle_mcp_tool_call(function_call_data)
                 else:
-                    # 处理系统函数
-                    result = self.func_handler.handle_llm_function_call(
-                        self, function_call_data
+                    # 处理系统函数，插件内部会同步等待事件循环，需放到线程池执行
+                    result = await self.loop.run_in_executor(
+                        self.executor,
+                        self.func_handler.handle_llm_function_call,
+                        self,
+                        function_call_data,
                     )
-                self._handle_function_result(result, function_call_data, text_index + 1)
-
-        # 处理最后剩余的文本
-        full_text = "".join(response_message)
-        remaining_text = full_text[processed_chars:]
-        if remaining_text:
-            segment_text = get_string_no_punctuation_or_emoji(remaining_text)
-            if segment_text:
-                text_index += 1
-                self.recode_first_last_text(segment_text, text_index)
-                future = self.executor.submit(
-                    self.speak_and_play, segment_text, text_index
+                await self._handle_function_result(
+                    result, function_call_data, text_index + 1
                 )
-                self.tts_queue.put(future)
+
+        # 处理最后剩余的文本，函数调用成功时已由函数结果接管回复
+        if len(response_message) > 0:
+            text_index = self.speak_segment(segmenter.flush(), text_index)
 
         # 存储对话内容
         if len(response_message) > 0:
@@ -660,7 +691,7 @@ class ConnectionHandler:
 
         return True
 
-    def _handle_mcp_tool_call(self, function_call_data):
+    async def _handle_mcp_tool_call(self, function_call_data):
         function_arguments = function_call_data["arguments"]
         function_name = function_call_data["name"]
         try:
@@ -676,9 +707,7 @@ class ConnectionHandler:
                         action=Action.REQLLM, result="参数解析失败", response=""
                     )
 
-            tool_result = asyncio.run_coroutine_threadsafe(
-                self.mcp_manager.execute_tool(function_name, args_dict), self.loop
-            ).result()
+            tool_result = await self.mcp_manager.execute_tool(function_name, args_dict)
             # meta=None content=[TextContent(type='text', text='北京当前天气:\n温度: 21°C\n天气: 晴\n湿度: 6%\n风向: 西北 风\n风力等级: 5级', annotations=None)] isError=False
             content_text = ""
             if tool_result is not None and tool_result.content is not None:
@@ -702,12 +731,11 @@ class ConnectionHandler:
 
         return ActionResponse(action=Action.REQLLM, result="工具调用出错", response="")
 
-    def _handle_function_result(self, result, function_call_data, text_index):
+    async def _handle_function_result(self, result, function_call_data, text_index):
         if result.action == Action.RESPONSE:  # 直接回复前端
             text = result.response
             self.recode_first_last_text(text, text_index)
-            future = self.executor.submit(self.speak_and_play, text, text_index)
-            self.tts_queue.put(future)
+            self.submit_tts(text, text_index)
             self.dialogue.put(Message(role="assistant", content=text))
         elif result.action == Action.REQLLM:  # 调用函数后再请求llm生成回复
             text = result.result
@@ -735,12 +763,11 @@ class ConnectionHandler:
                 self.dialogue.put(
                     Message(role="tool", tool_call_id=function_id, content=text)
                 )
-                self.chat_with_function_calling(text, tool_call=True)
+                await self.chat_with_function_calling(text, tool_call=True)
         elif result.action == Action.NOTFOUND or result.action == Action.ERROR:
             text = result.result
             self.recode_first_last_text(text, text_index)
-            future = self.executor.submit(self.speak_and_play, text, text_index)
-            self.tts_queue.put(future)
+            self.submit_tts(text, text_index)
             self.dialogue.put(Message(role="assistant", content=text))
         else:
             pass
@@ -757,43 +784,40 @@ class ConnectionHandler:
                     continue
                 if future is None:
                     continue
-                text = None
-                opus_datas, text_index, tts_file = [], 0, None
+                if isinstance(future, AudioFrameStream):
+                    # 流式合成，不等合成结束，按顺序交给播放线程边收边发送
+                    if not self.client_abort:
+                        self.audio_play_queue.put((future, future.text, future.text_index))
+                    continue
+                future, text, text_index = future
+                opus_datas = []
                 try:
                     self.logger.bind(tag=TAG).debug("正在处理TTS任务...")
                     tts_timeout = int(self.config.get("tts_timeout", 10))
-                    tts_file, text, text_index = future.result(timeout=tts_timeout)
+                    # 各句子已在调度器中并行合成，这里按顺序等待结果
+                    result = future.result(timeout=tts_timeout)
                     if text is None or len(text) <= 0:
                         self.logger.bind(tag=TAG).error(
                             f"TTS出错：{text_index}: tts text is empty"
                         )
-                    elif tts_file is None:
+                    elif result is None:
                         self.logger.bind(tag=TAG).error(
-                            f"TTS出错： file is empty: {text_index}: {text}"
+                            f"TTS出错： audio is empty: {text_index}: {text}"
                         )
                     else:
-                        self.logger.bind(tag=TAG).debug(
-                            f"TTS生成：文件路径: {tts_file}"
-                        )
-                        if os.path.exists(tts_file):
-                            opus_datas, duration = self.tts.audio_to_opus_data(tts_file)
-                        else:
-                            self.logger.bind(tag=TAG).error(
-                                f"TTS出错：文件不存在{tts_file}"
-                            )
+                        opus_datas = result
+                        if self.max_output_size > 0:
+                            add_device_output(self.headers.get("device-id"), len(text))
                 except TimeoutError:
                     self.logger.bind(tag=TAG).error("TTS超时")
+                    tts_scheduler.cancel(future)
+                except CancelledError:
+                    self.logger.bind(tag=TAG).debug(f"TTS任务已取消: {text_index}")
                 except Exception as e:
                     self.logger.bind(tag=TAG).error(f"TTS出错: {e}")
                 if not self.client_abort:
                     # 如果没有中途打断就发送语音
                     self.audio_play_queue.put((opus_datas, text, text_index))
-                if (
-                    self.tts.delete_audio_file
-                    and tts_file is not None
-                    and os.path.exists(tts_file)
-                ):
-                    os.remove(tts_file)
             except Exception as e:
                 self.logger.bind(tag=TAG).error(f"TTS任务处理错误: {e}")
                 self.clearSpeakStatus()
@@ -833,17 +857,85 @@ class ConnectionHandler:
                 )
 
     def speak_and_play(self, text, text_index=0):
+        opus_datas = self.synthesize(text, text_index)
+        if opus_datas is not None and self.max_output_size > 0:
+            add_device_output(self.headers.get("device-id"), len(text))
+        return opus_datas, text, text_index
+
+    def synthesize(self, text, text_index=0):
+        """合成一句话并编码为Opus帧，失败时返回None；可能因备份请求被执行多次，不在此计数"""
+        if self.stop_event.is_set():
+            # 连接已关闭，共享线程池中排队的任务不再合成
+            return None
         if text is None or len(text) <= 0:
             self.logger.bind(tag=TAG).info(f"无需tts转换，query为空，{text}")
-            return None, text, text_index
-        tts_file = self.tts.to_tts(text)
-        if tts_file is None:
+            return None
+        # 常用短句直接使用缓存的Opus帧，跳过合成和编码
+        opus_datas = tts_cache.get(self.tts, text)
+        if opus_datas is not None:
+            self.logger.bind(tag=TAG).debug(f"TTS 命中缓存: {text_index}, {text}")
+            return opus_datas
+        # 合成结果和Opus编码都留在内存中，不再写临时文件
+        audio = self.tts.to_tts_audio(text)
+        if audio is None:
             self.logger.bind(tag=TAG).error(f"tts转换失败，{text}")
-            return None, text, text_index
-        self.logger.bind(tag=TAG).debug(f"TTS 文件生成完毕: {tts_file}")
-        if self.max_output_size > 0:
-            add_device_output(self.headers.get("device-id"), len(text))
-        return tts_file, text, text_index
+            return None
+        opus_datas, duration = self.tts.audio_bytes_to_opus_data(audio)
+        self.logger.bind(tag=TAG).debug(f"TTS 音频生成完毕: {text_index}, {duration}秒")
+        tts_cache.put(self.tts, text, opus_datas)
+        return opus_datas
+
+    def submit_tts(self, text, text_index):
+        """交给TTS调度器合成，按提交顺序放入TTS队列，由_tts_priority_thread按顺序播放"""
+        future = self.submit_to_scheduler(self.synthesize, text, text_index, hedge=True)
+        self.tts_queue.put((future, text, text_index))
+
+    def submit_to_scheduler(self, fn, *args, hedge=False):
+        """提交到TTS调度器并记录Future，clear_queues时取消"""
+        future = tts_scheduler.submit(self.tts, fn, *args, hedge=hedge)
+        self.tts_futures.add(future)
+        future.add_done_callback(self.tts_futures.discard)
+        return future
+
+    def _close_cancelled_stream(self, future, stream):
+        """合成任务被取消时结束流，避免播放端等待超时"""
+        if future.cancelled() and not self.loop.is_closed():
+            stream.close()
+
+    def speak_and_play_stream(self, stream: AudioFrameStream):
+        """流式合成，每编码出一批Opus帧就交给播放线程"""
+        text, text_index = stream.text, stream.text_index
+        try:
+            if self.stop_event.is_set():
+                return
+            opus_datas = tts_cache.get(self.tts, text)
+            if opus_datas is not None:
+                self.logger.bind(tag=TAG).debug(f"TTS 命中缓存: {text_index}, {text}")
+                stream.put(opus_datas)
+            else:
+                collected = []
+
+                def on_frames(frames):
+                    collected.extend(frames)
+                    stream.put(frames)
+
+                should_stop = lambda: self.client_abort or self.stop_event.is_set()
+                duration = self.tts.to_tts_stream(text, on_frames, should_stop=should_stop)
+                if duration is None:
+                    self.logger.bind(tag=TAG).error(f"tts转换失败，{text}")
+                    return
+                self.logger.bind(tag=TAG).debug(f"TTS 音频生成完毕: {text_index}, {duration}秒")
+                # 被打断时音频不完整，不缓存
+                if not should_stop():
+                    tts_cache.put(self.tts, text, collected)
+            if self.max_output_size > 0:
+                add_device_output(self.headers.get("device-id"), len(text))
+            return True
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"流式TTS出错: {text} {e}")
+        finally:
+            if not self.loop.is_closed():
+                stream.close()
 
     def clearSpeakStatus(self):
         self.logger.bind(tag=TAG).debug(f"清除服务端讲话状态")
@@ -851,6 +943,37 @@ class ConnectionHandler:
         self.tts_last_text_index = -1
         self.tts_first_text_index = -1
 
+    def create_segmenter(self):
+        return SentenceSegmenter.from_config(self.config.get("sentence_segment", {}))
+
+    def speak_segment(self, segment_text_raw, text_index):
+        """去掉首尾标点后把片段送入TTS队列，返回最新的text_index"""
+        segment_text = get_string_no_punctuation_or_emoji(segment_text_raw)
+        if not segment_text:
+            return text_index
+        text_index += 1
+        self.recode_first_last_text(segment_text, text_index)
+        if self.tts.streaming:
+            tts_timeout = int(self.config.get("tts_timeout", 10))
+            stream = AudioFrameStream(self.loop, segment_text, text_index, tts_timeout)
+            future = self.submit_to_scheduler(self.speak_and_play_stream, stream)
+            future.add_done_callback(
+                lambda f: self._close_cancelled_stream(f, stream)
+            )
+            self.tts_queue.put(stream)
+            return text_index
+        self.submit_tts(segment_text, text_index)
+        return text_index
+
+    def record_first_audio_latency(self):
+        """记录本轮对话从大模型第一个token到第一包音频发出的耗时"""
+        if self.llm_first_token_time is None:
+            return
+        latency_ms = (time.monotonic() - self.llm_first_token_time) * 1000
+        self.llm_first_token_time = None
+        self.logger.bind(tag=TAG).info(f"大模型首token到首包音频耗时: {latency_ms:.0f}ms")
+        first_audio_stats.record(first_audio=latency_ms)
+
     def recode_first_last_text(self, text, text_index=0):
         if self.tts_first_text_index == -1:
             self.logger.bind(tag=TAG).info(f"大模型说出第一句话: {text}")
@@ -864,6 +987,12 @@ class ConnectionHandler:
             self.timeout_task.cancel()
             self.timeout_task = None
 
+        # 取消音频消费任务
+        if self.audio_ingest_task:
+            self.audio_ingest_task.cancel()
+            self.audio_ingest_task = None
+        await self.close_asr_stream()
+
         # 清理MCP资源
         if hasattr(self, "mcp_manager") and self.mcp_manager:
             await self.mcp_manager.cleanup_all()
@@ -871,9 +1000,19 @@ class ConnectionHandler:
         # 触发停止事件并清理资源
         if self.stop_event:
             self.stop_event.set()
+        self._release_private_tts()
+
+        # 停止进行中的对话
+        if (
+            self.chat_task is not None
+            and not self.chat_task.done()
+            and self.chat_task is not asyncio.current_task()
+        ):
+            self.chat_task.cancel()
+        self.chat_task = None
 
-        # 立即关闭线程池
-        if self.executor:
+        # 立即关闭连接自建的线程池，共享线程池由服务端管理
+        if self.executor and self.own_executor:
             self.executor.shutdown(wait=False, cancel_futures=True)
             self.executor = None
 
@@ -891,6 +1030,9 @@ class ConnectionHandler:
         self.logger.bind(tag=TAG).info(
             f"开始清理: TTS队列大小={self.tts_queue.qsize()}, 音频队列大小={self.audio_play_queue.qsize()}"
         )
+        # 取消调度器中还未完成的合成，不再占用TTS的并发和配额
+        for future in list(self.tts_futures):
+            tts_scheduler.cancel(future)
         for q in [self.tts_queue, self.audio_play_queue]:
             if not q:
                 continue
@@ -906,18 +1048,31 @@ class ConnectionHandler:
             f"清理结束: TTS队列大小={self.tts_queue.qsize()}, 音频队列大小={self.audio_play_queue.qsize()}"
         )
 
+    def _release_private_tts(self):
+        """设备单独配置的TTS实例交还实例池，空闲一段时间后由实例池释放"""
+        if self.private_tts:
+            self.private_tts = False
+            tts_pool.release(self.tts)
+
+    async def close_asr_stream(self):
+        """放弃进行中的流式识别"""
+        asr_stream, self.asr_stream = self.asr_stream, None
+        if asr_stream is not None:
+            await asr_stream.close()
+
     def reset_vad_states(self):
-        self.client_audio_buffer = bytearray()
+        if self.vad_context is not None:
+            self.vad_context.reset()
         self.client_have_voice = False
         self.client_have_voice_last_time = 0
         self.client_voice_stop = False
         self.logger.bind(tag=TAG).debug("VAD states reset.")
 
-    def chat_and_close(self, text):
+    async def chat_and_close(self, text):
         """Chat with the user and then close the connection"""
         try:
             # Use the existing chat method
-            self.chat(text)
+            await self.chat(text)
 
             # After chat is complete, close the connection
             self.close_after_chat = True
@@ -1,6 +1,7 @@
 from config.logger import setup_logging
 import json
 import uuid
+import asyncio
 from core.handle.sendAudioHandle import send_stt_message
 from core.handle.helloHandle import checkWakeupWords
 from core.utils.util import remove_punctuation_and_length
@@ -30,6 +31,34 @@ async def handle_user_intent(conn, text):
     return await process_intent_result(conn, intent_result, text)
 
 
+async def handle_user_intent_speculative(conn, text):
+    """
+    意图识别与对话大模型同时请求，省去两次大模型调用的串行等待
+    对话输出在意图确认前只缓存不播放：继续聊天时立即放行，否则取消对话请求
+    返回意图是否已被处理
+    """
+    if await check_direct_exit(conn, text):
+        return True
+    if await checkWakeupWords(conn, text):
+        return True
+
+    # 意图识别使用对话启动前的历史记录
+    dialogue_history = list(conn.dialogue.dialogue)
+    intent_gate = asyncio.get_running_loop().create_future()
+    conn.chat_task = asyncio.create_task(conn.chat(text, intent_gate=intent_gate))
+    handled = False
+    try:
+        intent_result = await analyze_intent_with_llm(conn, text, dialogue_history)
+        if intent_result:
+            handled = await process_intent_result(conn, intent_result, text)
+        if not handled:
+            # 识别文字先于回复发给设备
+            await send_stt_message(conn, text)
+    finally:
+        intent_gate.set_result(not handled)
+    return handled
+
+
 async def check_direct_exit(conn, text):
     """检查是否有明确的退出命令"""
     _, text = remove_punctuation_and_length(text)
@@ -43,16 +72,17 @@ async def check_direct_exit(conn, text):
     return False
 
 
-async def analyze_intent_with_llm(conn, text):
+async def analyze_intent_with_llm(conn, text, dialogue_history=None):
     """使用LLM分析用户意图"""
     if not hasattr(conn, "intent") or not conn.intent:
         logger.bind(tag=TAG).warning("意图识别服务未初始化")
         return None
 
     # 对话历史记录
-    dialogue = conn.dialogue
+    if dialogue_history is None:
+        dialogue_history = conn.dialogue.dialogue
     try:
-        intent_result = await conn.intent.detect_intent(conn, dialogue.dialogue, text)
+        intent_result = await conn.intent.detect_intent(conn, dialogue_history, text)
         return intent_result
     except Exception as e:
         logger.bind(tag=TAG).error(f"意图识别失败: {str(e)}")
@@ -114,11 +144,8 @@ async def process_intent_result(conn, intent_result, original_text):
                             else 0
                         )
                         conn.recode_first_last_text(text, text_index)
-                        future = conn.executor.submit(
-                            conn.speak_and_play, text, text_index
-                        )
+                        conn.submit_tts(text, text_index)
                         conn.llm_finish_task = True
-                        conn.tts_queue.put(future)
                         conn.dialogue.put(Message(role="assistant", content=text))
 
             # 将函数执行放在线程池中
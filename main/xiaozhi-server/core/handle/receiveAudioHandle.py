@@ -1,20 +1,30 @@
 from config.logger import setup_logging
 import time
+import asyncio
 from core.utils.util import remove_punctuation_and_length
-from core.handle.sendAudioHandle import send_stt_message
-from core.handle.intentHandler import handle_user_intent
+from core.handle.sendAudioHandle import send_stt_message, send_stt_partial_message
+from core.handle.intentHandler import (
+    handle_user_intent,
+    handle_user_intent_speculative,
+)
 from core.utils.output_counter import check_device_output_limit
+from core.utils.audio_assets import audio_assets
 
 TAG = __name__
 logger = setup_logging()
 
 
 async def handleAudioMessage(conn, audio):
+    """音频包放入连接的接入队列，队列满时阻塞接收，对客户端形成背压"""
+    await conn.audio_ingest_queue.put(audio)
+
+
+async def processAudioMessage(conn, audio):
     if not conn.asr_server_receive:
         logger.bind(tag=TAG).debug(f"前期数据处理中，暂停接收")
         return
     if conn.client_listen_mode == "auto":
-        have_voice = conn.vad.is_vad(conn, audio)
+        have_voice = await conn.vad.detect(conn, audio, conn.audio_executor)
     else:
         have_voice = conn.client_have_voice
 
@@ -28,15 +38,28 @@ async def handleAudioMessage(conn, audio):
         return
     conn.client_no_voice_last_time = 0.0
     conn.asr_audio.append(audio)
+    await feed_asr_stream(conn, audio)
     # 如果本段有声音，且已经停止了
     if conn.client_voice_stop:
         conn.client_abort = False
         conn.asr_server_receive = False
+        asr_stream, conn.asr_stream = conn.asr_stream, None
         # 音频太短了，无法识别
         if len(conn.asr_audio) < 15:
             conn.asr_server_receive = True
+            if asr_stream is not None:
+                # 云端流式识别可能已建立连接，放弃本段时需要关闭
+                await asr_stream.close()
         else:
-            text, _ = await conn.asr.speech_to_text(conn.asr_audio, conn.session_id)
+            text = None
+            if asr_stream is not None:
+                # 流式识别在说话过程中已持续解码，这里取最终结果
+                text = await asr_stream.finish_async(conn.audio_executor)
+            if text is None:
+                # 未开启流式识别，或流式识别失败时整段识别
+                text, _ = await conn.asr.speech_to_text(
+                    conn.asr_audio, conn.session_id
+                )
             logger.bind(tag=TAG).info(f"识别文本: {text}")
             text_len, _ = remove_punctuation_and_length(text)
             if text_len > 0:
@@ -47,6 +70,26 @@ async def handleAudioMessage(conn, audio):
         conn.reset_vad_states()
 
 
+async def feed_asr_stream(conn, audio):
+    """支持流式识别时，边说边把音频送入ASR，并下发中间识别结果"""
+    if conn.asr_stream is None:
+        conn.asr_stream = conn.asr.start_stream(conn.session_id)
+        if conn.asr_stream is None:
+            return
+        # 补上句首缓存的音频帧
+        packets = conn.asr_audio
+    else:
+        packets = [audio]
+    partial_text = None
+    for packet in packets:
+        if packet:
+            text = await conn.asr_stream.feed_opus_async(packet, conn.audio_executor)
+            if text:
+                partial_text = text
+    if partial_text:
+        await send_stt_partial_message(conn, partial_text)
+
+
 async def startToChat(conn, text):
     if conn.need_bind:
         await check_bind_device(conn)
@@ -60,6 +103,12 @@ async def startToChat(conn, text):
             await max_out_size(conn)
             return
 
+    if conn.speculative_intent and not conn.use_function_call_mode:
+        # 意图分析与对话同时进行，对话在意图确认后才播放
+        if await handle_user_intent_speculative(conn, text):
+            conn.asr_server_receive = True
+        return
+
     # 首先进行意图分析
     intent_handled = await handle_user_intent(conn, text)
 
@@ -70,11 +119,12 @@ async def startToChat(conn, text):
 
     # 意图未被处理，继续常规聊天流程
     await send_stt_message(conn, text)
+    # 对话在事件循环中以协程执行，不阻塞音频接收
     if conn.use_function_call_mode:
         # 使用支持function calling的聊天方法
-        conn.executor.submit(conn.chat_with_function_calling, text)
+        conn.chat_task = asyncio.create_task(conn.chat_with_function_calling(text))
     else:
-        conn.executor.submit(conn.chat, text)
+        conn.chat_task = asyncio.create_task(conn.chat(text))
 
 
 async def no_voice_close_connect(conn):
@@ -105,7 +155,7 @@ async def max_out_size(conn):
     conn.tts_last_text_index = 0
     conn.llm_finish_task = True
     file_path = "config/assets/max_output_size.wav"
-    opus_packets, _ = conn.tts.audio_to_opus_data(file_path)
+    opus_packets, _ = audio_assets.get(file_path)
     conn.audio_play_queue.put((opus_packets, text, 0))
     conn.close_after_chat = True
 
@@ -127,7 +177,7 @@ async def check_bind_device(conn):
 
         # 播放提示音
         music_path = "config/assets/bind_code.wav"
-        opus_packets, _ = conn.tts.audio_to_opus_data(music_path)
+        opus_packets, _ = audio_assets.get(music_path)
         conn.audio_play_queue.put((opus_packets, text, 0))
 
         # 逐个播放数字
@@ -135,7 +185,7 @@ async def check_bind_device(conn):
             try:
                 digit = conn.bind_code[i]
                 num_path = f"config/assets/bind_code/{digit}.wav"
-                num_packets, _ = conn.tts.audio_to_opus_data(num_path)
+                num_packets, _ = audio_assets.get(num_path)
                 conn.audio_play_queue.put((num_packets, None, i + 1))
             except Exception as e:
                 logger.bind(tag=TAG).error(f"播放数字音频失败: {e}")
@@ -147,5 +197,5 @@ async def check_bind_device(conn):
         conn.tts_last_text_index = 0
         conn.llm_finish_task = True
         music_path = "config/assets/bind_not_found.wav"
-        opus_packets, _ = conn.tts.audio_to_opus_data(music_path)
+        opus_packets, _ = audio_assets.get(music_path)
         conn.audio_play_queue.put((opus_packets, text, 0))
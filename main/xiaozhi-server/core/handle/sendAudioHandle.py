@@ -5,6 +5,8 @@ import time
 from core.utils.util import (
     get_string_no_punctuation_or_emoji,
 )
+from core.utils.audio_frame_stream import AudioFrameStream
+from core.utils.audio_assets import audio_assets
 
 TAG = __name__
 logger = setup_logging()
@@ -12,12 +14,17 @@ logger = setup_logging()
 
 async def sendAudioMessage(conn, audios, text, text_index=0):
     # 发送句子开始消息
+    on_first_packet = None
     if text_index == conn.tts_first_text_index:
         logger.bind(tag=TAG).info(f"发送第一段语音: {text}")
+        on_first_packet = conn.record_first_audio_latency
     await send_tts_message(conn, "sentence_start", text)
 
     # 播放音频
-    await sendAudio(conn, audios)
+    try:
+        await sendAudio(conn, audios, on_first_packet)
+    except asyncio.TimeoutError:
+        logger.bind(tag=TAG).error(f"流式TTS超时: {text}")
 
     await send_tts_message(conn, "sentence_end", text)
 
@@ -28,33 +35,44 @@ async def sendAudioMessage(conn, audios, text, text_index=0):
             await conn.close()
 
 
-# 播放音频
-async def sendAudio(conn, audios):
+async def _iterate_packets(audios):
+    if isinstance(audios, AudioFrameStream):
+        async for opus_packet in audios:
+            yield opus_packet
+    else:
+        for opus_packet in audios:
+            yield opus_packet
+
+
+# 播放音频，audios为Opus帧列表，或流式合成时的AudioFrameStream
+async def sendAudio(conn, audios, on_first_packet=None):
     # 流控参数优化
     frame_duration = 60  # 帧时长（毫秒），匹配 Opus 编码
-    start_time = time.perf_counter()
+    start_time = None
     play_position = 0
 
-    # 预缓冲：发送前 3 帧
-    pre_buffer = min(3, len(audios))
-    for i in range(pre_buffer):
-        await conn.websocket.send(audios[i])
-
-    # 正常播放剩余帧
-    for opus_packet in audios[pre_buffer:]:
-        if conn.client_abort:
-            return
-
-        # 计算预期发送时间
-        expected_time = start_time + (play_position / 1000)
-        current_time = time.perf_counter()
-        delay = expected_time - current_time
-        if delay > 0:
-            await asyncio.sleep(delay)
+    # 预缓冲：前 3 帧到达后立即发送
+    pre_buffer = 3
+    sent = 0
+    async for opus_packet in _iterate_packets(audios):
+        if sent >= pre_buffer:
+            if conn.client_abort:
+                return
+
+            # 计算预期发送时间
+            expected_time = start_time + (play_position / 1000)
+            current_time = time.perf_counter()
+            delay = expected_time - current_time
+            if delay > 0:
+                await asyncio.sleep(delay)
+            play_position += frame_duration
+        elif start_time is None:
+            start_time = time.perf_counter()
 
         await conn.websocket.send(opus_packet)
-
-        play_position += frame_duration
+        if sent == 0 and on_first_packet is not None:
+            on_first_packet()
+        sent += 1
 
 
 async def send_tts_message(conn, state, text=None):
@@ -71,7 +89,7 @@ async def send_tts_message(conn, state, text=None):
             stop_tts_notify_voice = conn.config.get(
                 "stop_tts_notify_voice", "config/assets/tts_notify.mp3"
             )
-            audios, duration = conn.tts.audio_to_opus_data(stop_tts_notify_voice)
+            audios, duration = audio_assets.get(stop_tts_notify_voice)
             await sendAudio(conn, audios)
         # 清除服务端讲话状态
         conn.clearSpeakStatus()
@@ -80,6 +98,14 @@ async def send_tts_message(conn, state, text=None):
     await conn.websocket.send(json.dumps(message))
 
 
+async def send_stt_partial_message(conn, text):
+    """发送流式识别的中间结果"""
+    stt_text = get_string_no_punctuation_or_emoji(text)
+    await conn.websocket.send(
+        json.dumps({"type": "stt", "text": stt_text, "session_id": conn.session_id})
+    )
+
+
 async def send_stt_message(conn, text):
     """发送 STT 状态消息"""
     stt_text = get_string_no_punctuation_or_emoji(text)
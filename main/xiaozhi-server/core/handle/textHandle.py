@@ -40,6 +40,7 @@ async def handleTextMessage(conn, message):
                 conn.asr_server_receive = False
                 conn.client_have_voice = False
                 conn.asr_audio.clear()
+                await conn.close_asr_stream()
                 if "text" in msg_json:
                     text = msg_json["text"]
                     _, text = remove_punctuation_and_length(text)
@@ -1,12 +1,135 @@
+import time
+import queue
+import asyncio
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import Future
 from typing import Optional, Tuple, List
 
+import numpy as np
+import opuslib_next
 from config.logger import setup_logging
 
 TAG = __name__
 logger = setup_logging()
 
 
+class ASRStreamBase(ABC):
+    """
+    流式识别会话：说话过程中不断送入音频数据，说完后获取最终结果
+    - 本地模型实现同步的feed/finish，由异步接口放到线程池中执行
+    - 云端流式识别本身是异步IO，直接覆盖feed_opus_async/finish_async
+    """
+
+    def __init__(self):
+        self.decoder = opuslib_next.Decoder(16000, 1)  # 16kHz, 单声道
+
+    def decode_opus(self, opus_packet: bytes) -> Optional[bytes]:
+        try:
+            return self.decoder.decode(opus_packet, 960)  # 960 samples = 60ms
+        except opuslib_next.OpusError as e:
+            logger.bind(tag=TAG).error(f"Opus解码错误: {e}", exc_info=True)
+            return None
+
+    def feed_opus(self, opus_packet: bytes) -> Optional[str]:
+        """解码Opus数据包后送入识别"""
+        pcm_frame = self.decode_opus(opus_packet)
+        if pcm_frame is None:
+            return None
+        return self.feed(pcm_frame)
+
+    @abstractmethod
+    def feed(self, pcm: bytes) -> Optional[str]:
+        """送入16kHz单声道16位PCM数据，有新的中间结果时返回中间文本"""
+        pass
+
+    @abstractmethod
+    def finish(self) -> Optional[str]:
+        """结束本段语音，返回最终识别文本，识别失败时返回None"""
+        pass
+
+    async def feed_opus_async(self, opus_packet: bytes, executor=None) -> Optional[str]:
+        return await run_in_executor(executor, self.feed_opus, opus_packet)
+
+    async def finish_async(self, executor=None) -> Optional[str]:
+        return await run_in_executor(executor, self.finish)
+
+    async def close(self):
+        """放弃本段识别，释放资源"""
+        pass
+
+
+async def run_in_executor(executor, func, *args):
+    """有线程池时在线程池中执行，否则直接在当前线程执行"""
+    if executor is None:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+class ASRWorkerPool:
+    """
+    共享的识别服务：多个模型副本各自一个工作线程，从同一个请求队列取任务
+    - 在批量窗口内到达的多路语音合并为一次批量推理
+    - 结果通过Future返回，调用方不阻塞事件循环
+    - recognize_batch(model, samples_list) 返回与输入一一对应的识别文本
+    """
+
+    def __init__(self, name, models, recognize_batch, batch_window_ms, max_batch_size, stats):
+        self.recognize_batch = recognize_batch
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.stats = stats
+        self.pending = queue.Queue()
+        self.threads = []
+        for i, model in enumerate(models):
+            thread = threading.Thread(
+                target=self._worker_thread,
+                args=(model,),
+                name=f"{name}-worker-{i}",
+                daemon=True,
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, samples) -> Future:
+        future = Future()
+        self.pending.put((samples, time.monotonic(), future))
+        return future
+
+    def _collect_batch(self):
+        batch = [self.pending.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout <= 0:
+                    # 窗口已过，只取已经在排队的请求
+                    batch.append(self.pending.get_nowait())
+                else:
+                    batch.append(self.pending.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker_thread(self, model):
+        while True:
+            batch = self._collect_batch()
+            start = time.monotonic()
+            try:
+                texts = self.recognize_batch(model, [item[0] for item in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            inference_ms = (time.monotonic() - start) * 1000
+            for (_, submit_time, future), text in zip(batch, texts):
+                self.stats.record(
+                    queue=(start - submit_time) * 1000,
+                    inference=inference_ms,
+                )
+                future.set_result(text)
+
+
 class ASRProviderBase(ABC):
     @abstractmethod
     def save_audio_to_file(self, opus_data: List[bytes], session_id: str) -> str:
@@ -17,3 +140,29 @@ class ASRProviderBase(ABC):
     async def speech_to_text(self, opus_data: List[bytes], session_id: str) -> Tuple[Optional[str], Optional[str]]:
         """将语音数据转换为文本"""
         pass
+
+    @staticmethod
+    def opus_to_pcm_float32(opus_data: List[bytes]) -> np.ndarray:
+        """将Opus数据包解码为归一化到[-1, 1]的float32采样，直接在内存中交给模型"""
+        decoder = opuslib_next.Decoder(16000, 1)  # 16kHz, 单声道
+        pcm_data = []
+        for opus_packet in opus_data:
+            try:
+                pcm_frame = decoder.decode(opus_packet, 960)  # 960 samples = 60ms
+                pcm_data.append(pcm_frame)
+            except opuslib_next.OpusError as e:
+                logger.bind(tag=TAG).error(f"Opus解码错误: {e}", exc_info=True)
+        samples = np.frombuffer(b"".join(pcm_data), dtype=np.int16)
+        return samples.astype(np.float32) / 32768.0
+
+    def save_audio_in_background(self, opus_data: List[bytes], session_id: str):
+        """调试用：在后台线程中把识别音频保存为WAV文件，不阻塞识别"""
+        threading.Thread(
+            target=self.save_audio_to_file,
+            args=(list(opus_data), session_id),
+            daemon=True,
+        ).start()
+
+    def start_stream(self, session_id: str) -> Optional[ASRStreamBase]:
+        """开始一段流式识别，不支持流式识别的ASR返回None，使用speech_to_text整段识别"""
+        return None
@@ -1,15 +1,15 @@
 import time
-import io
 import wave
 import os
+import asyncio
 from typing import Optional, Tuple, List
 import uuid
-import websockets
 import json
 import gzip
 
 import opuslib_next
-from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.base import ASRProviderBase, ASRStreamBase
+from core.utils.connection_pool import WebsocketPool
 
 from config.logger import setup_logging
 
@@ -83,6 +83,84 @@ def parse_response(res):
     return result
 
 
+class DoubaoASRStream(ASRStreamBase):
+    """边说边把原始PCM按分段大小发给云端，说完后只需发送最后一包并等待最终结果"""
+
+    def __init__(self, provider):
+        super().__init__()
+        self.provider = provider
+        self.websocket = None
+        self.receive_task = None
+        self.pending = bytearray()
+        self.text = ""
+        self.reported_text = ""
+        self.failed = False
+
+    async def feed_opus_async(self, opus_packet: bytes, executor=None) -> Optional[str]:
+        if self.failed:
+            return None
+        # 单个60ms数据包解码开销很小，直接在事件循环中完成
+        pcm_frame = self.decode_opus(opus_packet)
+        if pcm_frame is None:
+            return None
+        partial_text = self.feed(pcm_frame)
+        if len(self.pending) >= self.provider.stream_segment_size:
+            await self._send_pending(last=False)
+        return partial_text
+
+    def feed(self, pcm: bytes) -> Optional[str]:
+        """缓存PCM等待发送，返回云端新推送的中间结果；发送由feed_opus_async完成"""
+        self.pending.extend(pcm)
+        if self.text != self.reported_text:
+            self.reported_text = self.text
+            return self.text
+        return None
+
+    def finish(self) -> Optional[str]:
+        """同步接口无法等待云端的最终结果，返回None时调用方整段识别"""
+        return None
+
+    async def finish_async(self, executor=None) -> Optional[str]:
+        try:
+            await self._send_pending(last=True)
+            if self.failed:
+                return None
+            return await asyncio.wait_for(self.receive_task, self.provider.timeout)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"流式识别失败: {e}")
+            return None
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self.receive_task is not None and not self.receive_task.done():
+            self.receive_task.cancel()
+        if self.websocket is not None:
+            await self.websocket.close()
+            self.websocket = None
+
+    def _on_partial(self, text: str):
+        self.text = text
+
+    async def _send_pending(self, last: bool):
+        if self.failed:
+            return
+        try:
+            if self.websocket is None:
+                self.websocket = await self.provider.open_session()
+                self.receive_task = asyncio.create_task(
+                    self.provider.receive_text(self.websocket, self._on_partial)
+                )
+            await self.websocket.send(
+                self.provider.build_audio_request(bytes(self.pending), last)
+            )
+            self.pending.clear()
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"流式识别发送失败: {e}")
+            self.failed = True
+            await self.close()
+
+
 class ASRProvider(ASRProviderBase):
     def __init__(self, config: dict, delete_audio_file: bool):
         self.appid = config.get("appid")
@@ -91,33 +169,63 @@ class ASRProvider(ASRProviderBase):
         self.output_dir = config.get("output_dir")
 
         self.host = "openspeech.bytedance.com"
-        self.ws_url = f"wss://{self.host}/api/v2/asr"
+        self.ws_url = config.get("ws_url", f"wss://{self.host}/api/v2/asr")
         self.success_code = 1000
         self.seg_duration = 15000
+        self.timeout = float(config.get("timeout", 10))
+
+        # 16kHz单声道16位PCM，分段大小按字节预先算好
+        bytes_per_second = 16000 * 2
+        self.segment_size = int(bytes_per_second * self.seg_duration / 1000)
+        # 流式识别：说话过程中每累积stream_segment_ms的音频发送一包
+        self.streaming = str(config.get("streaming", False)).lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+        self.stream_segment_size = int(
+            bytes_per_second * int(config.get("stream_segment_ms", 200)) / 1000
+        )
+
+        # 协议头固定不变，预先生成
+        self.full_request_header = bytes(self._generate_header())
+        self.audio_request_header = bytes(
+            self._generate_header(message_type=CLIENT_AUDIO_ONLY_REQUEST)
+        )
+        self.last_audio_request_header = bytes(
+            self._generate_header(
+                message_type=CLIENT_AUDIO_ONLY_REQUEST,
+                message_type_specific_flags=NEG_SEQUENCE,
+            )
+        )
+
+        # 预热的websocket连接，识别时省去TCP/TLS握手
+        self.auth_header = {'Authorization': 'Bearer; {}'.format(self.access_token)}
+        self.ws_pool = WebsocketPool(
+            self.ws_url,
+            headers=self.auth_header,
+            size=int(config.get("pool_size", 2)),
+            max_idle_seconds=float(config.get("pool_max_idle_seconds", 30)),
+        )
 
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
 
+    def start_stream(self, session_id: str) -> Optional[ASRStreamBase]:
+        if not self.streaming:
+            return None
+        return DoubaoASRStream(self)
+
     def save_audio_to_file(self, opus_data: List[bytes], session_id: str) -> str:
         """将Opus音频数据解码并保存为WAV文件"""
         file_name = f"asr_{session_id}_{uuid.uuid4()}.wav"
         file_path = os.path.join(self.output_dir, file_name)
 
-        decoder = opuslib_next.Decoder(16000, 1)  # 16kHz, 单声道
-        pcm_data = []
-
-        for opus_packet in opus_data:
-            try:
-                pcm_frame = decoder.decode(opus_packet, 960)  # 960 samples = 60ms
-                pcm_data.append(pcm_frame)
-            except opuslib_next.OpusError as e:
-                logger.bind(tag=TAG).error(f"Opus解码错误: {e}", exc_info=True)
-
         with wave.open(file_path, "wb") as wf:
             wf.setnchannels(1)
             wf.setsampwidth(2)  # 2 bytes = 16-bit
             wf.setframerate(16000)
-            wf.writeframes(b"".join(pcm_data))
+            wf.writeframes(b"".join(self.decode_opus(opus_data, session_id)))
 
         return file_path
 
@@ -149,7 +257,7 @@ class ASRProvider(ASRProviderBase):
                 "sequence": 1
             },
             "audio": {
-                "format": "wav",
+                "format": "raw",
                 "rate": 16000,
                 "language": "zh-CN",
                 "bits": 16,
@@ -158,57 +266,53 @@ class ASRProvider(ASRProviderBase):
             },
         }
 
-    async def _send_request(self, audio_data: List[bytes], segment_size: int) -> Optional[str]:
+    @staticmethod
+    def _pack(header: bytes, payload: bytes) -> bytes:
+        payload_bytes = gzip.compress(payload)
+        return b"".join((header, len(payload_bytes).to_bytes(4, 'big'), payload_bytes))
+
+    def build_audio_request(self, pcm_chunk: bytes, last: bool) -> bytes:
+        header = self.last_audio_request_header if last else self.audio_request_header
+        return self._pack(header, pcm_chunk)
+
+    async def open_session(self):
+        """取一个预热连接并发送请求参数，返回可以开始发送音频的websocket"""
+        websocket = await self.ws_pool.acquire()
+        try:
+            request_params = self._construct_request(str(uuid.uuid4()))
+            await websocket.send(
+                self._pack(self.full_request_header, json.dumps(request_params).encode())
+            )
+            result = parse_response(await websocket.recv())
+            if 'payload_msg' in result and result['payload_msg']['code'] != self.success_code:
+                raise IOError(f"ASR error: {result}")
+            return websocket
+        except Exception:
+            await websocket.close()
+            raise
+
+    async def receive_text(self, websocket, on_partial=None) -> str:
+        """接收识别结果直到最后一包，中间结果通过on_partial回调"""
+        while True:
+            result = parse_response(await websocket.recv())
+            payload = result.get('payload_msg')
+            if not isinstance(payload, dict) or payload.get('code') != self.success_code:
+                raise IOError(f"ASR error: {result}")
+            text = payload['result'][0]["text"] if payload.get('result') else ""
+            # 最后一包音频对应的结果sequence为负数
+            if payload.get('sequence', -1) < 0:
+                return text
+            if on_partial is not None:
+                on_partial(text)
+
+    async def _send_request(self, pcm_data: bytes) -> Optional[str]:
         """Send request to Volcano ASR service."""
         try:
-            auth_header = {'Authorization': 'Bearer; {}'.format(self.access_token)}
-            async with websockets.connect(self.ws_url, additional_headers=auth_header) as websocket:
-                # Prepare request data
-                request_params = self._construct_request(str(uuid.uuid4()))
-                print(request_params)
-                payload_bytes = str.encode(json.dumps(request_params))
-                payload_bytes = gzip.compress(payload_bytes)
-                full_client_request = self._generate_header()
-                full_client_request.extend((len(payload_bytes)).to_bytes(4, 'big'))  # payload size(4 bytes)
-                full_client_request.extend(payload_bytes)  # payload
-
-                # Send header and metadata
-                # full_client_request
-                await websocket.send(full_client_request)
-                res = await websocket.recv()
-                result = parse_response(res)
-                if 'payload_msg' in result and result['payload_msg']['code'] != self.success_code:
-                    logger.bind(tag=TAG).error(f"ASR error: {result}")
-                    return None
-
-                for seq, (chunk, last) in enumerate(self.slice_data(audio_data, segment_size), 1):
-                    if last:
-                        audio_only_request = self._generate_header(
-                            message_type=CLIENT_AUDIO_ONLY_REQUEST,
-                            message_type_specific_flags=NEG_SEQUENCE
-                        )
-                    else:
-                        audio_only_request = self._generate_header(
-                            message_type=CLIENT_AUDIO_ONLY_REQUEST
-                        )
-                    payload_bytes = gzip.compress(chunk)
-                    audio_only_request.extend((len(payload_bytes)).to_bytes(4, 'big'))  # payload size(4 bytes)
-                    audio_only_request.extend(payload_bytes)  # payload
-                    # Send audio data
-                    await websocket.send(audio_only_request)
-
-                # Receive response
-                response = await websocket.recv()
-                result = parse_response(response)
-
-                if 'payload_msg' in result and result['payload_msg']['code'] == self.success_code:
-                    if len(result['payload_msg']['result']) > 0:
-                        return result['payload_msg']['result'][0]["text"]
-                    return None
-                else:
-                    logger.bind(tag=TAG).error(f"ASR error: {result}")
-                    return None
-
+            websocket = await self.open_session()
+            async with websocket:
+                for chunk, last in self.slice_data(pcm_data, self.segment_size):
+                    await websocket.send(self.build_audio_request(chunk, last))
+                return await asyncio.wait_for(self.receive_text(websocket), self.timeout)
         except Exception as e:
             logger.bind(tag=TAG).error(f"ASR request failed: {e}", exc_info=True)
             return None
@@ -228,19 +332,11 @@ class ASRProvider(ASRProviderBase):
 
         return pcm_data
 
-    @staticmethod
-    def read_wav_info(data: io.BytesIO = None) -> (int, int, int, int, int):
-        with io.BytesIO(data) as _f:
-            wave_fp = wave.open(_f, 'rb')
-            nchannels, sampwidth, framerate, nframes = wave_fp.getparams()[:4]
-            wave_bytes = wave_fp.readframes(nframes)
-        return nchannels, sampwidth, framerate, nframes, len(wave_bytes)
-
     @staticmethod
     def slice_data(data: bytes, chunk_size: int) -> (list, bool):
         """
         slice data
-        :param data: wav data
+        :param data: pcm data
         :param chunk_size: the segment size in one request
         :return: segment data, last flag
         """
@@ -255,27 +351,12 @@ class ASRProvider(ASRProviderBase):
     async def speech_to_text(self, opus_data: List[bytes], session_id: str) -> Tuple[Optional[str], Optional[str]]:
         """将语音数据转换为文本"""
         try:
-            # 合并所有opus数据包
-            pcm_data = self.decode_opus(opus_data, session_id)
-            combined_pcm_data = b''.join(pcm_data)
-
-            wav_buffer = io.BytesIO()
-
-            with wave.open(wav_buffer, "wb") as wav_file:
-                wav_file.setnchannels(1)  # 设置声道数
-                wav_file.setsampwidth(2)  # 设置采样宽度
-                wav_file.setframerate(16000)  # 设置采样率
-                wav_file.writeframes(combined_pcm_data)  # 写入 PCM 数据
-
-            # 获取封装后的 WAV 数据
-            wav_data = wav_buffer.getvalue()
-            nchannels, sampwidth, framerate, nframes, wav_len = self.read_wav_info(wav_data)
-            size_per_sec = nchannels * sampwidth * framerate
-            segment_size = int(size_per_sec * self.seg_duration / 1000)
+            # 合并所有opus数据包，直接发送原始PCM
+            pcm_data = b''.join(self.decode_opus(opus_data, session_id))
 
             # 语音识别
             start_time = time.time()
-            text = await self._send_request(wav_data, segment_size)
+            text = await self._send_request(pcm_data)
             if text:
                 logger.bind(tag=TAG).debug(f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}")
                 return text, None
@@ -3,11 +3,13 @@ import wave
 import os
 import sys
 import io
+import asyncio
 from config.logger import setup_logging
 from typing import Optional, Tuple, List
 import uuid
 import opuslib_next
-from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.base import ASRProviderBase, ASRWorkerPool
+from core.utils.latency_stats import LatencyStats
 
 from funasr import AutoModel
 from funasr.utils.postprocess_utils import rich_transcription_postprocess
@@ -33,6 +35,18 @@ class CaptureOutput:
             logger.bind(tag=TAG).info(self.output.strip())
 
 
+def recognize_batch(model, samples_list):
+    results = model.generate(
+        input=samples_list,
+        cache={},
+        language="auto",
+        use_itn=True,
+        batch_size=len(samples_list),
+        batch_size_s=60,
+    )
+    return [rich_transcription_postprocess(result["text"]) for result in results]
+
+
 class ASRProvider(ASRProviderBase):
     def __init__(self, config: dict, delete_audio_file: bool):
         self.model_dir = config.get("model_dir")
@@ -41,14 +55,29 @@ class ASRProvider(ASRProviderBase):
 
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
-        with CaptureOutput():
-            self.model = AutoModel(
-                model=self.model_dir,
-                vad_kwargs={"max_single_segment_time": 30000},
-                disable_update=True,
-                hub="hf"
-                # device="cuda:0",  # 启用GPU加速
-            )
+        # 模型副本数，每个副本一个工作线程，可并行识别多路语音
+        replicas = max(1, int(config.get("replicas", 1)))
+        models = []
+        for _ in range(replicas):
+            with CaptureOutput():
+                models.append(
+                    AutoModel(
+                        model=self.model_dir,
+                        vad_kwargs={"max_single_segment_time": 30000},
+                        disable_update=True,
+                        hub="hf"
+                        # device="cuda:0",  # 启用GPU加速
+                    )
+                )
+        self.model = models[0]
+        self.pool = ASRWorkerPool(
+            "funasr",
+            models,
+            recognize_batch,
+            float(config.get("batch_window_ms", 0)),
+            max(1, int(config.get("max_batch_size", 8))),
+            LatencyStats("FunASR", int(config.get("stats_report_seconds", 60))),
+        )
 
     def save_audio_to_file(self, opus_data: List[bytes], session_id: str) -> str:
         """将Opus音频数据解码并保存为WAV文件"""
@@ -75,36 +104,23 @@ class ASRProvider(ASRProviderBase):
 
     async def speech_to_text(self, opus_data: List[bytes], session_id: str) -> Tuple[Optional[str], Optional[str]]:
         """语音转文本主处理逻辑"""
-        file_path = None
         try:
-            # 保存音频文件
+            # 解码音频，直接以内存中的采样交给模型，不再落盘
             start_time = time.time()
-            file_path = self.save_audio_to_file(opus_data, session_id)
-            logger.bind(tag=TAG).debug(f"音频文件保存耗时: {time.time() - start_time:.3f}s | 路径: {file_path}")
+            samples = self.opus_to_pcm_float32(opus_data)
+            logger.bind(tag=TAG).debug(f"音频解码耗时: {time.time() - start_time:.3f}s | 时长: {len(samples) / 16000:.2f}s")
+
+            # 不删除音频时，异步保存一份WAV用于调试
+            if not self.delete_audio_file:
+                self.save_audio_in_background(opus_data, session_id)
 
             # 语音识别
             start_time = time.time()
-            result = self.model.generate(
-                input=file_path,
-                cache={},
-                language="auto",
-                use_itn=True,
-                batch_size_s=60,
-            )
-            text = rich_transcription_postprocess(result[0]["text"])
+            text = await asyncio.wrap_future(self.pool.submit(samples))
             logger.bind(tag=TAG).debug(f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}")
 
-            return text, file_path
+            return text, None
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"语音识别失败: {e}", exc_info=True)
             return "", None
-
-        finally:
-            # 文件清理逻辑
-            if self.delete_audio_file and file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.bind(tag=TAG).debug(f"已删除临时音频文件: {file_path}")
-                except Exception as e:
-                    logger.bind(tag=TAG).error(f"文件删除失败: {file_path} | 错误: {e}")
@@ -3,11 +3,19 @@ import wave
 import os
 import sys
 import io
+import asyncio
 from config.logger import setup_logging
 from typing import Optional, Tuple, List
 import uuid
 import opuslib_next
-from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.base import (
+    ASRProviderBase,
+    ASRStreamBase,
+    ASRWorkerPool,
+    run_in_executor,
+)
+from core.utils.latency_stats import LatencyStats
+from core.utils.pcm_buffer import PcmRingBuffer
 
 import numpy as np
 import sherpa_onnx
@@ -35,12 +43,138 @@ class CaptureOutput:
             logger.bind(tag=TAG).info(self.output.strip())
 
 
+def recognize_batch(recognizer, samples_list):
+    """多段语音各建一个stream，通过decode_streams一次并行解码"""
+    streams = []
+    for samples in samples_list:
+        s = recognizer.create_stream()
+        s.accept_waveform(16000, samples)
+        streams.append(s)
+    if len(streams) == 1:
+        recognizer.decode_stream(streams[0])
+    else:
+        recognizer.decode_streams(streams)
+    return [s.result.text for s in streams]
+
+
+class SherpaASRStream(ASRStreamBase):
+    """
+    对已累积的音频做分块离线解码，说话过程中持续产出中间结果
+    - 按送入的总采样数判断是否需要中间解码，缓冲区满时不会停止更新
+    - 音频按max_stream_seconds分窗，窗口写满时解码一次并固定文本，之后只解码新窗口，
+      长语音的解码量随时长线性增长
+    """
+
+    def __init__(self, provider):
+        super().__init__()
+        self.provider = provider
+        self.audio_buffer = PcmRingBuffer(16000 * provider.stream_max_seconds)
+        # 已送入的总采样数，只增不减
+        self.total_samples = 0
+        # 最近一次解码时的总采样数
+        self.decoded_samples = 0
+        # 已写满的窗口的识别结果
+        self.committed_text = ""
+        # 当前窗口的识别结果
+        self.window_text = ""
+
+    @property
+    def text(self) -> str:
+        return self.committed_text + self.window_text
+
+    def _window_full(self, pcm: bytes) -> bool:
+        return len(self.audio_buffer) + len(pcm) // 2 > self.audio_buffer.capacity
+
+    def _write(self, pcm: bytes) -> bool:
+        """写入当前窗口，返回是否已累积足够的新音频需要解码"""
+        self.audio_buffer.write(pcm)
+        self.total_samples += len(pcm) // 2
+        return (
+            self.total_samples - self.decoded_samples
+            >= self.provider.stream_partial_samples
+        )
+
+    def _update(self, text: str) -> str:
+        self.window_text = text
+        self.decoded_samples = self.total_samples
+        return self.text
+
+    def _commit(self, text: str):
+        """当前窗口已写满，固定其识别结果，从空窗口继续"""
+        self.committed_text += text
+        self.window_text = ""
+        self.audio_buffer.clear()
+        self.decoded_samples = self.total_samples
+
+    def feed(self, pcm: bytes) -> Optional[str]:
+        if self._window_full(pcm):
+            self._commit(self._recognize())
+        if self._write(pcm):
+            return self._update(self._recognize())
+        return None
+
+    def finish(self) -> str:
+        # 总是对当前窗口做最后一次解码，不复用中间结果
+        if len(self.audio_buffer):
+            self._update(self._recognize())
+        return self.text
+
+    async def feed_opus_async(self, opus_packet: bytes, executor=None) -> Optional[str]:
+        # Opus解码在音频线程池中执行，识别结果异步等待，不占用音频线程
+        pcm_frame = await run_in_executor(executor, self.decode_opus, opus_packet)
+        if pcm_frame is None:
+            return None
+        if self._window_full(pcm_frame):
+            self._commit(await self._recognize_async())
+        if self._write(pcm_frame):
+            return self._update(await self._recognize_async())
+        return None
+
+    async def finish_async(self, executor=None) -> str:
+        if len(self.audio_buffer):
+            self._update(await self._recognize_async())
+        return self.text
+
+    def _recognize(self) -> str:
+        start_time = time.time()
+        samples = self.audio_buffer.peek()
+        # 在识别线程池中解码；等待期间本会话不会再写入缓冲区，视图保持有效
+        text = self.provider.pool.submit(samples).result()
+        self._log(samples, text, start_time)
+        return text
+
+    async def _recognize_async(self) -> str:
+        start_time = time.time()
+        samples = self.audio_buffer.peek()
+        # 本会话的音频按顺序送入，等待识别结果期间不会写入缓冲区，视图保持有效
+        text = await asyncio.wrap_future(self.provider.pool.submit(samples))
+        self._log(samples, text, start_time)
+        return text
+
+    @staticmethod
+    def _log(samples, text, start_time):
+        logger.bind(tag=TAG).debug(
+            f"流式识别耗时: {time.time() - start_time:.3f}s | 音频: {len(samples) / 16000:.2f}s | 结果: {text}"
+        )
+
+
 class ASRProvider(ASRProviderBase):
     def __init__(self, config: dict, delete_audio_file: bool):
         self.model_dir = config.get("model_dir")
         self.output_dir = config.get("output_dir")
         self.delete_audio_file = delete_audio_file
 
+        # 流式识别：说话过程中每累积partial_interval_ms的新音频解码一次
+        self.streaming = str(config.get("streaming", False)).lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+        self.stream_partial_samples = int(
+            16000 * int(config.get("partial_interval_ms", 600)) / 1000
+        )
+        self.stream_max_seconds = int(config.get("max_stream_seconds", 30))
+
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
         
@@ -71,17 +205,44 @@ class ASRProvider(ASRProviderBase):
             logger.bind(tag=TAG).error(f"模型文件处理失败: {str(e)}")
             raise
 
-        with CaptureOutput():
-            self.model = sherpa_onnx.OfflineRecognizer.from_sense_voice(
-                model=self.model_path,
-                tokens=self.tokens_path,
-                num_threads=2,
-                sample_rate=16000,
-                feature_dim=80,
-                decoding_method="greedy_search",
-                debug=False,
-                use_itn=True,
-            )
+        # 每个识别器副本使用num_threads个线程；replicas为0时按CPU核数自动计算副本数
+        num_threads = max(1, int(config.get("num_threads", 2)))
+        replicas = int(config.get("replicas", 1))
+        if replicas <= 0:
+            replicas = max(1, (os.cpu_count() or 1) // num_threads)
+        logger.bind(tag=TAG).info(
+            f"SherpaASR识别器副本数: {replicas}, 每个副本线程数: {num_threads}"
+        )
+
+        recognizers = []
+        for _ in range(replicas):
+            with CaptureOutput():
+                recognizers.append(
+                    sherpa_onnx.OfflineRecognizer.from_sense_voice(
+                        model=self.model_path,
+                        tokens=self.tokens_path,
+                        num_threads=num_threads,
+                        sample_rate=16000,
+                        feature_dim=80,
+                        decoding_method="greedy_search",
+                        debug=False,
+                        use_itn=True,
+                    )
+                )
+        self.model = recognizers[0]
+        self.pool = ASRWorkerPool(
+            "sherpa",
+            recognizers,
+            recognize_batch,
+            float(config.get("batch_window_ms", 0)),
+            max(1, int(config.get("max_batch_size", 8))),
+            LatencyStats("SherpaASR", int(config.get("stats_report_seconds", 60))),
+        )
+
+    def start_stream(self, session_id: str) -> Optional[ASRStreamBase]:
+        if not self.streaming:
+            return None
+        return SherpaASRStream(self)
 
     def save_audio_to_file(self, opus_data: List[bytes], session_id: str) -> str:
         """将Opus音频数据解码并保存为WAV文件"""
@@ -132,33 +293,23 @@ class ASRProvider(ASRProviderBase):
 
     async def speech_to_text(self, opus_data: List[bytes], session_id: str) -> Tuple[Optional[str], Optional[str]]:
         """语音转文本主处理逻辑"""
-        file_path = None
         try:
-            # 保存音频文件
+            # 解码音频，直接以内存中的采样交给模型，不再落盘
             start_time = time.time()
-            file_path = self.save_audio_to_file(opus_data, session_id)
-            logger.bind(tag=TAG).debug(f"音频文件保存耗时: {time.time() - start_time:.3f}s | 路径: {file_path}")
+            samples = self.opus_to_pcm_float32(opus_data)
+            logger.bind(tag=TAG).debug(f"音频解码耗时: {time.time() - start_time:.3f}s | 时长: {len(samples) / 16000:.2f}s")
+
+            # 不删除音频时，异步保存一份WAV用于调试
+            if not self.delete_audio_file:
+                self.save_audio_in_background(opus_data, session_id)
 
             # 语音识别
             start_time = time.time()
-            s = self.model.create_stream()
-            samples, sample_rate = self.read_wave(file_path)
-            s.accept_waveform(sample_rate, samples)
-            self.model.decode_stream(s)
-            text = s.result.text
+            text = await asyncio.wrap_future(self.pool.submit(samples))
             logger.bind(tag=TAG).debug(f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}")
 
-            return text, file_path
+            return text, None
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"语音识别失败: {e}", exc_info=True)
             return "", None
-
-        finally:
-            # 文件清理逻辑
-            if self.delete_audio_file and file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.bind(tag=TAG).debug(f"已删除临时音频文件: {file_path}")
-                except Exception as e:
-                    logger.bind(tag=TAG).error(f"文件删除失败: {file_path} | 错误: {e}")
@@ -10,7 +10,7 @@ from typing import Optional, Tuple, List
 import wave
 import opuslib_next
 
-import requests
+import httpx
 from core.providers.asr.base import ASRProviderBase
 from config.logger import setup_logging
 
@@ -22,11 +22,38 @@ class ASRProvider(ASRProviderBase):
     API_VERSION = "2019-06-14"
     FORMAT = "pcm"  # 支持的音频格式：pcm, wav, mp3
 
+    SERVICE = "asr"
+    HOST = "asr.tencentcloudapi.com"
+    ACTION = "SentenceRecognition"
+    CONTENT_TYPE = "application/json; charset=utf-8"
+    ALGORITHM = "TC3-HMAC-SHA256"
+    SIGNED_HEADERS = "content-type;host;x-tc-action"
+    # 注意：头部信息需要按照ASCII升序排列，且key和value都转为小写
+    CANONICAL_HEADERS = (
+        f"content-type:{CONTENT_TYPE.lower()}\n"
+        f"host:{HOST.lower()}\n"
+        f"x-tc-action:{ACTION.lower()}\n"
+    )
+
     def __init__(self, config: dict, delete_audio_file: bool = True):
         self.secret_id = config.get("secret_id")
         self.secret_key = config.get("secret_key")
         self.output_dir = config.get("output_dir")
-        
+        self.api_url = config.get("api_url", self.API_URL)
+
+        # 复用长连接，省去每次识别的TCP/TLS握手
+        self.client = httpx.AsyncClient(
+            timeout=float(config.get("timeout", 10)),
+            limits=httpx.Limits(
+                max_connections=int(config.get("max_connections", 20)),
+                max_keepalive_connections=int(config.get("max_connections", 20)),
+                keepalive_expiry=float(config.get("keepalive_expiry", 60)),
+            ),
+        )
+        # 签名密钥只与日期相关，按日期缓存
+        self._signing_date = None
+        self._signing_key = None
+
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
 
@@ -97,7 +124,7 @@ class ASRProvider(ASRProviderBase):
 
             # 发送请求
             start_time = time.time()
-            result = self._send_request(request_body, timestamp, authorization)
+            result = await self._send_request(request_body, timestamp, authorization)
             
             if result:
                 logger.bind(tag=TAG).debug(f"腾讯云语音识别耗时: {time.time() - start_time:.3f}s | 结果: {result}")
@@ -121,6 +148,15 @@ class ASRProvider(ASRProviderBase):
         }
         return json.dumps(request_map)
 
+    def _get_signing_key(self, date: str) -> bytes:
+        """计算签名密钥，同一天内复用"""
+        if self._signing_date != date:
+            secret_date = self._hmac_sha256(f"TC3{self.secret_key}", date)
+            secret_service = self._hmac_sha256(secret_date, self.SERVICE)
+            self._signing_key = self._hmac_sha256(secret_service, "tc3_request")
+            self._signing_date = date
+        return self._signing_key
+
     def _get_auth_headers(self, request_body: str) -> Tuple[str, str]:
         """获取认证头"""
         try:
@@ -129,65 +165,28 @@ class ASRProvider(ASRProviderBase):
             timestamp = str(int(now.timestamp()))
             date = now.strftime("%Y-%m-%d")
 
-            # 服务名称必须是 "asr"
-            service = "asr"
-
             # 拼接凭证范围
-            credential_scope = f"{date}/{service}/tc3_request"
-
-            # 使用TC3-HMAC-SHA256签名方法
-            algorithm = "TC3-HMAC-SHA256"
-
-            # 构建规范请求字符串
-            http_request_method = "POST"
-            canonical_uri = "/"
-            canonical_query_string = ""
+            credential_scope = f"{date}/{self.SERVICE}/tc3_request"
 
-            # 注意：头部信息需要按照ASCII升序排列，且key和value都转为小写
-            # 必须包含content-type和host头部
-            content_type = "application/json; charset=utf-8"
-            host = "asr.tencentcloudapi.com"
-            action = "SentenceRecognition"  # 接口名称
-
-            # 构建规范头部信息，注意顺序和格式
-            canonical_headers = f"content-type:{content_type.lower()}\n" + \
-                               f"host:{host.lower()}\n" + \
-                               f"x-tc-action:{action.lower()}\n"
-
-            signed_headers = "content-type;host;x-tc-action"
-
-            # 请求体哈希值
-            payload_hash = self._sha256_hex(request_body)
-
-            # 构建规范请求字符串
-            canonical_request = f"{http_request_method}\n" + \
-                               f"{canonical_uri}\n" + \
-                               f"{canonical_query_string}\n" + \
-                               f"{canonical_headers}\n" + \
-                               f"{signed_headers}\n" + \
-                               f"{payload_hash}"
-
-            # 计算规范请求的哈希值
-            hashed_canonical_request = self._sha256_hex(canonical_request)
+            # 构建规范请求字符串，只有请求体哈希值每次不同
+            canonical_request = "POST\n/\n\n" + \
+                               f"{self.CANONICAL_HEADERS}\n" + \
+                               f"{self.SIGNED_HEADERS}\n" + \
+                               f"{self._sha256_hex(request_body)}"
 
             # 构建待签名字符串
-            string_to_sign = f"{algorithm}\n" + \
+            string_to_sign = f"{self.ALGORITHM}\n" + \
                             f"{timestamp}\n" + \
                             f"{credential_scope}\n" + \
-                            f"{hashed_canonical_request}"
-
-            # 计算签名密钥
-            secret_date = self._hmac_sha256(f"TC3{self.secret_key}", date)
-            secret_service = self._hmac_sha256(secret_date, service)
-            secret_signing = self._hmac_sha256(secret_service, "tc3_request")
+                            f"{self._sha256_hex(canonical_request)}"
 
             # 计算签名
-            signature = self._bytes_to_hex(self._hmac_sha256(secret_signing, string_to_sign))
+            signature = self._bytes_to_hex(self._hmac_sha256(self._get_signing_key(date), string_to_sign))
 
             # 构建授权头
-            authorization = f"{algorithm} " + \
+            authorization = f"{self.ALGORITHM} " + \
                            f"Credential={self.secret_id}/{credential_scope}, " + \
-                           f"SignedHeaders={signed_headers}, " + \
+                           f"SignedHeaders={self.SIGNED_HEADERS}, " + \
                            f"Signature={signature}"
 
             return timestamp, authorization
@@ -196,23 +195,23 @@ class ASRProvider(ASRProviderBase):
             logger.bind(tag=TAG).error(f"生成认证头失败: {e}", exc_info=True)
             raise RuntimeError(f"生成认证头失败: {e}")
 
-    def _send_request(self, request_body: str, timestamp: str, authorization: str) -> Optional[str]:
+    async def _send_request(self, request_body: str, timestamp: str, authorization: str) -> Optional[str]:
         """发送请求到腾讯云API"""
         headers = {
-            "Content-Type": "application/json; charset=utf-8",
-            "Host": "asr.tencentcloudapi.com",
+            "Content-Type": self.CONTENT_TYPE,
+            "Host": self.HOST,
             "Authorization": authorization,
-            "X-TC-Action": "SentenceRecognition",
+            "X-TC-Action": self.ACTION,
             "X-TC-Version": self.API_VERSION,
             "X-TC-Timestamp": timestamp,
             "X-TC-Region": "ap-shanghai"
         }
 
         try:
-            response = requests.post(self.API_URL, headers=headers, data=request_body)
+            response = await self.client.post(self.api_url, headers=headers, content=request_body)
             
-            if not response.ok:
-                raise IOError(f"请求失败: {response.status_code} {response.reason}")
+            if not response.is_success:
+                raise IOError(f"请求失败: {response.status_code} {response.reason_phrase}")
             
             response_json = response.json()
             
@@ -1,25 +1,79 @@
 from typing import List, Dict
 from ..base import IntentProviderBase
+from ..local_classifier import LocalIntentClassifier
 from plugins_func.functions.play_music import initialize_music_handler
 from config.logger import setup_logging
+from core.utils.ttl_cache import LRUTTLCache
+from core.utils.util import remove_punctuation_and_length
 import re
 import json
-import hashlib
 import time
+import atexit
+import hashlib
+import unicodedata
+import threading
 
 TAG = __name__
 logger = setup_logging()
 
+# 所有连接共享的意图缓存，缓存配置(大小、有效期、快照文件)相同的实例共用一个
+_intent_caches = {}
+_intent_cache_lock = threading.Lock()
+
+
+def get_intent_cache(config) -> LRUTTLCache:
+    settings = (
+        int(config.get("cache_max_size", 1000)),
+        float(config.get("cache_ttl_seconds", 600)),
+        config.get("cache_snapshot_file") or None,
+    )
+    with _intent_cache_lock:
+        cache = _intent_caches.get(settings)
+        if cache is None:
+            max_size, ttl_seconds, snapshot_file = settings
+            cache = LRUTTLCache(
+                max_size=max_size,
+                ttl_seconds=ttl_seconds,
+                snapshot_file=snapshot_file,
+            )
+            if cache.snapshot_file:
+                # 退出时保存最后一次快照
+                atexit.register(cache.save)
+            _intent_caches[settings] = cache
+        return cache
+
+
+def intent_cache_namespace(config, intent_options):
+    """缓存键的前缀：意图识别类型、使用的模型或可选的意图不同时，识别结果不能互用"""
+    data = json.dumps(
+        [config.get("type"), config.get("llm"), intent_options],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:12]
+
+
+def normalize_intent_text(text):
+    """缓存键：全角转半角、去掉标点和空格、统一小写，让“播放音乐。”与“播放音乐”命中同一条"""
+    text = unicodedata.normalize("NFKC", text)
+    _, text = remove_punctuation_and_length(text)
+    return text.lower()
+
 
 class IntentProvider(IntentProviderBase):
     def __init__(self, config):
         super().__init__(config)
         self.llm = None
         self.promot = self.get_intent_system_prompt()
-        # 添加缓存管理
-        self.intent_cache = {}  # 缓存意图识别结果
-        self.cache_expiry = 600  # 缓存有效期10分钟
-        self.cache_max_size = 100  # 最多缓存100个意图
+        # 缓存意图识别结果，进程内共享
+        self.intent_cache = get_intent_cache(config)
+        self.cache_namespace = intent_cache_namespace(config, self.intent_options)
+        # 本地快速识别，置信度足够时不请求大模型
+        self.local_classifier = None
+        if config.get("local_classifier", True):
+            self.local_classifier = LocalIntentClassifier.from_registry(
+                self.intent_options, float(config.get("local_threshold", 0.7))
+            )
 
     def get_intent_system_prompt(self) -> str:
         """
@@ -69,27 +123,6 @@ class IntentProvider(IntentProviderBase):
         )
         return prompt
 
-    def clean_cache(self):
-        """清理过期缓存"""
-        now = time.time()
-        # 找出过期键
-        expired_keys = [
-            k
-            for k, v in self.intent_cache.items()
-            if now - v["timestamp"] > self.cache_expiry
-        ]
-        for key in expired_keys:
-            del self.intent_cache[key]
-
-        # 如果缓存太大，移除最旧的条目
-        if len(self.intent_cache) > self.cache_max_size:
-            # 按时间戳排序并保留最新的条目
-            sorted_items = sorted(
-                self.intent_cache.items(), key=lambda x: x[1]["timestamp"]
-            )
-            for key, _ in sorted_items[: len(sorted_items) - self.cache_max_size]:
-                del self.intent_cache[key]
-
     async def detect_intent(self, conn, dialogue_history: List[Dict], text: str) -> str:
         if not self.llm:
             raise ValueError("LLM provider not set")
@@ -101,22 +134,35 @@ class IntentProvider(IntentProviderBase):
         model_info = getattr(self.llm, "model_name", str(self.llm.__class__.__name__))
         logger.bind(tag=TAG).debug(f"使用意图识别模型: {model_info}")
 
+        # 本地快速识别
+        if self.local_classifier is not None:
+            local_result = self.local_classifier.classify(text)
+            if local_result is not None:
+                function_name, function_args, confidence = local_result
+                function_call = {"name": function_name}
+                if function_args:
+                    function_call["arguments"] = function_args
+                intent = json.dumps({"function_call": function_call}, ensure_ascii=False)
+                logger.bind(tag=TAG).info(
+                    f"本地识别到意图: {intent}, 置信度: {confidence:.2f}, "
+                    f"耗时: {(time.time() - total_start_time) * 1000:.2f}ms"
+                )
+                return intent
+
         # 计算缓存键
-        cache_key = hashlib.md5(text.encode()).hexdigest()
+        cache_key = normalize_intent_text(text)
+        if cache_key:
+            cache_key = f"{self.cache_namespace}:{cache_key}"
 
         # 检查缓存
-        if cache_key in self.intent_cache:
-            cache_entry = self.intent_cache[cache_key]
-            # 检查缓存是否过期
-            if time.time() - cache_entry["timestamp"] <= self.cache_expiry:
-                cache_time = time.time() - total_start_time
-                logger.bind(tag=TAG).debug(
-                    f"使用缓存的意图: {cache_key} -> {cache_entry['intent']}, 耗时: {cache_time:.4f}秒"
-                )
-                return cache_entry["intent"]
-
-        # 清理缓存
-        self.clean_cache()
+        cached_intent = self.intent_cache.get(cache_key) if cache_key else None
+        if cached_intent is not None:
+            cache_time = time.time() - total_start_time
+            logger.bind(tag=TAG).debug(
+                f"使用缓存的意图: {cache_key} -> {cached_intent}, 耗时: {cache_time:.4f}秒, "
+                f"缓存统计: {self.intent_cache.stats()}"
+            )
+            return cached_intent
 
         # 构建用户最后一句话的提示
         msgStr = ""
@@ -142,7 +188,7 @@ class IntentProvider(IntentProviderBase):
         llm_start_time = time.time()
         logger.bind(tag=TAG).debug(f"开始LLM意图识别调用, 模型: {model_info}")
 
-        intent = self.llm.response_no_stream(
+        intent = await self.llm.aresponse_no_stream(
             system_prompt=prompt_music, user_prompt=user_prompt
         )
 
@@ -183,10 +229,8 @@ class IntentProvider(IntentProviderBase):
                 )
 
                 # 添加到缓存
-                self.intent_cache[cache_key] = {
-                    "intent": intent,
-                    "timestamp": time.time(),
-                }
+                if cache_key:
+                    self.intent_cache.put(cache_key, intent)
 
                 # 后处理时间
                 postprocess_time = time.time() - postprocess_start_time
@@ -196,10 +240,8 @@ class IntentProvider(IntentProviderBase):
                 return intent
             else:
                 # 添加到缓存
-                self.intent_cache[cache_key] = {
-                    "intent": intent,
-                    "timestamp": time.time(),
-                }
+                if cache_key:
+                    self.intent_cache.put(cache_key, intent)
 
                 # 后处理时间
                 postprocess_time = time.time() - postprocess_start_time
@@ -0,0 +1,175 @@
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from core.utils.util import remove_punctuation_and_length
+
+# 规则匹配的置信度
+RULE_CONFIDENCE = 1.0
+# 规则只能大致判断的说法，低于默认阈值，交给大模型确认
+WEAK_RULE_CONFIDENCE = 0.5
+# 规则判断为容易混淆的说法，直接交给大模型
+_DEFER = object()
+
+# 查询日期时间：问句以时间相关词结尾，避免“几点睡觉比较好”这类闲聊
+TIME_PATTERN = re.compile(
+    r"^(请问|你知道|告诉我|帮我看看)?(现在|今天|明天|昨天|今儿|当前|这会儿)?(是|的)?"
+    r"(几点|几点钟|几点了|几号|星期几|周几|礼拜几|什么日子|多少号|哪天|日期|时间|农历几月几号)"
+    r"(了|啊|呀|呢|吗)*$"
+)
+# 结束对话：整句只包含告别用语
+EXIT_PATTERN = re.compile(
+    r"^(好的?|那|那就|嗯|我们|我)*(再见|拜拜|拜|88|退下吧?|退出|不聊了|不想聊了|下次再聊|明天再聊|回头再聊|"
+    r"我先走了|我要睡觉了|晚安|没事了)(啦|了|吧|哦|喽|咯)*$"
+)
+# 播放音乐：以播放类动词开头，后面为歌名；“播放器”“播放量”等名词不是动词
+MUSIC_PATTERN = re.compile(
+    r"^(请|帮我|给我|你|麻烦|随便)*"
+    r"(播放(?![器量键机列次记速模])|放一首|放首|放一下|来一首|来首|唱一首|唱首|我想听|我要听|听一首|听首|放点)"
+    r"(一首|首|一下|点)?(.*?)(给我听|给我们听|给大家听|听听)?(吧|呀|啊|好吗|可以吗)?$"
+)
+# 本身就指一首歌的动词，后面的内容可以直接当作歌名
+SONG_VERBS = {"播放", "放一首", "放首", "来一首", "来首", "唱一首", "唱首", "听一首", "听首"}
+# 动词后面跟“一下”“点”时可以是任何内容，如“播放一下刚才说的内容”
+WEAK_FILLERS = {"一下", "点"}
+# “我想听”“放一下”等后面可以是任何内容，需要有歌、音乐等字样才算点歌
+MUSIC_CUE_PATTERN = re.compile(r"歌|音乐|曲|《")
+# 以播放类动词开头但不是点歌的说法，如“我想听你讲故事”“我想听听你的看法”
+NOT_MUSIC_PATTERN = re.compile(
+    r"^(你|我|他|她|它|听|大家)|故事|笑话|你讲|你说|诗|新闻|天气|看法|意见|想法|建议|声音|音量|大一点|小一点|"
+    r"刚才|内容|说的|录音|视频|怎么|什么|吗$"
+)
+# 会产生实际操作(结束会话、播放音乐)的意图只接受规则匹配，相似度匹配的交给大模型
+SIDE_EFFECT_INTENTS = {"handle_exit_intent", "play_music"}
+# 没有指定歌名时的说法
+GENERIC_SONGS = {"", "音乐", "歌", "歌曲", "一首歌", "首歌", "儿歌", "个歌", "的歌", "随便", "随机"}
+
+# 各意图的示例说法，与函数描述一起作为相似度比较的语料
+DEFAULT_EXAMPLES = {
+    "get_time": ["现在几点", "今天几号", "今天星期几", "现在什么时间", "今天农历几号"],
+    "handle_exit_intent": ["再见", "拜拜", "我们下次再聊", "不想聊了", "退出对话"],
+    "play_music": ["播放音乐", "放首歌", "唱首歌", "来一首歌", "我想听歌"],
+    "continue_chat": ["你好", "你是谁", "讲个笑话", "今天心情不好", "你会做什么"],
+}
+
+
+def _ngrams(text):
+    """字符一元和二元组"""
+    grams = list(text)
+    grams.extend(text[i : i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class LocalIntentClassifier:
+    """
+    本地意图快速识别，常见说法不必请求大模型
+    - 先匹配关键词/正则规则，命中即返回，置信度为1
+    - 未命中时用字符n-gram TF-IDF与各意图的示例句、函数描述比较余弦相似度；
+      结束会话、播放音乐等有实际操作的意图不通过相似度识别
+    - 置信度低于threshold时返回None，由大模型识别
+    """
+
+    def __init__(
+        self,
+        intent_options: List[Dict],
+        threshold: float = 0.7,
+        examples: Optional[Dict[str, List[str]]] = None,
+        function_descriptions: Optional[Dict[str, str]] = None,
+    ):
+        self.threshold = threshold
+        self.intent_names = {option["name"] for option in intent_options}
+        documents = []
+        for option in intent_options:
+            name = option["name"]
+            samples = list((examples or DEFAULT_EXAMPLES).get(name, []))
+            samples.append(option.get("desc", ""))
+            if function_descriptions and name in function_descriptions:
+                samples.append(function_descriptions[name])
+            for sample in samples:
+                _, sample = remove_punctuation_and_length(sample)
+                if sample:
+                    documents.append((name, Counter(_ngrams(sample))))
+
+        # 逆文档频率
+        document_frequency = Counter()
+        for _, grams in documents:
+            document_frequency.update(grams.keys())
+        self.idf = {
+            gram: math.log((1 + len(documents)) / (1 + count)) + 1
+            for gram, count in document_frequency.items()
+        }
+        self.documents = [(name, self._vectorize(grams)) for name, grams in documents]
+
+    @classmethod
+    def from_registry(cls, intent_options, threshold=0.7, examples=None):
+        """使用已注册插件的函数描述作为语料"""
+        from plugins_func.register import all_function_registry
+
+        function_descriptions = {}
+        for name, item in all_function_registry.items():
+            description = item.description
+            if isinstance(description, dict):
+                description = description.get("function", {}).get("description", "")
+            function_descriptions[name] = description or ""
+        return cls(intent_options, threshold, examples, function_descriptions)
+
+    def _vectorize(self, grams: Counter):
+        vector = {gram: count * self.idf.get(gram, 0.0) for gram, count in grams.items()}
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        if norm == 0:
+            return {}
+        return {gram: value / norm for gram, value in vector.items()}
+
+    def classify(self, text) -> Optional[Tuple[str, Dict, float]]:
+        """返回(意图名称, 参数, 置信度)，置信度不足时返回None"""
+        _, text = remove_punctuation_and_length(text)
+        if not text:
+            return None
+
+        result = self._match_rules(text)
+        if result is _DEFER:
+            return None
+        if result is None:
+            result = self._match_similarity(text)
+        if result is None or result[0] not in self.intent_names:
+            return None
+        if result[2] < self.threshold:
+            return None
+        return result
+
+    def _match_rules(self, text):
+        if TIME_PATTERN.match(text):
+            return "get_time", {}, RULE_CONFIDENCE
+        if EXIT_PATTERN.match(text):
+            return "handle_exit_intent", {}, RULE_CONFIDENCE
+        match = MUSIC_PATTERN.match(text)
+        if match:
+            verb, filler, remainder = match.group(2), match.group(3), match.group(4)
+            if not remainder and not filler:
+                return _DEFER
+            if NOT_MUSIC_PATTERN.search(remainder):
+                return _DEFER
+            song_name = remainder.strip("《》")
+            if song_name in GENERIC_SONGS:
+                song_name = "random"
+            confidence = RULE_CONFIDENCE
+            song_verb = verb in SONG_VERBS and filler not in WEAK_FILLERS
+            if not song_verb and not MUSIC_CUE_PATTERN.search(remainder):
+                # 如“我想听周杰伦的晴天”，是否点歌交给大模型判断
+                confidence = WEAK_RULE_CONFIDENCE
+            return "play_music", {"song_name": song_name}, confidence
+        return None
+
+    def _match_similarity(self, text):
+        vector = self._vectorize(Counter(_ngrams(text)))
+        if not vector:
+            return None
+        best_name, best_score = None, 0.0
+        for name, document in self.documents:
+            score = sum(value * document.get(gram, 0.0) for gram, value in vector.items())
+            if score > best_score:
+                best_name, best_score = name, score
+        if best_name is None or best_name in SIDE_EFFECT_INTENTS:
+            # 如“你不想聊了吗”“再见用英语怎么说”，字面相近但不是告别
+            return None
+        return best_name, {}, best_score
@@ -1,9 +1,36 @@
+import asyncio
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
 
 TAG = __name__
 logger = setup_logging()
 
+# 同步生成器迭代结束的标记
+_END = object()
+
+
+async def iterate_in_thread(generator, executor=None):
+    """
+    把同步生成器转换为异步生成器：每次取下一个元素都放到线程池执行，
+    线程只在等待下一个token期间被占用，不会整段对话独占一个线程
+    """
+    loop = asyncio.get_running_loop()
+    iterator = iter(generator)
+    try:
+        while True:
+            item = await loop.run_in_executor(executor, next, iterator, _END)
+            if item is _END:
+                break
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+
 class LLMProviderBase(ABC):
     @abstractmethod
     def response(self, session_id, dialogue):
@@ -25,15 +52,44 @@ class LLMProviderBase(ABC):
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in Ollama response generation: {e}")
             return "【LLM服务响应异常】"
-    
+
     def response_with_functions(self, session_id, dialogue, functions=None):
         """
         Default implementation for function calling (streaming)
         This should be overridden by providers that support function calls
-        
+
         Returns: generator that yields either text tokens or a special function call token
         """
         # For providers that don't support functions, just return regular response
         for token in self.response(session_id, dialogue):
             yield token, None
 
+    async def aresponse(self, session_id, dialogue):
+        """
+        异步流式响应，在事件循环中直接使用
+        默认在线程池中迭代同步的response，支持原生异步客户端的provider应覆盖此方法
+        """
+        async for token in iterate_in_thread(self.response(session_id, dialogue)):
+            yield token
+
+    async def aresponse_no_stream(self, system_prompt, user_prompt):
+        try:
+            dialogue = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ]
+            result = ""
+            async for part in self.aresponse("", dialogue):
+                result += part
+            return result
+
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in LLM response generation: {e}")
+            return "【LLM服务响应异常】"
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None):
+        """异步的function call流式响应，默认在线程池中迭代同步的response_with_functions"""
+        async for item in iterate_in_thread(
+            self.response_with_functions(session_id, dialogue, functions)
+        ):
+            yield item
@@ -3,10 +3,14 @@ from config.logger import setup_logging
 import requests
 from core.providers.llm.base import LLMProviderBase
 from core.utils.util import check_model_key
+from core.utils.http_client_pool import http_client_pool
 
 TAG = __name__
 logger = setup_logging()
 
+# 流式响应结束标记
+_DONE = object()
+
 
 class LLMProvider(LLMProviderBase):
     def __init__(self, config):
@@ -15,51 +19,81 @@ class LLMProvider(LLMProviderBase):
         self.detail = config.get("detail", False)
         self.variables = config.get("variables", {})
         check_model_key("FastGPTLLM", self.api_key)
+        # 共享的异步客户端，流式响应不占用线程
+        self.async_client = http_client_pool.get_async_http_client(self.base_url)
 
-    def response(self, session_id, dialogue):
+    def _build_request(self, session_id, dialogue):
+        # 取最后一条用户消息
+        last_msg = next(m for m in reversed(dialogue) if m["role"] == "user")
+        return {
+            "stream": True,
+            "chatId": session_id,
+            "detail": self.detail,
+            "variables": self.variables,
+            "messages": [{"role": "user", "content": last_msg["content"]}],
+        }
+
+    def _parse_line(self, line):
+        """解析一行SSE数据，返回需要输出的文本，结束时返回_DONE，其余返回None"""
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.startswith("data: "):
+            return None
+        if line[6:] == "[DONE]":
+            return _DONE
         try:
-            # 取最后一条用户消息
-            last_msg = next(m for m in reversed(dialogue) if m["role"] == "user")
+            data = json.loads(line[6:])
+        except json.JSONDecodeError:
+            return None
+        if "choices" in data and len(data["choices"]) > 0:
+            delta = data["choices"][0].get("delta", {})
+            if delta and "content" in delta and delta["content"] is not None:
+                content = delta["content"]
+                if "<think>" in content or "</think>" in content:
+                    return None
+                return content
+        return None
 
+    def response(self, session_id, dialogue):
+        try:
             # 发起流式请求
             with requests.post(
                 f"{self.base_url}/chat/completions",
                 headers={"Authorization": f"Bearer {self.api_key}"},
-                json={
-                    "stream": True,
-                    "chatId": session_id,
-                    "detail": self.detail,
-                    "variables": self.variables,
-                    "messages": [{"role": "user", "content": last_msg["content"]}],
-                },
+                json=self._build_request(session_id, dialogue),
                 stream=True,
             ) as r:
                 for line in r.iter_lines():
-                    if line:
-                        try:
-                            if line.startswith(b"data: "):
-                                if line[6:].decode("utf-8") == "[DONE]":
-                                    break
+                    try:
+                        content = self._parse_line(line)
+                    except Exception:
+                        continue
+                    if content is _DONE:
+                        break
+                    if content:
+                        yield content
 
-                                data = json.loads(line[6:])
-                                if "choices" in data and len(data["choices"]) > 0:
-                                    delta = data["choices"][0].get("delta", {})
-                                    if (
-                                        delta
-                                        and "content" in delta
-                                        and delta["content"] is not None
-                                    ):
-                                        content = delta["content"]
-                                        if "<think>" in content:
-                                            continue
-                                        if "</think>" in content:
-                                            continue
-                                        yield content
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in response generation: {e}")
+            yield "【服务响应异常】"
 
-                        except json.JSONDecodeError as e:
-                            continue
-                        except Exception as e:
-                            continue
+    async def aresponse(self, session_id, dialogue):
+        try:
+            async with self.async_client.stream(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json=self._build_request(session_id, dialogue),
+            ) as r:
+                async for line in r.aiter_lines():
+                    try:
+                        content = self._parse_line(line)
+                    except Exception:
+                        continue
+                    if content is _DONE:
+                        break
+                    if content:
+                        yield content
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in response generation: {e}")
@@ -68,3 +102,8 @@ class LLMProvider(LLMProviderBase):
     def response_with_functions(self, session_id, dialogue, functions=None):
         logger.bind(tag=TAG).info(f"fastgpt暂未实现完整的工具调用（function call）")
         return self.response(session_id, dialogue)
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None):
+        logger.bind(tag=TAG).info(f"fastgpt暂未实现完整的工具调用（function call）")
+        async for token in self.aresponse(session_id, dialogue):
+            yield token, None
@@ -1,7 +1,8 @@
 from config.logger import setup_logging
-from openai import OpenAI
 import json
 from core.providers.llm.base import LLMProviderBase
+from core.utils.llm_client_pool import llm_client_pool
+from core.providers.llm.openai.openai import filter_think_content
 
 TAG = __name__
 logger = setup_logging()
@@ -16,9 +17,9 @@ class LLMProvider(LLMProviderBase):
         if not self.base_url.endswith("/v1"):
             self.base_url = f"{self.base_url}/v1"
 
-        self.client = OpenAI(
-            base_url=self.base_url,
-            api_key="ollama"  # Ollama doesn't need an API key but OpenAI client requires one
+        # Ollama doesn't need an API key but OpenAI client requires one
+        self.client, self.async_client = llm_client_pool.get_openai_clients(
+            "ollama", self.base_url, "ollama", self.model_name
         )
 
     def response(self, session_id, dialogue):
@@ -64,3 +65,34 @@ class LLMProvider(LLMProviderBase):
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in Ollama function call: {e}")
             yield f"【Ollama服务响应异常: {str(e)}】", None
+
+    async def aresponse(self, session_id, dialogue):
+        try:
+            responses = await self.async_client.chat.completions.create(
+                model=self.model_name, messages=dialogue, stream=True
+            )
+            is_active = True
+            async for chunk in responses:
+                content, is_active = filter_think_content(chunk, is_active)
+                if content:
+                    yield content
+
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in Ollama response generation: {e}")
+            yield "【Ollama服务响应异常】"
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None):
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model_name,
+                messages=dialogue,
+                stream=True,
+                tools=functions,
+            )
+
+            async for chunk in stream:
+                yield chunk.choices[0].delta.content, chunk.choices[0].delta.tool_calls
+
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in Ollama function call: {e}")
+            yield f"【Ollama服务响应异常: {str(e)}】", None
@@ -1,13 +1,44 @@
-import openai
 from openai.types import CompletionUsage
 from config.logger import setup_logging
 from core.utils.util import check_model_key
 from core.providers.llm.base import LLMProviderBase
+from core.utils.llm_client_pool import llm_client_pool
 
 TAG = __name__
 logger = setup_logging()
 
 
+def filter_think_content(chunk, is_active):
+    """取出chunk中的文本并过滤<think>标签内的内容，返回(文本, 是否在标签外)"""
+    try:
+        # 检查是否存在有效的choice且content不为空
+        delta = chunk.choices[0].delta if getattr(chunk, "choices", None) else None
+        content = delta.content if hasattr(delta, "content") else ""
+    except IndexError:
+        content = ""
+    if not content:
+        return "", is_active
+    # 处理标签跨多个chunk的情况
+    if "<think>" in content:
+        is_active = False
+        content = content.split("<think>")[0]
+    if "</think>" in content:
+        is_active = True
+        content = content.split("</think>")[-1]
+    return (content if is_active else ""), is_active
+
+
+def log_usage(chunk):
+    """存在 CompletionUsage 消息时，生成 Token 消耗 log"""
+    usage_info = getattr(chunk, "usage", None)
+    if isinstance(usage_info, CompletionUsage):
+        logger.bind(tag=TAG).info(
+            f"Token 消耗：输入 {getattr(usage_info, 'prompt_tokens', '未知')}，"
+            f"输出 {getattr(usage_info, 'completion_tokens', '未知')}，"
+            f"共计 {getattr(usage_info, 'total_tokens', '未知')}"
+        )
+
+
 class LLMProvider(LLMProviderBase):
     def __init__(self, config):
         self.model_name = config.get("model_name")
@@ -27,7 +58,10 @@ class LLMProvider(LLMProviderBase):
         self.max_tokens = max_tokens
 
         check_model_key("LLM", self.api_key)
-        self.client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url)
+        # 共享客户端，事件循环中使用异步客户端，不占用线程
+        self.client, self.async_client = llm_client_pool.get_openai_clients(
+            "openai", self.base_url, self.api_key, self.model_name
+        )
 
     def response(self, session_id, dialogue):
         try:
@@ -40,26 +74,9 @@ class LLMProvider(LLMProviderBase):
 
             is_active = True
             for chunk in responses:
-                try:
-                    # 检查是否存在有效的choice且content不为空
-                    delta = (
-                        chunk.choices[0].delta
-                        if getattr(chunk, "choices", None)
-                        else None
-                    )
-                    content = delta.content if hasattr(delta, "content") else ""
-                except IndexError:
-                    content = ""
+                content, is_active = filter_think_content(chunk, is_active)
                 if content:
-                    # 处理标签跨多个chunk的情况
-                    if "<think>" in content:
-                        is_active = False
-                        content = content.split("<think>")[0]
-                    if "</think>" in content:
-                        is_active = True
-                        content = content.split("</think>")[-1]
-                    if is_active:
-                        yield content
+                    yield content
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in response generation: {e}")
@@ -74,14 +91,42 @@ class LLMProvider(LLMProviderBase):
                 # 检查是否存在有效的choice且content不为空
                 if getattr(chunk, "choices", None):
                     yield chunk.choices[0].delta.content, chunk.choices[0].delta.tool_calls
-                # 存在 CompletionUsage 消息时，生成 Token 消耗 log
-                elif isinstance(getattr(chunk, 'usage', None), CompletionUsage):
-                    usage_info = getattr(chunk, 'usage', None)
-                    logger.bind(tag=TAG).info(
-                        f"Token 消耗：输入 {getattr(usage_info, 'prompt_tokens', '未知')}，" 
-                        f"输出 {getattr(usage_info, 'completion_tokens', '未知')}，"
-                        f"共计 {getattr(usage_info, 'total_tokens', '未知')}"
-                    )
+                else:
+                    log_usage(chunk)
+
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in function call streaming: {e}")
+            yield f"【OpenAI服务响应异常: {e}】", None
+
+    async def aresponse(self, session_id, dialogue):
+        try:
+            responses = await self.async_client.chat.completions.create(
+                model=self.model_name,
+                messages=dialogue,
+                stream=True,
+                max_tokens=self.max_tokens,
+            )
+
+            is_active = True
+            async for chunk in responses:
+                content, is_active = filter_think_content(chunk, is_active)
+                if content:
+                    yield content
+
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in response generation: {e}")
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None):
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model_name, messages=dialogue, stream=True, tools=functions
+            )
+
+            async for chunk in stream:
+                if getattr(chunk, "choices", None):
+                    yield chunk.choices[0].delta.content, chunk.choices[0].delta.tool_calls
+                else:
+                    log_usage(chunk)
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in function call streaming: {e}")
@@ -1,7 +1,8 @@
 from config.logger import setup_logging
-from openai import OpenAI
 import json
 from core.providers.llm.base import LLMProviderBase
+from core.utils.llm_client_pool import llm_client_pool
+from core.providers.llm.openai.openai import filter_think_content
 
 TAG = __name__
 logger = setup_logging()
@@ -19,9 +20,9 @@ class LLMProvider(LLMProviderBase):
         logger.bind(tag=TAG).info(f"Initializing Xinference LLM provider with model: {self.model_name}, base_url: {self.base_url}")
 
         try:
-            self.client = OpenAI(
-                base_url=self.base_url,
-                api_key="xinference"  # Xinference has a similar setup to Ollama where it doesn't need an actual key
+            # Xinference has a similar setup to Ollama where it doesn't need an actual key
+            self.client, self.async_client = llm_client_pool.get_openai_clients(
+                "xinference", self.base_url, "xinference", self.model_name
             )
             logger.bind(tag=TAG).info("Xinference client initialized successfully")
         except Exception as e:
@@ -82,4 +83,39 @@ class LLMProvider(LLMProviderBase):
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in Xinference function call: {e}")
-            yield {"type": "content", "content": f"【Xinference服务响应异常: {str(e)}】"} 
+            yield {"type": "content", "content": f"【Xinference服务响应异常: {str(e)}】"}
+
+    async def aresponse(self, session_id, dialogue):
+        try:
+            responses = await self.async_client.chat.completions.create(
+                model=self.model_name, messages=dialogue, stream=True
+            )
+            is_active = True
+            async for chunk in responses:
+                content, is_active = filter_think_content(chunk, is_active)
+                if content:
+                    yield content
+
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in Xinference response generation: {e}")
+            yield "【Xinference服务响应异常】"
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None):
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model_name,
+                messages=dialogue,
+                stream=True,
+                tools=functions,
+            )
+
+            async for chunk in stream:
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    yield delta.content, delta.tool_calls
+                elif delta.tool_calls:
+                    yield None, delta.tool_calls
+
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in Xinference function call: {e}")
+            yield {"type": "content", "content": f"【Xinference服务响应异常: {str(e)}】"}
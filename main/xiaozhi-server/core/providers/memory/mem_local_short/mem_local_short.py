@@ -142,7 +142,7 @@ class MemoryProvider(MemoryProviderBase):
         time_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
         msgStr += f"当前时间：{time_str}"
 
-        result = self.llm.response_no_stream(short_term_memory_prompt, msgStr)
+        result = await self.llm.aresponse_no_stream(short_term_memory_prompt, msgStr)
 
         json_str = extract_json_data(result)
         try:
@@ -13,6 +13,11 @@ import urllib.parse
 import time
 import uuid
 from urllib import parse
+
+# 实例池保活时提前刷新Token的时间(秒)
+TOKEN_REFRESH_AHEAD = 600
+
+
 class AccessToken:
     @staticmethod
     def _encode_text(text):
@@ -81,6 +86,7 @@ class TTSProvider(TTSProviderBase):
         self.appkey = config.get("appkey")
         self.format = config.get("format", "wav")
         self.sample_rate = config.get("sample_rate", 16000)
+        self.pcm_sample_rate = int(self.sample_rate)
         self.voice = config.get("voice", "xiaoyun")
         self.volume = config.get("volume", 50)
         self.speech_rate = config.get("speech_rate", 0)
@@ -142,10 +148,20 @@ class TTSProvider(TTSProviderBase):
         #              f"过期时间 {datetime.fromtimestamp(self.expire_time)} | "
         #              f"剩余 {remaining:.2f}秒")
         return time.time() > self.expire_time
+
+    def keep_warm(self):
+        """Token即将过期时在后台刷新，避免合成时才同步请求Token"""
+        if self.expire_time and time.time() > self.expire_time - TOKEN_REFRESH_AHEAD:
+            self._refresh_token()
+
     def generate_filename(self, extension=".wav"):
         return os.path.join(self.output_file, f"tts-{__name__}{datetime.now().date()}@{uuid.uuid4().hex}{extension}")
 
-    async def text_to_speak(self, text, output_file):
+    @property
+    def audio_format(self):
+        return self.format
+
+    async def text_to_audio(self, text):
         if self._is_token_expired():
             logger.warning("Token已过期，正在自动刷新...")
             self._refresh_token()
@@ -167,11 +183,9 @@ class TTSProvider(TTSProviderBase):
             if resp.status_code == 401:  # Token过期特殊处理
                 self._refresh_token()
                 resp = requests.post(self.api_url, json.dumps(request_json), headers=self.header)
-            # 检查返回请求数据的mime类型是否是audio/***，是则保存到指定路径下；返回的是binary格式的
+            # 检查返回请求数据的mime类型是否是audio/***，是则直接返回音频数据；返回的是binary格式的
             if resp.headers['Content-Type'].startswith('audio/'):
-                with open(output_file, 'wb') as f:
-                    f.write(resp.content)
-                return output_file
+                return resp.content
             else:
                 raise Exception(f"{__name__} status_code: {resp.status_code} response: {resp.content}")
         except Exception as e:
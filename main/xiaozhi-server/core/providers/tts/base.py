@@ -1,33 +1,96 @@
 import asyncio
+import threading
 from config.logger import setup_logging
 import os
-import numpy as np
-import opuslib_next
-from pydub import AudioSegment
 from abc import ABC, abstractmethod
 from core.utils.tts import MarkdownCleaner
+from core.utils.tts_pool import config_fingerprint
+from core.utils.audio_codec import (
+    SAMPLE_RATE,
+    StreamingOpusEncoder,
+    decode_to_pcm,
+    pcm_to_opus_data,
+)
 
 TAG = __name__
 logger = setup_logging()
 
+# 合成失败时的最大尝试次数
+MAX_REPEAT_TIME = 5
+
+_thread_local = threading.local()
+
+
+def run_in_thread_loop(coro):
+    """在当前线程常驻的事件循环中执行协程，避免每句话都用asyncio.run新建事件循环"""
+    loop = getattr(_thread_local, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_local.loop = loop
+    return loop.run_until_complete(coro)
+
 
 class TTSProviderBase(ABC):
+    # audio_format为pcm时音频数据的采样率，16kHz时不需要解码和重采样
+    pcm_sample_rate = SAMPLE_RATE
+
     def __init__(self, config, delete_audio_file):
+        # text_to_audio和text_to_speak的默认实现互相调用，子类至少要实现其中一个
+        cls = type(self)
+        if (
+            cls.text_to_audio is TTSProviderBase.text_to_audio
+            and cls.text_to_speak is TTSProviderBase.text_to_speak
+        ):
+            raise TypeError(f"{cls.__name__}需要实现text_to_audio或text_to_speak")
+        # delete_audio_file为False时是调试模式，合成的音频会另存为文件
         self.delete_audio_file = delete_audio_file
         self.output_file = config.get("output_dir")
+        # 流式合成，边合成边编码发送
+        self.streaming = str(config.get("streaming", False)).lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+        # 是否使用TTS短句缓存，音色随机或每次合成结果不同的provider应关闭
+        self.cache_enabled = str(config.get("cache", True)).lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+        # 所有连接合计的最大并发请求数和每秒请求数，未配置时使用tts_scheduler的默认值
+        self.max_concurrency = int(config.get("max_concurrency") or 0)
+        rate_limit = config.get("rate_limit")
+        self.rate_limit = float(rate_limit) if rate_limit not in (None, "") else None
+        # 完整配置的摘要，用于区分缓存和调度；参考音频、语速等任一配置不同都视为不同音色
+        self.config_fingerprint = config_fingerprint(type(self).__module__, config)
+
+    def keep_warm(self):
+        """实例池定期调用，用于提前刷新Token等，保持实例可直接合成"""
+        pass
 
     @abstractmethod
     def generate_filename(self):
         pass
 
+    @property
+    def audio_format(self):
+        """text_to_audio返回的音频格式，默认与生成的文件后缀一致"""
+        return os.path.splitext(self.generate_filename())[1].lstrip(".")
+
+    @property
+    def stream_audio_format(self):
+        """text_to_audio_stream返回的音频格式"""
+        return self.audio_format
+
     def to_tts(self, text):
+        """合成语音并保存为文件，返回文件路径，用于需要保留音频文件的场景"""
         tmp_file = self.generate_filename()
         try:
-            max_repeat_time = 5
+            max_repeat_time = MAX_REPEAT_TIME
             text = MarkdownCleaner.clean_markdown(text)
             while not os.path.exists(tmp_file) and max_repeat_time > 0:
                 try:
-                    asyncio.run(self.text_to_speak(text, tmp_file))
+                    run_in_thread_loop(self.text_to_speak(text, tmp_file))
                 except Exception as e:
                     logger.bind(tag=TAG).error(f"语音生成失败: {text}，错误: {e}")
                 if not os.path.exists(tmp_file):
@@ -37,7 +100,7 @@ class TTSProviderBase(ABC):
 
             if max_repeat_time > 0:
                 logger.bind(tag=TAG).info(
-                    f"语音生成成功: {text}:{tmp_file}，重试{5 - max_repeat_time}次"
+                    f"语音生成成功: {text}:{tmp_file}，重试{MAX_REPEAT_TIME - max_repeat_time}次"
                 )
 
             return tmp_file
@@ -45,9 +108,109 @@ class TTSProviderBase(ABC):
             logger.bind(tag=TAG).error(f"Failed to generate TTS file: {e}")
             return None
 
-    @abstractmethod
+    def to_tts_audio(self, text):
+        """合成语音并返回内存中的音频数据，失败时返回None"""
+        text = MarkdownCleaner.clean_markdown(text)
+        for repeat_time in range(MAX_REPEAT_TIME):
+            audio = None
+            try:
+                audio = run_in_thread_loop(self.text_to_audio(text))
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"语音生成失败: {text}，错误: {e}")
+            if audio:
+                logger.bind(tag=TAG).info(
+                    f"语音生成成功: {text}，{len(audio)}字节，重试{repeat_time}次"
+                )
+                if not self.delete_audio_file:
+                    self._save_debug_audio(audio)
+                return audio
+            if repeat_time < MAX_REPEAT_TIME - 1:
+                logger.bind(tag=TAG).error(f"再试{MAX_REPEAT_TIME - 1 - repeat_time}次")
+        return None
+
+    def to_tts_stream(self, text, on_frames, should_stop=None):
+        """
+        流式合成并编码，每得到一批Opus帧就调用on_frames，返回音频时长(秒)，失败时返回None
+        should_stop返回True时停止合成；已经输出音频后出错不再重试，避免重复播放
+        """
+        text = MarkdownCleaner.clean_markdown(text)
+        for repeat_time in range(MAX_REPEAT_TIME):
+            encoder = StreamingOpusEncoder(self.stream_audio_format, self.pcm_sample_rate)
+            try:
+                run_in_thread_loop(self._stream_to_opus(text, encoder, on_frames, should_stop))
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"流式语音生成失败: {text}，错误: {e}")
+            if encoder.samples > 0:
+                logger.bind(tag=TAG).info(
+                    f"流式语音生成成功: {text}，{encoder.duration:.2f}秒，重试{repeat_time}次"
+                )
+                return encoder.duration
+            if should_stop is not None and should_stop():
+                return None
+            if repeat_time < MAX_REPEAT_TIME - 1:
+                logger.bind(tag=TAG).error(f"再试{MAX_REPEAT_TIME - 1 - repeat_time}次")
+        return None
+
+    async def _stream_to_opus(self, text, encoder, on_frames, should_stop):
+        audio = None if self.delete_audio_file else bytearray()
+        responses = self.text_to_audio_stream(text)
+        try:
+            async for chunk in responses:
+                if audio is not None:
+                    audio.extend(chunk)
+                frames = encoder.feed(chunk)
+                if frames:
+                    on_frames(frames)
+                if should_stop is not None and should_stop():
+                    return
+            frames = encoder.flush()
+            if frames:
+                on_frames(frames)
+        finally:
+            await responses.aclose()
+        if audio:
+            self._save_debug_audio(bytes(audio))
+
+    def _save_debug_audio(self, audio):
+        try:
+            file_path = self.generate_filename()
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            with open(file_path, "wb") as f:
+                f.write(audio)
+            logger.bind(tag=TAG).debug(f"TTS音频已保存: {file_path}")
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"保存TTS音频失败: {e}")
+
+    async def text_to_audio(self, text):
+        """
+        合成语音，返回音频数据(bytes)，失败时抛出异常或返回None
+        子类应覆盖此方法直接返回音频数据；默认经由text_to_speak的临时文件读取，兼容旧的provider
+        """
+        tmp_file = self.generate_filename()
+        try:
+            await self.text_to_speak(text, tmp_file)
+            if not os.path.exists(tmp_file):
+                return None
+            with open(tmp_file, "rb") as f:
+                return f.read()
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    async def text_to_audio_stream(self, text):
+        """流式合成，逐块返回音频数据；不支持流式的provider整段返回"""
+        audio = await self.text_to_audio(text)
+        if audio:
+            yield audio
+
     async def text_to_speak(self, text, output_file):
-        pass
+        """合成语音并写入output_file"""
+        audio = await self.text_to_audio(text)
+        if not audio:
+            return
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        with open(output_file, "wb") as f:
+            f.write(audio)
 
     def audio_to_opus_data(self, audio_file_path):
         """音频文件转换为Opus编码"""
@@ -55,42 +218,13 @@ class TTSProviderBase(ABC):
         file_type = os.path.splitext(audio_file_path)[1]
         if file_type:
             file_type = file_type.lstrip(".")
-        # 读取音频文件，-nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
-        audio = AudioSegment.from_file(
-            audio_file_path, format=file_type, parameters=["-nostdin"]
-        )
+        with open(audio_file_path, "rb") as f:
+            audio = f.read()
+        return self.audio_bytes_to_opus_data(audio, file_type)
 
+    def audio_bytes_to_opus_data(self, audio: bytes, file_type=None):
+        """内存中的音频数据转换为Opus编码，返回(opus_datas, 时长秒数)"""
         # 转换为单声道/16kHz采样率/16位小端编码（确保与编码器匹配）
-        audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
-
-        # 音频时长(秒)
-        duration = len(audio) / 1000.0
-
-        # 获取原始PCM数据（16位小端）
-        raw_data = audio.raw_data
-
-        # 初始化Opus编码器
-        encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
-
-        # 编码参数
-        frame_duration = 60  # 60ms per frame
-        frame_size = int(16000 * frame_duration / 1000)  # 960 samples/frame
-
-        opus_datas = []
-        # 按帧处理所有音频数据（包括最后一帧可能补零）
-        for i in range(0, len(raw_data), frame_size * 2):  # 16bit=2bytes/sample
-            # 获取当前帧的二进制数据
-            chunk = raw_data[i : i + frame_size * 2]
-
-            # 如果最后一帧不足，补零
-            if len(chunk) < frame_size * 2:
-                chunk += b"\x00" * (frame_size * 2 - len(chunk))
-
-            # 转换为numpy数组处理
-            np_frame = np.frombuffer(chunk, dtype=np.int16)
-
-            # 编码Opus数据
-            opus_data = encoder.encode(np_frame.tobytes(), frame_size)
-            opus_datas.append(opus_data)
-
-        return opus_datas, duration
+        pcm = decode_to_pcm(audio, file_type or self.audio_format, self.pcm_sample_rate)
+        duration = len(pcm) / 2 / SAMPLE_RATE
+        return pcm_to_opus_data(pcm), duration
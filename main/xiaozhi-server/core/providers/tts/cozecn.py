@@ -27,7 +27,7 @@ class TTSProvider(TTSProviderBase):
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    async def text_to_speak(self, text, output_file):
+    async def text_to_audio(self, text):
         request_json = {
             "model": self.model,
             "input": text,
@@ -41,6 +41,4 @@ class TTSProvider(TTSProviderBase):
         response = requests.request(
             "POST", self.api_url, json=request_json, headers=headers
         )
-        data = response.content
-        file_to_save = open(output_file, "wb")
-        file_to_save.write(data)
+        return response.content
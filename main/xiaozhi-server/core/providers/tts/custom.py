@@ -20,7 +20,11 @@ class TTSProvider(TTSProviderBase):
     def generate_filename(self):
         return os.path.join(self.output_file, f"tts-{datetime.now().date()}@{uuid.uuid4().hex}.{self.format}")
 
-    async def text_to_speak(self, text, output_file):
+    @property
+    def audio_format(self):
+        return self.format
+
+    async def text_to_audio(self, text):
         request_params = {}
         for k, v in self.params.items():
             if isinstance(v, str) and "{prompt_text}" in v:
@@ -29,7 +33,6 @@ class TTSProvider(TTSProviderBase):
 
         resp = requests.get(self.url, params=request_params, headers=self.headers)
         if resp.status_code == 200:
-            with open(output_file, "wb") as file:
-                file.write(resp.content)
+            return resp.content
         else:
             logger.bind(tag=TAG).error(f"Custom TTS请求失败: {resp.status_code} - {resp.text}")
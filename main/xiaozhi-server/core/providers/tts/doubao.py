@@ -32,13 +32,13 @@ class TTSProvider(TTSProviderBase):
         self.header = {"Authorization": f"{self.authorization}{self.access_token}"}
         check_model_key("TTS", self.access_token)
 
-    def generate_filename(self, extension=".wav"):
+    def generate_filename(self, extension=".pcm"):
         return os.path.join(
             self.output_file,
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    async def text_to_speak(self, text, output_file):
+    async def text_to_audio(self, text):
         request_json = {
             "app": {
                 "appid": f"{self.appid}",
@@ -48,7 +48,9 @@ class TTSProvider(TTSProviderBase):
             "user": {"uid": "1"},
             "audio": {
                 "voice_type": self.voice,
-                "encoding": "wav",
+                # 直接返回16kHz PCM，不需要解码和重采样
+                "encoding": "pcm",
+                "rate": 16000,
                 "speed_ratio": 1.0,
                 "volume_ratio": 1.0,
                 "pitch_ratio": 1.0,
@@ -69,8 +71,7 @@ class TTSProvider(TTSProviderBase):
             )
             if "data" in resp.json():
                 data = resp.json()["data"]
-                file_to_save = open(output_file, "wb")
-                file_to_save.write(base64.b64decode(data))
+                return base64.b64decode(data)
             else:
                 raise Exception(
                     f"{__name__} status_code: {resp.status_code} response: {resp.content}"
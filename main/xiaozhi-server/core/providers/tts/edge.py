@@ -19,15 +19,15 @@ class TTSProvider(TTSProviderBase):
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    async def text_to_speak(self, text, output_file):
-        communicate = edge_tts.Communicate(text, voice=self.voice)
-        # 确保目录存在并创建空文件
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        with open(output_file, "wb") as f:
-            pass
+    async def text_to_audio(self, text):
+        # 在内存中拼接流式返回的音频数据
+        audio = bytearray()
+        async for chunk in self.text_to_audio_stream(text):
+            audio.extend(chunk)
+        return bytes(audio)
 
-        # 流式写入音频数据
-        with open(output_file, "ab") as f:  # 改为追加模式避免覆盖
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":  # 只处理音频数据块
-                    f.write(chunk["data"])
+    async def text_to_audio_stream(self, text):
+        communicate = edge_tts.Communicate(text, voice=self.voice)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":  # 只处理音频数据块
+                yield chunk["data"]
@@ -1,7 +1,7 @@
 import base64
 import os
 import uuid
-import requests
+import threading
 import ormsgpack
 from pathlib import Path
 from pydantic import BaseModel, Field, conint, model_validator
@@ -9,6 +9,7 @@ from typing_extensions import Annotated
 from datetime import datetime
 from typing import Literal
 from core.utils.util import check_model_key, parse_string_to_list
+from core.utils.http_client_pool import http_client_pool
 from core.providers.tts.base import TTSProviderBase
 from config.logger import setup_logging
 
@@ -80,6 +81,15 @@ def read_ref_text(ref_text):
     return ref_text
 
 
+def msgpack_map_header(size):
+    """msgpack中包含size个键值对的map头部"""
+    if size < 16:
+        return bytes([0x80 | size])
+    if size < 0x10000:
+        return b"\xde" + size.to_bytes(2, "big")
+    return b"\xdf" + size.to_bytes(4, "big")
+
+
 class TTSProvider(TTSProviderBase):
 
     def __init__(self, config, delete_audio_file):
@@ -91,6 +101,7 @@ class TTSProvider(TTSProviderBase):
         self.format = config.get("format", "wav")
         self.channels = int(config.get("channels", 1))
         self.rate = int(config.get("rate", 44100))
+        self.pcm_sample_rate = self.rate
         self.api_key = config.get("api_key", "YOUR_API_KEY")
         have_key = check_model_key("FishSpeech TTS", self.api_key)
         if not have_key:
@@ -101,14 +112,19 @@ class TTSProvider(TTSProviderBase):
         self.top_p = float(config.get("top_p", 0.7))
         self.repetition_penalty = float(config.get("repetition_penalty", 1.2))
         self.temperature = float(config.get("temperature", 0.7))
-        self.streaming = str(config.get("streaming", False)).lower() in (
-            "true",
-            "1",
-            "yes",
-        )
         self.use_memory_cache = config.get("use_memory_cache", "on")
         self.seed = config.get("seed") or None
         self.api_url = config.get("api_url", "http://127.0.0.1:8080/v1/tts")
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/msgpack",
+        }
+        # 同一服务地址共用连接池，避免每句话重新建立连接
+        self.client = http_client_pool.get_http_client(self.api_url)
+        # 参考音频和除text以外的请求内容只在第一次请求时读取、序列化，key为是否流式
+        self.references = None
+        self.request_bodies = {}
+        self.request_lock = threading.Lock()
 
     def generate_filename(self, extension=".wav"):
         return os.path.join(
@@ -116,49 +132,98 @@ class TTSProvider(TTSProviderBase):
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    async def text_to_speak(self, text, output_file):
-        # Prepare reference data
-        byte_audios = [audio_to_bytes(ref_audio) for ref_audio in self.reference_audio]
-        ref_texts = [read_ref_text(ref_text) for ref_text in self.reference_text]
-
-        data = {
-            "text": text,
-            "references": [
-                ServeReferenceAudio(audio=audio if audio else b"", text=text)
-                for text, audio in zip(ref_texts, byte_audios)
-            ],
-            "reference_id": self.reference_id,
-            "normalize": self.normalize,
-            "format": self.format,
-            "max_new_tokens": self.max_new_tokens,
-            "chunk_length": self.chunk_length,
-            "top_p": self.top_p,
-            "repetition_penalty": self.repetition_penalty,
-            "temperature": self.temperature,
-            "streaming": self.streaming,
-            "use_memory_cache": self.use_memory_cache,
-            "seed": self.seed,
-        }
+    @property
+    def audio_format(self):
+        return self.format
 
-        pydantic_data = ServeTTSRequest(**data)
+    @property
+    def stream_audio_format(self):
+        # 服务端流式返回只支持wav
+        return "wav" if self.streaming else self.format
 
-        response = requests.post(
-            self.api_url,
-            data=ormsgpack.packb(
-                pydantic_data, option=ormsgpack.OPT_SERIALIZE_PYDANTIC
-            ),
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/msgpack",
-            },
+    def _load_references(self):
+        """参考音频和参考文本只在第一次请求时读取"""
+        byte_audios = [audio_to_bytes(ref_audio) for ref_audio in self.reference_audio]
+        ref_texts = [read_ref_text(ref_text) for ref_text in self.reference_text]
+        references = [
+            ServeReferenceAudio(audio=audio if audio else b"", text=text)
+            for text, audio in zip(ref_texts, byte_audios)
+        ]
+        logger.bind(tag=TAG).info(
+            f"FishSpeech参考音频已加载: {len(references)}个，"
+            f"{sum(len(reference.audio) for reference in references) // 1024}KB"
+        )
+        return references
+
+    def _get_request_body(self, streaming):
+        """返回(字段数, 不含map头部的序列化内容)，参考音频可能有几MB，每句话只拼接text"""
+        body = self.request_bodies.get(streaming)
+        if body is not None:
+            return body
+        with self.request_lock:
+            if streaming not in self.request_bodies:
+                if self.references is None:
+                    self.references = self._load_references()
+                request = ServeTTSRequest(
+                    text="",
+                    references=self.references,
+                    reference_id=self.reference_id,
+                    normalize=self.normalize,
+                    format="wav" if streaming else self.format,
+                    max_new_tokens=self.max_new_tokens,
+                    chunk_length=self.chunk_length,
+                    top_p=self.top_p,
+                    repetition_penalty=self.repetition_penalty,
+                    temperature=self.temperature,
+                    streaming=streaming,
+                    use_memory_cache=self.use_memory_cache,
+                    seed=self.seed,
+                )
+                fields = request.model_dump(exclude={"text"})
+                packed = ormsgpack.packb(fields)
+                self.request_bodies[streaming] = (
+                    len(fields),
+                    packed[len(msgpack_map_header(len(fields))) :],
+                )
+            return self.request_bodies[streaming]
+
+    def _pack_request(self, text, streaming):
+        size, body = self._get_request_body(streaming)
+        return b"".join(
+            (
+                msgpack_map_header(size + 1),
+                ormsgpack.packb("text"),
+                ormsgpack.packb(text),
+                body,
+            )
         )
 
-        if response.status_code == 200:
-            audio_content = response.content
-
-            with open(output_file, "wb") as audio_file:
-                audio_file.write(audio_content)
-
-        else:
-            print(f"Request failed with status code {response.status_code}")
-            print(response.json())
+    async def text_to_audio(self, text):
+        response = self.client.post(
+            self.api_url, content=self._pack_request(text, False), headers=self.headers
+        )
+        if response.status_code != 200:
+            raise Exception(
+                f"FishSpeech TTS请求失败: {response.status_code} - {response.text}"
+            )
+        return response.content
+
+    async def text_to_audio_stream(self, text):
+        if not self.streaming:
+            yield await self.text_to_audio(text)
+            return
+        with self.client.stream(
+            "POST",
+            self.api_url,
+            content=self._pack_request(text, True),
+            headers=self.headers,
+        ) as response:
+            if response.status_code != 200:
+                response.read()
+                raise Exception(
+                    f"FishSpeech TTS请求失败: {response.status_code} - {response.text}"
+                )
+            # 服务端分块返回，收到一块就交给编码器
+            for chunk in response.iter_bytes():
+                if chunk:
+                    yield chunk
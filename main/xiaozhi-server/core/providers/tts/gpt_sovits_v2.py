@@ -60,7 +60,7 @@ class TTSProvider(TTSProviderBase):
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    async def text_to_speak(self, text, output_file):
+    async def text_to_audio(self, text):
         request_json = {
             "text": text,
             "text_lang": self.text_lang,
@@ -85,8 +85,7 @@ class TTSProvider(TTSProviderBase):
 
         resp = requests.post(self.url, json=request_json)
         if resp.status_code == 200:
-            with open(output_file, "wb") as file:
-                file.write(resp.content)
+            return resp.content
         else:
             logger.bind(tag=TAG).error(
                 f"GPT_SoVITS_V2 TTS请求失败: {resp.status_code} - {resp.text}"
@@ -33,7 +33,7 @@ class TTSProvider(TTSProviderBase):
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    async def text_to_speak(self, text, output_file):
+    async def text_to_audio(self, text):
         request_params = {
             "refer_wav_path": self.refer_wav_path,
             "prompt_text": self.prompt_text,
@@ -52,8 +52,7 @@ class TTSProvider(TTSProviderBase):
 
         resp = requests.get(self.url, params=request_params)
         if resp.status_code == 200:
-            with open(output_file, "wb") as file:
-                file.write(resp.content)
+            return resp.content
         else:
             logger.bind(tag=TAG).error(
                 f"GPT_SoVITS_V3 TTS请求失败: {resp.status_code} - {resp.text}"
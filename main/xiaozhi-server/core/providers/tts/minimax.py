@@ -59,7 +59,11 @@ class TTSProvider(TTSProviderBase):
             f"tts-{__name__}{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    async def text_to_speak(self, text, output_file):
+    @property
+    def audio_format(self):
+        return self.audio_setting.get("format", "mp3")
+
+    async def text_to_audio(self, text):
         request_json = {
             "model": self.model,
             "text": text,
@@ -80,8 +84,7 @@ class TTSProvider(TTSProviderBase):
             # 检查返回请求数据的status_code是否为0
             if resp.json()["base_resp"]["status_code"] == 0:
                 data = resp.json()["data"]["audio"]
-                file_to_save = open(output_file, "wb")
-                file_to_save.write(bytes.fromhex(data))
+                return bytes.fromhex(data)
             else:
                 raise Exception(
                     f"{__name__} status_code: {resp.status_code} response: {resp.content}"
@@ -21,6 +21,8 @@ class TTSProvider(TTSProviderBase):
         else:
             self.voice = config.get("voice", "alloy")
         self.response_format = "wav"
+        # 流式合成时返回24kHz的PCM，可以边收边编码
+        self.pcm_sample_rate = 24000
         self.speed = float(config.get("speed", 1.0))
         self.output_file = config.get("output_dir", "tmp/")
         check_model_key("TTS", self.api_key)
@@ -31,7 +33,11 @@ class TTSProvider(TTSProviderBase):
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    async def text_to_speak(self, text, output_file):
+    @property
+    def stream_audio_format(self):
+        return "pcm"
+
+    def _request(self, text, response_format, stream=False):
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -40,14 +46,24 @@ class TTSProvider(TTSProviderBase):
             "model": self.model,
             "input": text,
             "voice": self.voice,
-            "response_format": "wav",
+            "response_format": response_format,
             "speed": self.speed,
         }
-        response = requests.post(self.api_url, json=data, headers=headers)
-        if response.status_code == 200:
-            with open(output_file, "wb") as audio_file:
-                audio_file.write(response.content)
-        else:
+        response = requests.post(self.api_url, json=data, headers=headers, stream=stream)
+        if response.status_code != 200:
             raise Exception(
                 f"OpenAI TTS请求失败: {response.status_code} - {response.text}"
             )
+        return response
+
+    async def text_to_audio(self, text):
+        return self._request(text, self.response_format).content
+
+    async def text_to_audio_stream(self, text):
+        if not self.streaming:
+            yield await self.text_to_audio(text)
+            return
+        with self._request(text, "pcm", stream=True) as response:
+            for chunk in response.iter_content(chunk_size=None):
+                if chunk:
+                    yield chunk
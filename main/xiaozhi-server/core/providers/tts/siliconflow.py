@@ -16,6 +16,8 @@ class TTSProvider(TTSProviderBase):
             self.voice = config.get("voice")
         self.response_format = config.get("response_format")
         self.sample_rate = config.get("sample_rate")
+        if self.sample_rate:
+            self.pcm_sample_rate = int(self.sample_rate)
         self.speed = float(config.get("speed", 1.0))
         self.gain = config.get("gain")
 
@@ -28,7 +30,11 @@ class TTSProvider(TTSProviderBase):
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    async def text_to_speak(self, text, output_file):
+    @property
+    def audio_format(self):
+        return self.response_format or "wav"
+
+    async def text_to_audio(self, text):
         request_json = {
             "model": self.model,
             "input": text,
@@ -42,6 +48,4 @@ class TTSProvider(TTSProviderBase):
         response = requests.request(
             "POST", self.api_url, json=request_json, headers=headers
         )
-        data = response.content
-        file_to_save = open(output_file, "wb")
-        file_to_save.write(data)
+        return response.content
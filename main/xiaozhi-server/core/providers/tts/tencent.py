@@ -121,18 +121,20 @@ class TTSProvider(TTSProviderBase):
             msg = msg.encode("utf-8")
         return hmac.new(key, msg, hashlib.sha256).digest()
 
-    def generate_filename(self, extension=".wav"):
+    def generate_filename(self, extension=".pcm"):
         return os.path.join(
             self.output_file,
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    async def text_to_speak(self, text, output_file):
+    async def text_to_audio(self, text):
         # 构建请求体
         request_json = {
             "Text": text,  # 合成语音的源文本
             "SessionId": str(uuid.uuid4()),  # 会话ID，随机生成
             "VoiceType": int(self.voice),  # 音色
+            "Codec": "pcm",  # 直接返回16kHz PCM，不需要解码和重采样
+            "SampleRate": 16000,
         }
 
         try:
@@ -158,9 +160,8 @@ class TTSProvider(TTSProviderBase):
                 # 提取音频数据
                 audio_data = response_data["Response"].get("Audio")
                 if audio_data:
-                    # 解码Base64音频数据并保存
-                    with open(output_file, "wb") as f:
-                        f.write(base64.b64decode(audio_data))
+                    # 解码Base64音频数据
+                    return base64.b64decode(audio_data)
                 else:
                     raise Exception(f"{__name__}: 没有返回音频数据: {response_data}")
             else:
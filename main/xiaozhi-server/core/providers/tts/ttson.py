@@ -2,7 +2,6 @@ import os
 import uuid
 import json
 import requests
-import shutil
 from datetime import datetime
 from core.providers.tts.base import TTSProviderBase
 from config.logger import setup_logging
@@ -39,7 +38,11 @@ class TTSProvider(TTSProviderBase):
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    async def text_to_speak(self, text, output_file):
+    @property
+    def audio_format(self):
+        return self.format
+
+    async def text_to_audio(self, text):
         url = f"{self.url}{self.token}"
         result = "firefly"
         payload = json.dumps(
@@ -75,9 +78,4 @@ class TTSProvider(TTSProviderBase):
             print("error:", e)
 
         audio_content = requests.get(result)
-        with open(output_file, "wb") as f:
-            f.write(audio_content.content)
-            return True
-        voice_path = resp_json.get("voice_path")
-        des_path = output_file
-        shutil.move(voice_path, des_path)
+        return audio_content.content
@@ -1,9 +1,22 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Optional
 
 
 class VADProviderBase(ABC):
+    def create_context(self):
+        """为单个连接创建独立的VAD上下文（解码器、模型状态、缓冲区）"""
+        return None
+
     @abstractmethod
     def is_vad(self, conn, data) -> bool:
         """检测音频数据中的语音活动"""
         pass
+
+    async def detect(self, conn, data, executor=None) -> bool:
+        """在线程池中检测语音活动，避免解码与推理阻塞事件循环；executor为None时直接执行"""
+        if executor is None:
+            return self.is_vad(conn, data)
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, self.is_vad, conn, data
+        )
@@ -1,14 +1,86 @@
 import time
+import queue
+import asyncio
+import threading
 import numpy as np
 import torch
 import opuslib_next
+from concurrent.futures import Future
 from config.logger import setup_logging
 from core.providers.vad.base import VADProviderBase
+from core.utils.pcm_buffer import PcmRingBuffer
 
 TAG = __name__
 logger = setup_logging()
 
 
+class SileroVADContext:
+    """单个连接独立的VAD上下文：Opus解码器、模型循环状态、音频缓冲区"""
+
+    def __init__(self):
+        self.decoder = opuslib_next.Decoder(16000, 1)
+        # Silero v5 的循环状态与上下文窗口，每个连接各自维护
+        self.state = torch.zeros((2, 1, 128)).float()
+        self.context = torch.zeros((1, 64))
+        self.audio_buffer = PcmRingBuffer(512 * 32)
+
+    def reset(self):
+        self.audio_buffer.clear()
+
+
+class SileroVADBatcher:
+    """跨连接批量推理：每隔几毫秒收集所有连接待检测的512采样点窗口，合并成一次前向计算"""
+
+    def __init__(self, vad, batch_window_ms, max_batch_size):
+        self.vad = vad
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self._batch_thread, daemon=True)
+        self.thread.start()
+
+    def submit(self, vad_context, audio_float32) -> Future:
+        future = Future()
+        self.pending.put((vad_context, audio_float32, future))
+        return future
+
+    def _batch_thread(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            # 同一连接的多个窗口必须按顺序推理，拆分到后续批次
+            while batch:
+                current, rest, seen = [], [], set()
+                for item in batch:
+                    if id(item[0]) in seen:
+                        rest.append(item)
+                    else:
+                        seen.add(id(item[0]))
+                        current.append(item)
+                self._run_batch(current)
+                batch = rest
+
+    def _run_batch(self, batch):
+        try:
+            probs = self.vad.speech_probs(
+                [item[0] for item in batch], [item[1] for item in batch]
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, _, future), prob in zip(batch, probs):
+            future.set_result(prob)
+
+
 class VADProvider(VADProviderBase):
     def __init__(self, config):
         logger.bind(tag=TAG).info("SileroVAD", config)
@@ -20,45 +92,108 @@ class VADProvider(VADProviderBase):
         )
         (get_speech_timestamps, _, _, _, _) = self.utils
 
-        self.decoder = opuslib_next.Decoder(16000, 1)
+        # 模型权重在所有连接间共享，推理时换入各连接自己的状态，需加锁
+        self.model_lock = threading.Lock()
         self.vad_threshold = float(config.get("threshold", 0.5))
         self.silence_threshold_ms = int(config.get("min_silence_duration_ms", 1000))
 
+        # 批量推理窗口(毫秒)，0表示每个连接单独推理
+        batch_window_ms = float(config.get("batch_window_ms", 0))
+        if batch_window_ms > 0:
+            self.batcher = SileroVADBatcher(
+                self, batch_window_ms, int(config.get("max_batch_size", 64))
+            )
+        else:
+            self.batcher = None
+
+    def create_context(self):
+        return SileroVADContext()
+
+    def speech_probs(self, vad_contexts, audio_windows):
+        """以各连接自己的循环状态批量推理，返回每个窗口的语音概率并写回新的状态"""
+        if len(audio_windows) == 1:
+            audio_tensor = torch.from_numpy(audio_windows[0]).unsqueeze(0)
+        else:
+            audio_tensor = torch.from_numpy(np.stack(audio_windows))
+        with self.model_lock:
+            self.model._state = torch.cat([c.state for c in vad_contexts], dim=1)
+            self.model._context = torch.cat([c.context for c in vad_contexts], dim=0)
+            self.model._last_sr = 16000
+            self.model._last_batch_size = len(vad_contexts)
+            with torch.no_grad():
+                probs = self.model(audio_tensor, 16000)
+            states = self.model._state
+            contexts = self.model._context
+        for i, vad_context in enumerate(vad_contexts):
+            vad_context.state = states[:, i : i + 1]
+            vad_context.context = contexts[i : i + 1]
+        return probs[:, 0].tolist()
+
+    def _decode_windows(self, vad_context, opus_packet):
+        """解码Opus数据包，切分出缓冲区中所有完整的512采样点窗口"""
+        pcm_frame = vad_context.decoder.decode(opus_packet, 960)
+        vad_context.audio_buffer.write(pcm_frame)  # 将新数据加入缓冲区
+
+        # 每次取出512个采样点，均为缓冲区的float32零拷贝视图
+        windows = []
+        window = vad_context.audio_buffer.read(512)
+        while window is not None:
+            windows.append(window)
+            window = vad_context.audio_buffer.read(512)
+        return windows
+
+    def _update_voice_state(self, conn, speech_prob):
+        client_have_voice = speech_prob >= self.vad_threshold
+
+        # 如果之前有声音，但本次没有声音，且与上次有声音的时间查已经超过了静默阈值，则认为已经说完一句话
+        if conn.client_have_voice and not client_have_voice:
+            stop_duration = time.time() * 1000 - conn.client_have_voice_last_time
+            if stop_duration >= self.silence_threshold_ms:
+                conn.client_voice_stop = True
+        if client_have_voice:
+            conn.client_have_voice = True
+            conn.client_have_voice_last_time = time.time() * 1000
+        return client_have_voice
+
     def is_vad(self, conn, opus_packet):
+        vad_context = conn.vad_context
         try:
-            pcm_frame = self.decoder.decode(opus_packet, 960)
-            conn.client_audio_buffer.extend(pcm_frame)  # 将新数据加入缓冲区
-
             # 处理缓冲区中的完整帧（每次处理512采样点）
             client_have_voice = False
-            while len(conn.client_audio_buffer) >= 512 * 2:
-                # 提取前512个采样点（1024字节）
-                chunk = conn.client_audio_buffer[: 512 * 2]
-                conn.client_audio_buffer = conn.client_audio_buffer[512 * 2 :]
-
-                # 转换为模型需要的张量格式
-                audio_int16 = np.frombuffer(chunk, dtype=np.int16)
-                audio_float32 = audio_int16.astype(np.float32) / 32768.0
-                audio_tensor = torch.from_numpy(audio_float32)
-
+            for window in self._decode_windows(vad_context, opus_packet):
                 # 检测语音活动
-                with torch.no_grad():
-                    speech_prob = self.model(audio_tensor, 16000).item()
-                client_have_voice = speech_prob >= self.vad_threshold
-
-                # 如果之前有声音，但本次没有声音，且与上次有声音的时间查已经超过了静默阈值，则认为已经说完一句话
-                if conn.client_have_voice and not client_have_voice:
-                    stop_duration = (
-                        time.time() * 1000 - conn.client_have_voice_last_time
-                    )
-                    if stop_duration >= self.silence_threshold_ms:
-                        conn.client_voice_stop = True
-                if client_have_voice:
-                    conn.client_have_voice = True
-                    conn.client_have_voice_last_time = time.time() * 1000
+                if self.batcher is not None:
+                    speech_prob = self.batcher.submit(vad_context, window).result()
+                else:
+                    speech_prob = self.speech_probs([vad_context], [window])[0]
+                client_have_voice = self._update_voice_state(conn, speech_prob)
 
             return client_have_voice
         except opuslib_next.OpusError as e:
             logger.bind(tag=TAG).info(f"解码错误: {e}")
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
+
+    async def detect(self, conn, opus_packet, executor=None):
+        if self.batcher is None:
+            return await super().detect(conn, opus_packet, executor)
+        # 批量推理时只把解码放到线程池，推理结果异步等待，不占用工作线程
+        vad_context = conn.vad_context
+        try:
+            if executor is None:
+                windows = self._decode_windows(vad_context, opus_packet)
+            else:
+                windows = await asyncio.get_running_loop().run_in_executor(
+                    executor, self._decode_windows, vad_context, opus_packet
+                )
+            client_have_voice = False
+            for window in windows:
+                speech_prob = await asyncio.wrap_future(
+                    self.batcher.submit(vad_context, window)
+                )
+                client_have_voice = self._update_voice_state(conn, speech_prob)
+            return client_have_voice
+        except opuslib_next.OpusError as e:
+            logger.bind(tag=TAG).info(f"解码错误: {e}")
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
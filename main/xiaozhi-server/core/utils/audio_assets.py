@@ -0,0 +1,105 @@
+import os
+import hashlib
+import threading
+from config.logger import setup_logging
+from core.utils import p3
+from core.utils.audio_codec import decode_to_pcm, pcm_to_opus_data
+
+TAG = __name__
+logger = setup_logging()
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg", ".opus", ".m4a", ".aac", ".p3")
+FRAME_DURATION = 0.06
+
+
+class AudioAssetBank:
+    """
+    固定提示音(绑定码、超出字数、唤醒词回复、结束提示音等)的Opus帧，启动时编码一次后常驻内存
+    - 编码结果另存为p3文件，重启时源文件未修改则直接读取p3，不再解码
+    - 每次取用时比较源文件的修改时间和大小，文件被替换后自动重新编码
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cache_dir = None
+        self.assets = {}  # 绝对路径 -> (mtime_ns, 文件大小, opus_datas)
+
+    def configure(self, config: dict):
+        self.cache_dir = config.get("cache_dir") or None
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def preload(self, asset_dir):
+        """编码asset_dir目录(含子目录)下的所有音频"""
+        count = 0
+        for root, _, files in os.walk(asset_dir):
+            for name in sorted(files):
+                if not name.lower().endswith(AUDIO_EXTENSIONS):
+                    continue
+                try:
+                    self.get(os.path.join(root, name))
+                    count += 1
+                except Exception as e:
+                    logger.bind(tag=TAG).error(f"预编码提示音失败: {name}, {e}")
+        logger.bind(tag=TAG).info(f"提示音已预编码: {asset_dir}, {count}个")
+
+    def get(self, file_path):
+        """返回(opus_datas, 时长秒数)，与TTSProviderBase.audio_to_opus_data一致"""
+        path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            with self.lock:
+                self.assets.pop(path, None)
+            raise
+        with self.lock:
+            entry = self.assets.get(path)
+        if entry is None or entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size:
+            if entry is not None:
+                logger.bind(tag=TAG).info(f"提示音已修改，重新编码: {file_path}")
+            opus_datas = self._load(path, stat)
+            with self.lock:
+                self.assets[path] = (stat.st_mtime_ns, stat.st_size, opus_datas)
+        else:
+            opus_datas = entry[2]
+        return opus_datas, len(opus_datas) * FRAME_DURATION
+
+    def _cache_file(self, path):
+        name = os.path.splitext(os.path.basename(path))[0]
+        digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"{name}-{digest}.p3")
+
+    def _load(self, path, stat):
+        if path.lower().endswith(".p3"):
+            opus_datas, _ = p3.decode_opus_from_file(path)
+            return opus_datas
+
+        cache_file = self._cache_file(path) if self.cache_dir else None
+        # p3文件的修改时间与源文件一致时，说明是由当前的源文件编码的
+        if cache_file and os.path.exists(cache_file):
+            if os.stat(cache_file).st_mtime_ns == stat.st_mtime_ns:
+                try:
+                    opus_datas, _ = p3.decode_opus_from_file(cache_file)
+                    if opus_datas:
+                        return opus_datas
+                except Exception as e:
+                    logger.bind(tag=TAG).warning(f"读取提示音缓存失败: {cache_file}, {e}")
+
+        with open(path, "rb") as f:
+            audio = f.read()
+        file_type = os.path.splitext(path)[1].lstrip(".").lower()
+        opus_datas = pcm_to_opus_data(decode_to_pcm(audio, file_type))
+
+        if cache_file:
+            try:
+                temp_file = f"{cache_file}.tmp"
+                p3.encode_opus_to_file(opus_datas, temp_file)
+                os.utime(temp_file, ns=(stat.st_mtime_ns, stat.st_mtime_ns))
+                os.replace(temp_file, cache_file)
+            except Exception as e:
+                logger.bind(tag=TAG).warning(f"写入提示音缓存失败: {cache_file}, {e}")
+        return opus_datas
+
+
+# 进程内唯一的提示音库
+audio_assets = AudioAssetBank()
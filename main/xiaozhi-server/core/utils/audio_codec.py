@@ -0,0 +1,511 @@
+import io
+import wave
+import struct
+import threading
+from math import gcd
+from functools import lru_cache
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import opuslib_next
+from pydub import AudioSegment
+from config.logger import setup_logging
+
+try:
+    # 进程内的mp3/flac/vorbis解码器，未安装时使用ffmpeg
+    import miniaudio
+except ImportError:
+    miniaudio = None
+
+TAG = __name__
+logger = setup_logging()
+
+# 设备端播放使用16kHz单声道，每帧60ms
+SAMPLE_RATE = 16000
+FRAME_DURATION = 60
+FRAME_SIZE = SAMPLE_RATE * FRAME_DURATION // 1000  # 960 samples/frame
+FRAME_BYTES = FRAME_SIZE * 2  # 16bit=2bytes/sample
+# 多相重采样的最大相位数
+MAX_PHASES = 1000
+
+_thread_local = threading.local()
+
+
+def detect_audio_format(audio: bytes, default=None):
+    """根据文件头判断音频格式，识别不了时使用default"""
+    if audio[:4] == b"RIFF" and audio[8:12] == b"WAVE":
+        return "wav"
+    if audio[:3] == b"ID3" or (
+        len(audio) > 1 and audio[0] == 0xFF and audio[1] & 0xE0 == 0xE0
+    ):
+        return "mp3"
+    if audio[:4] == b"OggS":
+        return "ogg"
+    if audio[:4] == b"fLaC":
+        return "flac"
+    return default
+
+
+def pcm_to_samples(frames: bytes, sample_width=2, channels=1):
+    """PCM数据转换为单声道float32采样(16位幅度)"""
+    frames = frames[: len(frames) - len(frames) % (sample_width * channels)]
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) * 256
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype=np.int16).astype(np.float32)
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        samples = (
+            raw[:, 0].astype(np.int32) << 8
+            | raw[:, 1].astype(np.int32) << 16
+            | raw[:, 2].astype(np.int32) << 24
+        ).astype(np.float32) / 65536
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype=np.int32).astype(np.float32) / 65536
+    else:
+        raise ValueError(f"不支持的wav采样位数: {sample_width}")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def decode_wav(audio: bytes):
+    """用wave模块解析PCM编码的wav，返回(单声道float32采样, 采样率)"""
+    with wave.open(io.BytesIO(audio), "rb") as f:
+        channels = f.getnchannels()
+        sample_width = f.getsampwidth()
+        sample_rate = f.getframerate()
+        frames = f.readframes(f.getnframes())
+    if not frames:
+        # 流式接口返回的wav头里数据长度可能为0，直接取data块之后的内容
+        frames = audio[audio.find(b"data") + 8 :]
+    return pcm_to_samples(frames, sample_width, channels), sample_rate
+
+
+@lru_cache(maxsize=16)
+def _polyphase_table(up, down, zero_crossings=8):
+    """
+    有理数倍重采样的多相滤波器系数(加窗sinc)
+    输出第j个采样位于输入的j*down/up处，小数部分只有up种，每种预先算好一组系数
+    降采样时截止频率为目标采样率的奈奎斯特频率，防止混叠
+    """
+    cutoff = min(1.0, up / down)
+    half = int(np.ceil(zero_crossings / cutoff))
+    offsets = np.arange(-half + 1, half + 1)
+    fractions = np.arange(up)[:, None] / up
+    t = fractions - offsets[None, :]
+    window = 0.5 + 0.5 * np.cos(np.pi * t / (half + 1))
+    table = cutoff * np.sinc(cutoff * t) * window
+    table /= table.sum(axis=1, keepdims=True)
+    return table.astype(np.float32), half
+
+
+def resample(samples: np.ndarray, from_rate, to_rate=SAMPLE_RATE):
+    """
+    向量化的多相重采样
+    相位相同的输出采样对应输入上等间隔的窗口，每个相位做一次矩阵乘向量
+    """
+    if from_rate == to_rate or len(samples) == 0:
+        return samples
+    divisor = gcd(int(from_rate), int(to_rate))
+    up, down = int(to_rate) // divisor, int(from_rate) // divisor
+    if up > MAX_PHASES:
+        # 不常见的采样率相位太多，改用线性插值
+        positions = np.arange(len(samples) * to_rate // from_rate) * (from_rate / to_rate)
+        return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    table, half = _polyphase_table(up, down)
+    padded = np.pad(samples.astype(np.float32), (half - 1, half))
+    windows = sliding_window_view(padded, 2 * half)
+    length = len(samples) * up // down
+    output = np.empty(length, dtype=np.float32)
+    for phase in range(min(up, length)):
+        # 输出phase, phase+up, phase+2up...的窗口起点依次相差down
+        start = phase * down // up
+        count = len(range(phase, length, up))
+        output[phase::up] = windows[start : start + count * down : down] @ table[
+            phase * down % up
+        ]
+    return output
+
+
+class StreamResampler:
+    """分块输入的多相重采样，拼接后的输出与整段resample一致"""
+
+    def __init__(self, from_rate, to_rate=SAMPLE_RATE):
+        divisor = gcd(int(from_rate), int(to_rate))
+        self.up, self.down = int(to_rate) // divisor, int(from_rate) // divisor
+        if self.up > MAX_PHASES:
+            # 不常见的采样率按100Hz取整，避免相位太多
+            from_rate = max(100, round(from_rate, -2))
+            divisor = gcd(int(from_rate), int(to_rate))
+            self.up, self.down = int(to_rate) // divisor, int(from_rate) // divisor
+        self.passthrough = self.up == self.down
+        if not self.passthrough:
+            self.table, self.half = _polyphase_table(self.up, self.down)
+            # buffer[0]在补零后输入中的位置
+            self.offset = 0
+            self.buffer = np.zeros(self.half - 1, dtype=np.float32)
+        self.total_in = 0
+        self.produced = 0
+
+    def feed(self, samples: np.ndarray):
+        if self.passthrough:
+            return samples
+        self.total_in += len(samples)
+        self.buffer = np.concatenate([self.buffer, samples.astype(np.float32)])
+        return self._emit()
+
+    def flush(self):
+        if self.passthrough:
+            return np.zeros(0, dtype=np.float32)
+        self.buffer = np.concatenate([self.buffer, np.zeros(self.half, dtype=np.float32)])
+        return self._emit(final=True)
+
+    def _emit(self, final=False):
+        up, down, width = self.up, self.down, 2 * self.half
+        # 输出j使用补零后输入的[j*down//up, j*down//up + width)
+        end = self.total_in * up // down
+        if not final:
+            available = self.offset + len(self.buffer) - width
+            if available < 0:
+                return np.zeros(0, dtype=np.float32)
+            end = min(end, -(-(available + 1) * up // down))
+        if end <= self.produced:
+            return np.zeros(0, dtype=np.float32)
+        positions = np.arange(self.produced, end) * down
+        windows = sliding_window_view(self.buffer, width)
+        output = np.einsum(
+            "ij,ij->i",
+            windows[positions // up - self.offset],
+            self.table[positions % up],
+        )
+        self.produced = end
+        keep = end * down // up - self.offset
+        self.buffer = self.buffer[keep:]
+        self.offset += keep
+        return output.astype(np.float32)
+
+
+def to_pcm16(samples: np.ndarray) -> bytes:
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16).tobytes()
+
+
+def _decode_with_ffmpeg(audio: bytes, audio_format):
+    # -nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
+    segment = AudioSegment.from_file(
+        io.BytesIO(audio), format=audio_format, parameters=["-nostdin"]
+    )
+    segment = segment.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(2)
+    return segment.raw_data
+
+
+def decode_to_pcm(audio: bytes, audio_format=None, pcm_sample_rate=SAMPLE_RATE):
+    """
+    把TTS返回的音频转换为16kHz单声道16位PCM
+    - pcm: 已是16kHz时直接使用，否则只做重采样
+    - wav: wave模块解析后用numpy重采样
+    - mp3/flac/ogg: 使用miniaudio在进程内解码
+    - 其他格式或解析失败时才启动ffmpeg
+    """
+    if audio_format == "pcm":
+        if pcm_sample_rate == SAMPLE_RATE:
+            return audio[: len(audio) - len(audio) % 2]
+        samples = np.frombuffer(audio[: len(audio) - len(audio) % 2], dtype=np.int16)
+        return to_pcm16(resample(samples.astype(np.float32), pcm_sample_rate))
+
+    audio_format = detect_audio_format(audio, audio_format)
+    try:
+        if audio_format == "wav":
+            samples, sample_rate = decode_wav(audio)
+            return to_pcm16(resample(samples, sample_rate))
+        if miniaudio is not None and audio_format in ("mp3", "flac", "ogg"):
+            decoded = miniaudio.decode(
+                bytes(audio),
+                output_format=miniaudio.SampleFormat.SIGNED16,
+                nchannels=1,
+                sample_rate=SAMPLE_RATE,
+            )
+            return decoded.samples.tobytes()
+    except Exception as e:
+        logger.bind(tag=TAG).warning(f"进程内解码{audio_format}失败，改用ffmpeg: {e}")
+    return _decode_with_ffmpeg(audio, audio_format)
+
+
+def _get_encoder():
+    """每个线程复用一个Opus编码器，每段音频开始前重置状态"""
+    encoder = getattr(_thread_local, "encoder", None)
+    if encoder is None:
+        encoder = opuslib_next.Encoder(
+            SAMPLE_RATE, 1, opuslib_next.APPLICATION_AUDIO
+        )
+        _thread_local.encoder = encoder
+    else:
+        encoder.reset_state()
+    return encoder
+
+
+def pcm_to_opus_data(pcm: bytes):
+    """16kHz单声道PCM编码为60ms一帧的Opus数据，最后一帧不足时补零"""
+    if len(pcm) % FRAME_BYTES:
+        pcm += b"\x00" * (FRAME_BYTES - len(pcm) % FRAME_BYTES)
+    encoder = _get_encoder()
+    return [
+        encoder.encode(pcm[i : i + FRAME_BYTES], FRAME_SIZE)
+        for i in range(0, len(pcm), FRAME_BYTES)
+    ]
+
+
+# mp3帧头中的比特率(kbps)，分别对应MPEG1和MPEG2/2.5的Layer III
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+# 增量解码时带上之前的帧，保证bit reservoir和重叠相加的数据完整
+MP3_CONTEXT_BYTES = 1024
+
+
+def parse_mp3_frame_header(header: bytes):
+    """解析Layer III帧头，返回(帧长度, 每帧采样数, 采样率)，不是帧头时返回None"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 3
+    layer = (header[1] >> 1) & 3
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    padding = (header[2] >> 1) & 1
+    bitrate = _MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    frame_samples = 1152 if version == 3 else 576
+    return frame_samples // 8 * bitrate // sample_rate + padding, frame_samples, sample_rate
+
+
+class _PcmStreamDecoder:
+    def __init__(self, sample_rate=SAMPLE_RATE, sample_width=2, channels=1):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.channels = channels
+        self.rest = b""
+
+    def feed(self, chunk: bytes):
+        data = self.rest + chunk
+        size = len(data) - len(data) % (self.sample_width * self.channels)
+        self.rest = data[size:]
+        return pcm_to_samples(data[:size], self.sample_width, self.channels)
+
+    def flush(self):
+        return None
+
+
+class _WavStreamDecoder(_PcmStreamDecoder):
+    """先解析wav头，data块之后按PCM增量处理"""
+
+    def __init__(self):
+        super().__init__()
+        self.header = b""
+        self.sample_rate = None
+
+    def feed(self, chunk: bytes):
+        if self.sample_rate is not None:
+            return super().feed(chunk)
+        self.header += chunk
+        position = 12
+        fmt = None
+        while position + 8 <= len(self.header):
+            chunk_id = self.header[position : position + 4]
+            size = int.from_bytes(self.header[position + 4 : position + 8], "little")
+            if chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("wav缺少fmt块")
+                format_tag, self.channels, self.sample_rate = struct.unpack("<HHI", fmt[:8])
+                self.sample_width = struct.unpack("<H", fmt[14:16])[0] // 8
+                if format_tag not in (1, 0xFFFE):
+                    raise ValueError(f"不支持的wav编码: {format_tag}")
+                data = self.header[position + 8 :]
+                self.header = b""
+                return super().feed(data)
+            if position + 8 + size > len(self.header):
+                break
+            if chunk_id == b"fmt ":
+                fmt = self.header[position + 8 : position + 8 + size]
+            position += 8 + size + size % 2
+        return None
+
+
+class _Mp3StreamDecoder:
+    """
+    按帧切分mp3，新到的完整帧连同之前的少量帧一起交给miniaudio解码，
+    只保留新帧对应的采样
+    """
+
+    def __init__(self):
+        self.buffer = b""
+        self.context = []
+        self.pending = []
+        self.sample_rate = None
+        self.frame_samples = None
+        self.skipped_id3 = False
+
+    def feed(self, chunk: bytes):
+        self.buffer += chunk
+        self._split_frames()
+        # 攒够约120ms再解码，减少重复解码上下文的开销
+        if self.pending and (
+            not self.context
+            or len(self.pending) * self.frame_samples >= self.sample_rate * 0.12
+        ):
+            return self._decode()
+        return None
+
+    def flush(self):
+        if self.pending:
+            return self._decode()
+        return None
+
+    def _split_frames(self):
+        if not self.skipped_id3:
+            if len(self.buffer) < 10:
+                return
+            if self.buffer[:3] == b"ID3":
+                size = 10 + sum(b << (7 * (3 - i)) for i, b in enumerate(self.buffer[6:10]))
+                if len(self.buffer) < size:
+                    return
+                self.buffer = self.buffer[size:]
+            self.skipped_id3 = True
+        position = 0
+        while position + 4 <= len(self.buffer):
+            header = parse_mp3_frame_header(self.buffer[position : position + 4])
+            if header is None:
+                # 不是帧头，继续向后查找同步字
+                position += 1
+                continue
+            length, frame_samples, sample_rate = header
+            if position + length > len(self.buffer):
+                break
+            frame = self.buffer[position : position + length]
+            position += length
+            if b"Xing" in frame[:64] or b"Info" in frame[:64]:
+                # VBR/LAME信息帧没有音频数据
+                continue
+            self.sample_rate, self.frame_samples = sample_rate, frame_samples
+            self.pending.append(frame)
+        self.buffer = self.buffer[position:]
+
+    def _decode(self):
+        data = b"".join(self.context + self.pending)
+        decoded = miniaudio.mp3_read_s16(data)
+        samples = np.frombuffer(decoded.samples, dtype=np.int16).astype(np.float32)
+        if decoded.nchannels > 1:
+            samples = samples.reshape(-1, decoded.nchannels).mean(axis=1)
+        if self.context:
+            samples = samples[-len(self.pending) * self.frame_samples :]
+        self.context.extend(self.pending)
+        self.pending = []
+        while (
+            len(self.context) > 2
+            and sum(len(frame) for frame in self.context[1:]) >= MP3_CONTEXT_BYTES
+        ):
+            self.context.pop(0)
+        return samples
+
+
+class _BufferedDecoder:
+    """无法增量解码的格式，收齐后整段解码"""
+
+    sample_rate = SAMPLE_RATE
+
+    def __init__(self, audio_format, data=b""):
+        self.audio_format = audio_format
+        self.data = data
+
+    def feed(self, chunk: bytes):
+        self.data += chunk
+        return None
+
+    def flush(self):
+        pcm = decode_to_pcm(self.data, self.audio_format)
+        return np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+
+
+class StreamingOpusEncoder:
+    """流式TTS：音频块到达后增量解码、重采样，凑满60ms就编码为一帧Opus"""
+
+    def __init__(self, audio_format=None, pcm_sample_rate=SAMPLE_RATE):
+        self.audio_format = audio_format
+        self.pcm_sample_rate = pcm_sample_rate
+        self.decoder = None
+        self.resampler = None
+        self.pcm = b""
+        self.encoder = _get_encoder()
+        self.samples = 0
+        # 开始输出音频前收到的数据，增量解码失败时用于整段解码
+        self.received = b""
+
+    @property
+    def duration(self):
+        """已编码音频的时长(秒)"""
+        return self.samples / SAMPLE_RATE
+
+    def _create_decoder(self, chunk):
+        if self.audio_format == "pcm":
+            return _PcmStreamDecoder(self.pcm_sample_rate)
+        audio_format = detect_audio_format(chunk, self.audio_format)
+        if audio_format == "wav":
+            return _WavStreamDecoder()
+        if audio_format == "mp3" and miniaudio is not None:
+            return _Mp3StreamDecoder()
+        return _BufferedDecoder(audio_format)
+
+    def feed(self, chunk: bytes):
+        """输入一块音频数据，返回已经可以发送的Opus帧"""
+        if not chunk:
+            return []
+        if self.decoder is None:
+            self.decoder = self._create_decoder(chunk)
+        if self.resampler is None:
+            self.received += chunk
+        try:
+            samples = self.decoder.feed(chunk)
+        except Exception as e:
+            if self.resampler is not None:
+                raise
+            # 还没有输出音频，改为收齐后整段解码
+            logger.bind(tag=TAG).warning(f"增量解码失败，改为收齐后解码: {e}")
+            self.decoder = _BufferedDecoder(self.audio_format, self.received)
+            return []
+        return self._encode(samples)
+
+    def flush(self):
+        """输入结束，返回剩余的Opus帧，最后一帧不足时补零"""
+        if self.decoder is None:
+            return []
+        frames = self._encode(self.decoder.flush())
+        if self.resampler is not None:
+            frames.extend(self._encode_pcm(to_pcm16(self.resampler.flush())))
+        if self.pcm:
+            self.samples += len(self.pcm) // 2
+            pcm = self.pcm + b"\x00" * (FRAME_BYTES - len(self.pcm))
+            self.pcm = b""
+            frames.append(self.encoder.encode(pcm, FRAME_SIZE))
+        return frames
+
+    def _encode(self, samples):
+        if samples is None or len(samples) == 0:
+            return []
+        if self.resampler is None:
+            self.resampler = StreamResampler(self.decoder.sample_rate)
+            self.received = b""
+        return self._encode_pcm(to_pcm16(self.resampler.feed(samples)))
+
+    def _encode_pcm(self, pcm: bytes):
+        self.pcm += pcm
+        count = len(self.pcm) // FRAME_BYTES
+        frames = [
+            self.encoder.encode(self.pcm[i * FRAME_BYTES : (i + 1) * FRAME_BYTES], FRAME_SIZE)
+            for i in range(count)
+        ]
+        self.pcm = self.pcm[count * FRAME_BYTES :]
+        self.samples += count * FRAME_SIZE
+        return frames
@@ -0,0 +1,35 @@
+import asyncio
+
+# 合成结束标记
+_END = object()
+
+
+class AudioFrameStream:
+    """
+    流式TTS输出的Opus帧：合成线程调用put/close，事件循环中用async for边收边发送
+    timeout秒内没有新的帧时结束迭代，避免合成卡住时一直占用播放
+    """
+
+    def __init__(self, loop, text, text_index, timeout=10):
+        self.loop = loop
+        self.text = text
+        self.text_index = text_index
+        self.timeout = timeout
+        self.queue = asyncio.Queue()
+
+    def put(self, frames):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, frames)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, _END)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while True:
+            frames = await asyncio.wait_for(self.queue.get(), self.timeout)
+            if frames is _END:
+                break
+            for frame in frames:
+                yield frame
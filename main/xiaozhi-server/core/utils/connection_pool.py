@@ -0,0 +1,117 @@
+import time
+import asyncio
+from collections import deque
+import websockets
+from websockets.protocol import State
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+async def websocket_is_open(websocket):
+    """默认的健康检查：连接仍处于OPEN状态"""
+    return websocket.state is State.OPEN
+
+
+class WebsocketPool:
+    """
+    预热的websocket连接池：提前完成TCP/TLS握手，取用时可以直接发送请求
+    - 云端协议一个连接只服务一次请求，连接取走后由调用方关闭，池子在后台补齐
+    - 空闲超过max_idle_seconds或健康检查失败的连接会被丢弃重连
+    - 超过keep_warm_seconds没有取用时停止预热，释放空闲连接
+    - health_check可替换，便于对接本地模拟服务做检查
+    """
+
+    def __init__(
+        self,
+        url,
+        headers=None,
+        size=2,
+        max_idle_seconds=30,
+        keep_warm_seconds=300,
+        health_check=websocket_is_open,
+    ):
+        self.url = url
+        self.headers = headers
+        self.size = size
+        self.max_idle_seconds = max_idle_seconds
+        self.keep_warm_seconds = keep_warm_seconds
+        self.health_check = health_check
+        self.idle = deque()
+        self.last_acquire = 0.0
+        self.maintain_task = None
+        self.wakeup = None
+
+    async def connect(self):
+        return await websockets.connect(self.url, additional_headers=self.headers)
+
+    async def acquire(self):
+        """取出一个已握手的连接，池中没有可用连接时当场建立"""
+        self.last_acquire = time.monotonic()
+        try:
+            while self.idle:
+                websocket, created = self.idle.popleft()
+                if time.monotonic() - created <= self.max_idle_seconds and await self._healthy(websocket):
+                    return websocket
+                await self._discard(websocket)
+            return await self.connect()
+        finally:
+            self._ensure_maintain_task()
+
+    async def close(self):
+        if self.maintain_task is not None:
+            self.maintain_task.cancel()
+            self.maintain_task = None
+        while self.idle:
+            websocket, _ = self.idle.popleft()
+            await self._discard(websocket)
+
+    def _ensure_maintain_task(self):
+        if self.size <= 0:
+            return
+        if self.maintain_task is None or self.maintain_task.done():
+            self.wakeup = asyncio.Event()
+            self.maintain_task = asyncio.create_task(self._maintain())
+        # 连接被取走后立即补齐
+        self.wakeup.set()
+
+    async def _healthy(self, websocket):
+        try:
+            return await self.health_check(websocket)
+        except Exception:
+            return False
+
+    async def _discard(self, websocket):
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+    async def _maintain(self):
+        try:
+            while time.monotonic() - self.last_acquire < self.keep_warm_seconds:
+                # 丢弃过期的连接
+                now = time.monotonic()
+                while self.idle and now - self.idle[0][1] > self.max_idle_seconds:
+                    websocket, _ = self.idle.popleft()
+                    await self._discard(websocket)
+                # 补齐预热连接
+                while len(self.idle) < self.size:
+                    try:
+                        websocket = await self.connect()
+                    except Exception as e:
+                        logger.bind(tag=TAG).warning(f"预热连接失败: {self.url}, {e}")
+                        break
+                    self.idle.append((websocket, time.monotonic()))
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self.wakeup.wait(), min(1.0, self.max_idle_seconds / 2)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            while self.idle:
+                websocket, _ = self.idle.popleft()
+                await self._discard(websocket)
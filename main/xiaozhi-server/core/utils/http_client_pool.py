@@ -0,0 +1,105 @@
+import asyncio
+import importlib.util
+import threading
+import httpx
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+def http2_available():
+    """httpx开启HTTP/2需要安装h2"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _origin(base_url):
+    url = httpx.URL(base_url)
+    return f"{url.scheme}://{url.host}:{url.port or (443 if url.scheme == 'https' else 80)}"
+
+
+def _pool_connections(client):
+    """读取httpx客户端底层连接池中的连接，包括代理mount"""
+    transports = [client._transport, *client._mounts.values()]
+    connections = []
+    for transport in transports:
+        pool = getattr(transport, "_pool", None)
+        connections.extend(getattr(pool, "connections", []))
+    return connections
+
+
+class HTTPClientPool:
+    """
+    进程内共享的HTTP客户端，大模型、TTS等调用HTTP接口的组件共用
+    - 按服务地址(scheme://host:port)缓存一对同步/异步httpx客户端，TCP/TLS连接跨连接、跨组件复用
+    - httpx客户端线程安全，同步客户端可在线程池中使用；异步客户端只在服务端事件循环中使用
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.max_connections = 100
+        self.max_keepalive_connections = 20
+        self.keepalive_expiry = 60
+        self.http2 = True
+        self.timeout = httpx.Timeout(60, connect=10)
+        self.http_clients = {}
+
+    def configure(self, config: dict):
+        self.max_connections = int(config.get("max_connections", self.max_connections))
+        self.max_keepalive_connections = int(
+            config.get("max_keepalive_connections", self.max_keepalive_connections)
+        )
+        self.keepalive_expiry = float(config.get("keepalive_expiry", self.keepalive_expiry))
+        self.http2 = str(config.get("http2", self.http2)).lower() in ("true", "1", "yes")
+
+    def get_http_clients(self, base_url):
+        """返回服务地址对应的(httpx.Client, httpx.AsyncClient)"""
+        origin = _origin(base_url)
+        with self.lock:
+            clients = self.http_clients.get(origin)
+            if clients is None:
+                limits = httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                )
+                http2 = self.http2 and http2_available()
+                clients = (
+                    httpx.Client(limits=limits, timeout=self.timeout, http2=http2),
+                    httpx.AsyncClient(limits=limits, timeout=self.timeout, http2=http2),
+                )
+                self.http_clients[origin] = clients
+                logger.bind(tag=TAG).info(f"创建HTTP共享连接池: {origin}, http2={http2}")
+            return clients
+
+    def get_http_client(self, base_url) -> httpx.Client:
+        return self.get_http_clients(base_url)[0]
+
+    def get_async_http_client(self, base_url) -> httpx.AsyncClient:
+        return self.get_http_clients(base_url)[1]
+
+    def stats(self):
+        """每个服务地址的连接数：live为已建立的连接，idle为其中空闲可复用的连接"""
+        with self.lock:
+            http_clients = list(self.http_clients.items())
+        result = {}
+        for origin, clients in http_clients:
+            connections = [c for client in clients for c in _pool_connections(client)]
+            result[origin] = {
+                "live": len(connections),
+                "idle": sum(1 for c in connections if c.is_idle()),
+            }
+        return result
+
+    async def report(self, report_seconds):
+        """定期在日志中输出各服务地址的连接数"""
+        while True:
+            await asyncio.sleep(report_seconds)
+            for origin, counts in self.stats().items():
+                logger.bind(tag=TAG).info(
+                    f"HTTP连接池 {origin}: 连接数={counts['live']}, 空闲={counts['idle']}"
+                )
+
+
+# 进程内唯一的共享HTTP客户端池
+http_client_pool = HTTPClientPool()
@@ -0,0 +1,49 @@
+import time
+import threading
+from collections import deque
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class LatencyStats:
+    """耗时统计：保留最近的样本，定期输出各项耗时的p50/p95"""
+
+    def __init__(self, name, report_seconds=60, max_samples=1000):
+        self.name = name
+        self.report_seconds = report_seconds
+        self.max_samples = max_samples
+        self.samples = {}
+        self.lock = threading.Lock()
+        self.last_report = time.monotonic()
+
+    def record(self, **durations_ms):
+        """记录一次请求的各项耗时(毫秒)，如 record(queue=3.2, inference=85.0)"""
+        with self.lock:
+            for key, value in durations_ms.items():
+                if key not in self.samples:
+                    self.samples[key] = deque(maxlen=self.max_samples)
+                self.samples[key].append(value)
+            if time.monotonic() - self.last_report < self.report_seconds:
+                return
+            self.last_report = time.monotonic()
+            summary = self.summary()
+        logger.bind(tag=TAG).info(f"{self.name}耗时统计: {summary}")
+
+    @staticmethod
+    def percentile(values, p):
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(len(ordered) * p / 100.0 - 0.5)))
+        return ordered[max(0, index)]
+
+    def summary(self):
+        parts = []
+        for key, values in self.samples.items():
+            parts.append(
+                f"{key} p50={self.percentile(values, 50):.1f}ms "
+                f"p95={self.percentile(values, 95):.1f}ms"
+            )
+        return f"样本{max((len(v) for v in self.samples.values()), default=0)}个, " + ", ".join(parts)
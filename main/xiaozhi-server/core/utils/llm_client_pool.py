@@ -0,0 +1,41 @@
+import threading
+import openai
+from core.utils.http_client_pool import http_client_pool
+
+# 未配置地址时openai客户端使用官方地址
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+
+class LLMClientPool:
+    """
+    进程内共享的大模型客户端
+    - 客户端按(type, base_url, api_key, model)缓存，各连接、意图识别、按设备实例化的LLM共用
+    - 底层使用http_client_pool的httpx客户端，同一服务地址的TCP/TLS连接跨客户端复用
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients = {}
+
+    def get_openai_clients(self, llm_type, base_url, api_key, model):
+        """返回共享的(OpenAI, AsyncOpenAI)客户端"""
+        key = (llm_type, base_url, api_key, model)
+        with self.lock:
+            clients = self.clients.get(key)
+        if clients is not None:
+            return clients
+        http_client, async_http_client = http_client_pool.get_http_clients(
+            base_url or OPENAI_BASE_URL
+        )
+        clients = (
+            openai.OpenAI(api_key=api_key, base_url=base_url, http_client=http_client),
+            openai.AsyncOpenAI(
+                api_key=api_key, base_url=base_url, http_client=async_http_client
+            ),
+        )
+        with self.lock:
+            return self.clients.setdefault(key, clients)
+
+
+# 进程内唯一的共享客户端池
+llm_client_pool = LLMClientPool()
@@ -0,0 +1,70 @@
+import time
+import asyncio
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 延迟直方图的桶上限(毫秒)
+LAG_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, float("inf"))
+
+
+class LoopLagMonitor:
+    """事件循环延迟监控：定时休眠并统计实际唤醒时间比预期晚了多少"""
+
+    def __init__(self, interval_ms=100, report_seconds=60):
+        self.interval = interval_ms / 1000.0
+        self.report_seconds = report_seconds
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * len(LAG_BUCKETS_MS)
+        self.total = 0
+        self.max_lag_ms = 0.0
+
+    def record(self, lag_ms):
+        for i, upper in enumerate(LAG_BUCKETS_MS):
+            if lag_ms <= upper:
+                self.counts[i] += 1
+                break
+        self.total += 1
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def percentile(self, p):
+        """按直方图估算分位数，返回所在桶的上限"""
+        if self.total == 0:
+            return 0.0
+        threshold = self.total * p / 100.0
+        seen = 0
+        for count, upper in zip(self.counts, LAG_BUCKETS_MS):
+            seen += count
+            if seen >= threshold:
+                return min(upper, self.max_lag_ms)
+        return self.max_lag_ms
+
+    def histogram(self):
+        lines = []
+        lower = 0
+        for count, upper in zip(self.counts, LAG_BUCKETS_MS):
+            label = f"{lower}-{upper}ms" if upper != float("inf") else f">{lower}ms"
+            lines.append(f"{label}: {count}")
+            lower = upper
+        return ", ".join(lines)
+
+    def report(self):
+        logger.bind(tag=TAG).info(
+            f"事件循环延迟: 采样{self.total}次, p50<={self.percentile(50):.1f}ms, "
+            f"p99<={self.percentile(99):.1f}ms, 最大{self.max_lag_ms:.1f}ms | {self.histogram()}"
+        )
+
+    async def run(self):
+        last_report = time.monotonic()
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.record(max(0.0, (now - expected) * 1000))
+            if now - last_report >= self.report_seconds:
+                self.report()
+                self.reset()
+                last_report = now
@@ -30,4 +30,13 @@ def decode_opus_from_file(input_file):
 
     # 计算总时长
     total_duration = (total_frames * frame_duration_ms) / 1000.0
-    return opus_datas, total_duration
\ No newline at end of file
+    return opus_datas, total_duration
+
+def encode_opus_to_file(opus_datas, output_file):
+    """
+    把 Opus 数据包列表写入p3文件，每个数据包前加4字节头部。
+    """
+    with open(output_file, 'wb') as f:
+        for opus_data in opus_datas:
+            f.write(struct.pack('>BBH', 0, 0, len(opus_data)))
+            f.write(opus_data)
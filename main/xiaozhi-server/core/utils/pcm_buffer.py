@@ -0,0 +1,69 @@
+import numpy as np
+
+# int16 PCM 转 float32 的归一化系数
+INT16_SCALE = np.float32(1.0 / 32768.0)
+
+
+class PcmRingBuffer:
+    """
+    预分配的PCM环形缓冲区，供VAD/ASR在热路径上累积音频使用
+    - 写入16位PCM时直接转换为float32写入预分配的内存，不产生中间数组
+    - 读取返回底层内存的零拷贝视图，视图在下一次写入前有效
+    - 写指针到达末尾时把未读数据搬回开头，保证读出的窗口始终连续
+    - 容量不足时丢弃最旧的数据
+    """
+
+    def __init__(self, capacity_samples: int = 16000 * 2):
+        self._buffer = np.zeros(capacity_samples, dtype=np.float32)
+        self._read = 0
+        self._write = 0
+
+    def __len__(self):
+        return self._write - self._read
+
+    @property
+    def capacity(self):
+        return len(self._buffer)
+
+    def clear(self):
+        self._read = 0
+        self._write = 0
+
+    def write(self, pcm_bytes):
+        """写入16位小端PCM数据"""
+        samples = np.frombuffer(pcm_bytes, dtype=np.int16)
+        if len(samples) > self.capacity:
+            samples = samples[-self.capacity :]
+        count = len(samples)
+        if self._write + count > self.capacity:
+            self._compact(count)
+        np.multiply(
+            samples,
+            INT16_SCALE,
+            out=self._buffer[self._write : self._write + count],
+            casting="unsafe",
+        )
+        self._write += count
+
+    def read(self, count: int):
+        """读取count个采样点，返回零拷贝的float32视图，数据不足时返回None"""
+        if len(self) < count:
+            return None
+        view = self._buffer[self._read : self._read + count]
+        self._read += count
+        return view
+
+    def peek(self):
+        """返回全部未读数据的零拷贝视图，不移动读指针"""
+        return self._buffer[self._read : self._write]
+
+    def _compact(self, incoming):
+        # 空间仍不够时丢弃最旧的数据
+        overflow = len(self) + incoming - self.capacity
+        if overflow > 0:
+            self._read += overflow
+        remaining = len(self)
+        if remaining:
+            self._buffer[:remaining] = self._buffer[self._read : self._write]
+        self._read = 0
+        self._write = remaining
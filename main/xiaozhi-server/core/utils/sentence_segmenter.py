@@ -0,0 +1,166 @@
+import time
+from typing import List
+
+# 默认句末标点
+DEFAULT_TERMINATORS = "。？！；：.?!"
+# 半角标点后面紧跟空白才算句末，避免把3.14、e.g.这类文本切开
+ASCII_TERMINATORS = frozenset(".?!;:,")
+# 超过最大长度仍没有句末标点时，优先在这些位置强制切分
+SOFT_BREAKS = frozenset("，,、 ")
+
+
+class SentenceSegmenter:
+    """
+    流式分句器：LLM每输出一个token送入一次，切出可以送去TTS的片段
+    - 只扫描新到的token，已扫描的文本不重复拼接、查找，总开销与文本长度成线性
+    - 在未切分文本中最后一个句末标点处切分
+    - first_segment_terminators: 第一段额外使用的切分标点(如逗号)，让设备更快开始播放
+    - first_segment_max_length / first_segment_max_ms: 第一段超过该长度，或自第一个token起
+      超过该时间仍没有标点时立即切出，0表示不限制
+    - min_length: 片段短于该长度时继续等待下一个标点；为列表时按片段序号取值(最后一个值沿用)，
+      让后面的片段逐渐变长，语调更自然
+    - max_length: 一直没有句末标点时超过该长度强制切分，0表示不限制
+    """
+
+    def __init__(
+        self,
+        terminators=DEFAULT_TERMINATORS,
+        first_segment_terminators="",
+        min_length=0,
+        max_length=0,
+        first_segment_max_length=0,
+        first_segment_max_ms=0,
+    ):
+        self.terminators = frozenset(terminators)
+        self.first_segment_terminators = self.terminators | frozenset(
+            first_segment_terminators
+        )
+        self.min_lengths = (
+            list(min_length) if isinstance(min_length, (list, tuple)) else [min_length]
+        ) or [0]
+        self.max_length = max_length
+        self.first_segment_max_length = first_segment_max_length
+        self.first_segment_max_ms = first_segment_max_ms
+        # 设置了第一段规则时，第一段在最早的切分点就切出，而不是等到最后一个标点
+        self.eager_first_segment = bool(
+            first_segment_terminators or first_segment_max_length or first_segment_max_ms
+        )
+        self.segment_count = 0
+        self.first_token_time = None
+        self._reset("")
+
+    @classmethod
+    def from_config(cls, config: dict):
+        min_length = config.get("min_length", 0)
+        if isinstance(min_length, (list, tuple)):
+            min_length = [int(value) for value in min_length]
+        else:
+            min_length = int(min_length)
+        return cls(
+            terminators=config.get("terminators", DEFAULT_TERMINATORS),
+            first_segment_terminators=config.get("first_segment_terminators", ""),
+            min_length=min_length,
+            max_length=int(config.get("max_length", 0)),
+            first_segment_max_length=int(config.get("first_segment_max_length", 0)),
+            first_segment_max_ms=float(config.get("first_segment_max_ms", 0)),
+        )
+
+    def feed(self, token: str) -> List[str]:
+        """送入新的token，返回本次可以切出的片段(保留原始标点)"""
+        if not token:
+            return []
+        if self.first_token_time is None:
+            self.first_token_time = time.monotonic()
+        self._scan(token)
+        self._chunks.append(token)
+        self._length += len(token)
+
+        segments = []
+        position = self._next_cut()
+        while position > 0:
+            segments.append(self._take(position))
+            position = self._next_cut()
+        return segments
+
+    def flush(self) -> str:
+        """取出剩余的全部文本"""
+        text = "".join(self._chunks)
+        self._reset("")
+        if text:
+            self.segment_count += 1
+        return text
+
+    def _min_length(self):
+        return self.min_lengths[min(self.segment_count, len(self.min_lengths) - 1)]
+
+    def _next_cut(self):
+        """返回当前可以切分的位置，不能切分时返回0"""
+        min_length = self._min_length()
+        if self.segment_count == 0 and self.eager_first_segment:
+            if self._first_cut > 0:
+                return self._first_cut
+            if self._length >= min_length and self._first_segment_due():
+                return self._soft_cut if self._soft_cut > 0 else self._length
+        elif self._cut > 0 and self._cut >= min_length:
+            return self._cut
+        if self.max_length and self._length >= self.max_length:
+            return self._soft_cut if self._soft_cut > 0 else self._length
+        return 0
+
+    def _first_segment_due(self):
+        """第一段迟迟没有标点时，按长度或等待时间提前切出"""
+        if self.first_segment_max_length and self._length >= self.first_segment_max_length:
+            return True
+        if self.first_segment_max_ms:
+            waited_ms = (time.monotonic() - self.first_token_time) * 1000
+            return waited_ms >= self.first_segment_max_ms
+        return False
+
+    def _scan(self, token):
+        terminators = (
+            self.first_segment_terminators
+            if self.segment_count == 0
+            else self.terminators
+        )
+        base = self._length
+        # 上一个token以半角标点结尾，看这个token是否以空白开头
+        if self._ascii_pending:
+            self._ascii_pending = False
+            if token[0].isspace():
+                self._mark_cut(base)
+        last = len(token) - 1
+        for i, ch in enumerate(token):
+            if ch in terminators:
+                if ch not in ASCII_TERMINATORS:
+                    self._mark_cut(base + i + 1)
+                elif i == last:
+                    self._ascii_pending = True
+                elif token[i + 1].isspace():
+                    self._mark_cut(base + i + 1)
+            elif ch in SOFT_BREAKS:
+                self._soft_cut = base + i + 1
+
+    def _mark_cut(self, position):
+        self._cut = position
+        # 记录第一段满足最小长度的最早切分点
+        if self._first_cut < 0 and position >= self._min_length():
+            self._first_cut = position
+
+    def _take(self, position):
+        text = "".join(self._chunks)
+        self.segment_count += 1
+        self._reset(text[position:])
+        return text[:position]
+
+    def _reset(self, rest):
+        self._chunks = []
+        self._length = 0
+        self._cut = -1
+        self._first_cut = -1
+        self._soft_cut = -1
+        self._ascii_pending = False
+        # 切分后剩下的文本重新扫描，切分标点可能已从第一段的规则切换
+        if rest:
+            self._scan(rest)
+            self._chunks.append(rest)
+            self._length = len(rest)
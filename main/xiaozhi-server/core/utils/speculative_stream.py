@@ -0,0 +1,54 @@
+import time
+import asyncio
+
+# 输出结束标记
+_END = object()
+
+
+class SpeculativeStream:
+    """
+    提前读取大模型的流式输出并缓存：创建后立即开始请求，
+    迭代时先取出已缓存的内容再继续读取，不需要时调用aclose取消请求
+    """
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.start_time = time.monotonic()
+        self.queue = asyncio.Queue()
+        self.error = None
+        self.task = asyncio.create_task(self._pump())
+
+    @property
+    def buffered(self):
+        """已缓存、尚未取出的输出数量"""
+        return self.queue.qsize()
+
+    async def _pump(self):
+        try:
+            async for item in self.responses:
+                self.queue.put_nowait(item)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.queue.put_nowait(_END)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while True:
+            item = await self.queue.get()
+            if item is _END:
+                break
+            yield item
+        if self.error is not None:
+            raise self.error
+
+    async def aclose(self):
+        if not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        await self.responses.aclose()
@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class LRUTTLCache:
+    """
+    带过期时间的LRU缓存，读写均为O(1)
+    - 超过max_size时淘汰最久未使用的条目，过期条目在读取时删除
+    - snapshot_file不为空时启动时从文件恢复，写入后最多每snapshot_interval秒在后台线程保存一次，
+      不阻塞事件循环，服务重启后热点数据仍然有效
+    - hits/misses记录命中次数，可通过stats查看
+    """
+
+    def __init__(
+        self,
+        max_size=1000,
+        ttl_seconds=600,
+        snapshot_file=None,
+        snapshot_interval=60,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.snapshot_file = snapshot_file
+        self.snapshot_interval = snapshot_interval
+        self.entries = OrderedDict()  # key -> (value, 写入时间)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self.last_snapshot = time.time()
+        self.saving = False
+        # 后台保存与退出时的保存不能同时写快照文件
+        self.save_lock = threading.Lock()
+        if self.snapshot_file:
+            self.load()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry[1] > self.ttl_seconds:
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            self.dirty = True
+            snapshot_due = (
+                bool(self.snapshot_file)
+                and not self.saving
+                and time.time() - self.last_snapshot >= self.snapshot_interval
+            )
+            if snapshot_due:
+                self.saving = True
+        if snapshot_due:
+            self._save_in_background()
+
+    def _save_in_background(self):
+        """put在事件循环中调用，文件读写放到线程中执行"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            loop.run_in_executor(None, self._background_save)
+        else:
+            threading.Thread(target=self._background_save, daemon=True).start()
+
+    def _background_save(self):
+        try:
+            self.save()
+        finally:
+            with self.lock:
+                self.saving = False
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def save(self):
+        """把未过期的条目保存到快照文件"""
+        with self.save_lock:
+            self._save()
+
+    def _save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            # 持锁时只做浅拷贝，过滤和序列化在锁外进行，不阻塞put/get
+            items = list(self.entries.items())
+            now = time.time()
+            self.dirty = False
+            self.last_snapshot = now
+        entries = [
+            [key, value, created]
+            for key, (value, created) in items
+            if now - created <= self.ttl_seconds
+        ]
+        try:
+            directory = os.path.dirname(self.snapshot_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_file = f"{self.snapshot_file}.tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(temp_file, self.snapshot_file)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"保存缓存快照失败: {self.snapshot_file}, {e}")
+
+    def load(self):
+        """从快照文件恢复未过期的条目"""
+        if not os.path.exists(self.snapshot_file):
+            return
+        try:
+            with open(self.snapshot_file, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"读取缓存快照失败: {self.snapshot_file}, {e}")
+            return
+        now = time.time()
+        with self.lock:
+            for key, value, created in entries[-self.max_size :]:
+                if now - created <= self.ttl_seconds:
+                    self.entries[key] = (value, created)
+        logger.bind(tag=TAG).info(
+            f"从快照恢复缓存{len(self.entries)}条: {self.snapshot_file}"
+        )
@@ -0,0 +1,233 @@
+import os
+import asyncio
+import hashlib
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from config.logger import setup_logging
+from core.utils import p3
+
+TAG = __name__
+logger = setup_logging()
+
+
+def normalize_tts_text(text):
+    """统一全角半角并合并空白，保留标点(标点会影响语气)"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class TTSPhraseCache:
+    """
+    常用短句的TTS缓存，缓存编码好的60ms Opus帧，命中时不再请求TTS和编码
+    - key为(provider类型, 完整配置的摘要, 规范化文本)
+    - 内存层按字节数LRU淘汰
+    - 磁盘层为p3格式，内存中再次命中的句子才写入磁盘，服务重启后仍然有效
+    - provider的cache_enabled为False时不使用缓存
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.enabled = True
+        self.max_text_length = 30
+        self.max_memory_bytes = 32 * 1024 * 1024
+        self.max_disk_bytes = 256 * 1024 * 1024
+        self.disk_dir = None
+        self.memory = OrderedDict()  # key -> (opus_datas, 字节数)
+        self.memory_bytes = 0
+        self.disk = OrderedDict()  # 文件名 -> 字节数，按最近使用排序
+        self.disk_bytes = 0
+        self.writing = set()  # 正在写入磁盘的文件名，同一句话只写一次
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def configure(self, config: dict):
+        self.enabled = str(config.get("enabled", self.enabled)).lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+        self.max_text_length = int(config.get("max_text_length", self.max_text_length))
+        self.max_memory_bytes = int(float(config.get("max_memory_mb", 32)) * 1024 * 1024)
+        self.max_disk_bytes = int(float(config.get("max_disk_mb", 256)) * 1024 * 1024)
+        self.disk_dir = config.get("disk_dir") or None
+        if self.disk_dir:
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        os.makedirs(self.disk_dir, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.is_file() and entry.name.endswith(".tmp"):
+                # 上次退出时没有写完的临时文件
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            elif entry.is_file() and entry.name.endswith(".p3"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        with self.lock:
+            self.disk.clear()
+            for _, name, size in sorted(entries):
+                self.disk[name] = size
+            self.disk_bytes = sum(self.disk.values())
+        logger.bind(tag=TAG).info(
+            f"TTS磁盘缓存: {self.disk_dir}, {len(self.disk)}条, {self.disk_bytes // 1024}KB"
+        )
+
+    def _key(self, tts, text):
+        if not self.enabled or not getattr(tts, "cache_enabled", True):
+            return None
+        text = normalize_tts_text(text)
+        if not text or len(text) > self.max_text_length:
+            return None
+        return (type(tts).__module__, tts.config_fingerprint, text)
+
+    @staticmethod
+    def _file_name(key):
+        return hashlib.sha1("\n".join(key).encode("utf-8")).hexdigest() + ".p3"
+
+    def get(self, tts, text):
+        """返回缓存的Opus帧列表，未命中时返回None"""
+        key = self._key(tts, text)
+        if key is None:
+            return None
+        promote = False
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                self.bytes_saved += entry[1]
+                file_name = self._file_name(key)
+                promote = (
+                    self.disk_dir is not None
+                    and file_name not in self.disk
+                    and file_name not in self.writing
+                )
+                if promote:
+                    self.writing.add(file_name)
+            elif self.disk_dir is not None:
+                file_name = self._file_name(key)
+                if file_name in self.disk:
+                    self.disk.move_to_end(file_name)
+                else:
+                    file_name = None
+            else:
+                file_name = None
+        if entry is not None:
+            if promote:
+                self._write_disk(file_name, entry[0])
+            return entry[0]
+
+        if file_name is not None:
+            try:
+                opus_datas, _ = p3.decode_opus_from_file(
+                    os.path.join(self.disk_dir, file_name)
+                )
+            except Exception as e:
+                logger.bind(tag=TAG).warning(f"读取TTS磁盘缓存失败: {file_name}, {e}")
+                opus_datas = None
+            if opus_datas:
+                size = sum(len(data) for data in opus_datas)
+                with self.lock:
+                    self.disk_hits += 1
+                    self.bytes_saved += size
+                self._put_memory(key, opus_datas, size)
+                return opus_datas
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, tts, text, opus_datas):
+        key = self._key(tts, text)
+        if key is None or not opus_datas:
+            return
+        self._put_memory(key, list(opus_datas), sum(len(data) for data in opus_datas))
+
+    def _put_memory(self, key, opus_datas, size):
+        if size > self.max_memory_bytes:
+            return
+        with self.lock:
+            old = self.memory.pop(key, None)
+            if old is not None:
+                self.memory_bytes -= old[1]
+            self.memory[key] = (opus_datas, size)
+            self.memory_bytes += size
+            while self.memory_bytes > self.max_memory_bytes:
+                _, (_, evicted) = self.memory.popitem(last=False)
+                self.memory_bytes -= evicted
+
+    def _write_disk(self, file_name, opus_datas):
+        path = os.path.join(self.disk_dir, file_name)
+        temp_file = None
+        try:
+            # 每次写入使用独立的临时文件，写完后原子替换
+            fd, temp_file = tempfile.mkstemp(
+                dir=self.disk_dir, prefix=f"{file_name}.", suffix=".tmp"
+            )
+            os.close(fd)
+            p3.encode_opus_to_file(opus_datas, temp_file)
+            os.replace(temp_file, path)
+            temp_file = None
+            size = os.path.getsize(path)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"写入TTS磁盘缓存失败: {file_name}, {e}")
+            if temp_file is not None and os.path.exists(temp_file):
+                os.remove(temp_file)
+            with self.lock:
+                self.writing.discard(file_name)
+            return
+        evicted = []
+        with self.lock:
+            self.writing.discard(file_name)
+            # 已有同名文件时替换原来的大小，不重复计入
+            self.disk_bytes -= self.disk.pop(file_name, 0)
+            self.disk[file_name] = size
+            self.disk_bytes += size
+            while self.disk_bytes > self.max_disk_bytes and len(self.disk) > 1:
+                name, old_size = self.disk.popitem(last=False)
+                self.disk_bytes -= old_size
+                evicted.append(name)
+        for name in evicted:
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+            except OSError:
+                pass
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+            "disk_entries": len(self.disk),
+            "disk_bytes": self.disk_bytes,
+        }
+
+    async def report(self, report_seconds):
+        """定期在日志中输出命中率和节省的音频字节数"""
+        while True:
+            await asyncio.sleep(report_seconds)
+            stats = self.stats()
+            logger.bind(tag=TAG).info(
+                f"TTS缓存: 命中率={stats['hit_rate']:.1%}, 内存命中={stats['memory_hits']}, "
+                f"磁盘命中={stats['disk_hits']}, 未命中={stats['misses']}, "
+                f"节省音频={stats['bytes_saved'] // 1024}KB, "
+                f"内存={stats['memory_entries']}条/{stats['memory_bytes'] // 1024}KB, "
+                f"磁盘={stats['disk_entries']}条/{stats['disk_bytes'] // 1024}KB"
+            )
+
+
+# 进程内唯一的TTS短句缓存
+tts_cache = TTSPhraseCache()
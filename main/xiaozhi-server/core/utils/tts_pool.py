@@ -0,0 +1,126 @@
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from config.logger import setup_logging
+from core.utils import tts
+
+TAG = __name__
+logger = setup_logging()
+
+
+def config_fingerprint(*parts):
+    """配置内容的摘要，配置项(含嵌套)完全相同时才相等，与键的顺序无关"""
+    data = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+class _PooledTTS:
+    def __init__(self, fingerprint, name, instance):
+        self.fingerprint = fingerprint
+        self.name = name
+        self.instance = instance
+        self.refs = 0
+        self.last_used = time.monotonic()
+
+
+class TTSInstancePool:
+    """
+    进程内共享的TTS实例：配置完全相同的设备共用一个已初始化的实例
+    - 新设备连接时不再重复创建实例(如阿里云每次创建都要请求一次Token)
+    - 后台定期调用实例的keep_warm刷新Token，保持实例可直接使用
+    - 没有连接使用且超过idle_seconds未被获取的实例会被释放
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.idle_seconds = 600
+        self.instances = {}  # fingerprint -> _PooledTTS
+        self.by_id = {}  # id(instance) -> _PooledTTS
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, config: dict):
+        self.idle_seconds = int(config.get("idle_seconds", self.idle_seconds))
+
+    @staticmethod
+    def fingerprint(tts_type, config, delete_audio_file):
+        return config_fingerprint(tts_type, config, delete_audio_file)
+
+    def acquire(self, name, tts_type, config, delete_audio_file):
+        """获取配置对应的TTS实例，不存在时创建；用完后调用release"""
+        fingerprint = self.fingerprint(tts_type, config, delete_audio_file)
+        with self.lock:
+            entry = self.instances.get(fingerprint)
+            if entry is not None:
+                entry.refs += 1
+                entry.last_used = time.monotonic()
+                self.hits += 1
+                return entry.instance
+
+        # 创建实例可能需要网络请求，不在锁内进行
+        instance = tts.create_instance(tts_type, config, delete_audio_file)
+        with self.lock:
+            entry = self.instances.get(fingerprint)
+            if entry is None:
+                entry = _PooledTTS(fingerprint, name, instance)
+                self.instances[fingerprint] = entry
+                self.by_id[id(instance)] = entry
+                self.misses += 1
+                logger.bind(tag=TAG).info(
+                    f"创建TTS实例: {name}，当前共{len(self.instances)}个"
+                )
+            else:
+                # 其他连接同时创建了相同配置的实例
+                self.hits += 1
+            entry.refs += 1
+            entry.last_used = time.monotonic()
+            return entry.instance
+
+    def release(self, instance):
+        with self.lock:
+            entry = self.by_id.get(id(instance))
+            if entry is not None and entry.instance is instance:
+                entry.refs = max(0, entry.refs - 1)
+                entry.last_used = time.monotonic()
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self.lock:
+            for fingerprint, entry in list(self.instances.items()):
+                if entry.refs == 0 and now - entry.last_used > self.idle_seconds:
+                    del self.instances[fingerprint]
+                    del self.by_id[id(entry.instance)]
+                    logger.bind(tag=TAG).info(
+                        f"释放空闲的TTS实例: {entry.name}，当前共{len(self.instances)}个"
+                    )
+
+    def keep_warm(self):
+        with self.lock:
+            entries = list(self.instances.values())
+        for entry in entries:
+            try:
+                entry.instance.keep_warm()
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"TTS实例保活失败: {entry.name}, {e}")
+
+    def stats(self):
+        with self.lock:
+            return {
+                "instances": len(self.instances),
+                "in_use": sum(1 for entry in self.instances.values() if entry.refs),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    async def maintain(self, interval_seconds):
+        """定期刷新实例的Token并释放空闲实例"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await asyncio.to_thread(self.keep_warm)
+            self.evict_idle()
+
+
+# 进程内唯一的TTS实例池
+tts_pool = TTSInstancePool()
@@ -0,0 +1,304 @@
+import time
+import heapq
+import itertools
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class _Lane:
+    """同一配置TTS的任务队列：限制并发数和每秒请求数，记录最近的合成耗时"""
+
+    def __init__(self, name, max_concurrency, rate_limit):
+        self.name = name
+        # 0表示不限制，实际并发受合成线程数限制
+        self.max_concurrency = max(0, max_concurrency)
+        self.rate_limit = rate_limit
+        self.pending = deque()
+        self.in_flight = 0
+        self.next_start = 0.0
+        self.wakeup_scheduled = False
+        self.latencies = deque(maxlen=200)
+        self.completed = 0
+        self.failed = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def percentile(self, percent):
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percent))]
+
+    def has_capacity(self):
+        return self.max_concurrency == 0 or self.in_flight < self.max_concurrency
+
+
+class _Task:
+    def __init__(self, lane, fn, args, hedge):
+        self.lane = lane
+        self.fn = fn
+        self.args = args
+        self.hedge = hedge
+        self.future = Future()
+        self.attempts = 0
+        self.running = 0
+        self.hedge_fired = False
+        self.resolved = False
+        self.last_error = None
+
+    @property
+    def done(self):
+        """已有结果或已被取消，不需要再发起请求"""
+        return self.resolved or self.future.cancelled()
+
+
+class TTSScheduler:
+    """
+    所有连接共享的TTS合成调度
+    - 每个TTS配置一个队列(不同账号、配额分开限制)，按max_concurrency限制并发、rate_limit限制每秒请求数(云服务的QPS配额)
+    - 任务返回Future，连接按句子顺序等待Future，保证播放顺序；打断或超时时用cancel取消
+    - hedge为True的任务耗时超过该TTS最近的p95时，再发一次相同的请求，先成功的结果生效
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.worker_threads = 32
+        self.max_concurrency = 0
+        self.rate_limit = 0
+        self.hedge_enabled = True
+        self.hedge_min_samples = 20
+        self.hedge_min_ms = 300
+        self.lanes = {}
+        self.timers = []
+        self.timer_sequence = itertools.count()
+        self.timer_condition = threading.Condition()
+        self.timer_thread = None
+
+    def configure(self, config: dict):
+        self.worker_threads = int(config.get("worker_threads", self.worker_threads))
+        self.max_concurrency = int(config.get("max_concurrency", self.max_concurrency))
+        self.rate_limit = float(config.get("rate_limit", self.rate_limit))
+        hedge_config = config.get("hedge", {})
+        self.hedge_enabled = str(hedge_config.get("enabled", self.hedge_enabled)).lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+        self.hedge_min_samples = int(
+            hedge_config.get("min_samples", self.hedge_min_samples)
+        )
+        self.hedge_min_ms = int(hedge_config.get("min_ms", self.hedge_min_ms))
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.worker_threads, thread_name_prefix="tts-worker"
+            )
+        return self.executor
+
+    def _get_lane(self, tts):
+        name = type(tts).__module__.rsplit(".", 1)[-1]
+        fingerprint = getattr(tts, "config_fingerprint", None)
+        key = fingerprint or name
+        lane = self.lanes.get(key)
+        if lane is None:
+            if fingerprint:
+                # 同一类型的TTS可能配置了不同的账号，名称带上配置摘要以便区分
+                name = f"{name}#{fingerprint[:6]}"
+            max_concurrency = getattr(tts, "max_concurrency", None)
+            rate_limit = getattr(tts, "rate_limit", None)
+            lane = _Lane(
+                name,
+                max_concurrency if max_concurrency else self.max_concurrency,
+                rate_limit if rate_limit is not None else self.rate_limit,
+            )
+            self.lanes[key] = lane
+        return lane
+
+    def submit(self, tts, fn, *args, hedge=False):
+        """
+        在tts对应的队列中执行fn(*args)，返回Future
+        返回None或抛出异常视为失败；hedge的任务由先成功的一次请求给出结果
+        """
+        with self.lock:
+            lane = self._get_lane(tts)
+            task = _Task(lane, fn, args, hedge and self.hedge_enabled)
+            lane.pending.append(task)
+            self._dispatch(lane)
+        return task.future
+
+    def cancel(self, future):
+        """取消submit返回的任务：排队中的不再发起请求，进行中的请求结果被丢弃"""
+        return future.cancel()
+
+    def _dispatch(self, lane):
+        """在持有锁时调用，按并发数和请求速率启动排队中的任务"""
+        while lane.pending and lane.has_capacity():
+            if lane.pending[0].done:
+                # 已取消或已有结果的任务直接丢弃，不占用请求速率
+                lane.pending.popleft()
+                continue
+            now = time.monotonic()
+            if lane.rate_limit > 0:
+                if now < lane.next_start:
+                    if not lane.wakeup_scheduled:
+                        lane.wakeup_scheduled = True
+                        self._schedule(lane.next_start - now, self._wakeup, lane)
+                    return
+                lane.next_start = max(now, lane.next_start) + 1 / lane.rate_limit
+            task = lane.pending.popleft()
+            lane.in_flight += 1
+            task.attempts += 1
+            task.running += 1
+            self._get_executor().submit(self._run, task, task.attempts)
+
+    def _wakeup(self, lane):
+        with self.lock:
+            lane.wakeup_scheduled = False
+            self._dispatch(lane)
+
+    def _run(self, task, attempt):
+        lane = task.lane
+        if task.done:
+            # 在线程池中排队期间被取消
+            with self.lock:
+                lane.in_flight -= 1
+                task.running -= 1
+                self._dispatch(lane)
+            return
+        if attempt == 1 and task.hedge:
+            hedge_after = self._hedge_delay(lane)
+            if hedge_after is not None:
+                self._schedule(hedge_after, self._fire_hedge, task)
+
+        start = time.monotonic()
+        result, error = None, None
+        try:
+            result = task.fn(*task.args)
+        except Exception as e:
+            error = e
+        elapsed = time.monotonic() - start
+
+        with self.lock:
+            lane.in_flight -= 1
+            task.running -= 1
+            success = error is None and result is not None
+            if task.done:
+                # 另一次请求已经给出结果，或任务已被取消
+                self._dispatch(lane)
+                return
+            if success:
+                # 只记录先完成的请求，被备份请求超过的慢请求不计入
+                lane.latencies.append(elapsed)
+                lane.completed += 1
+                if attempt > 1:
+                    lane.hedge_wins += 1
+                    logger.bind(tag=TAG).info(
+                        f"{lane.name} 备份请求先完成: 第{attempt}次请求，{elapsed * 1000:.0f}ms"
+                    )
+            elif task.running > 0 or task in lane.pending:
+                # 还有其他请求在进行，等待它的结果
+                task.last_error = error
+                self._dispatch(lane)
+                return
+            else:
+                lane.failed += 1
+                error = error or task.last_error
+            task.resolved = True
+            self._dispatch(lane)
+        try:
+            if error is not None and not success:
+                task.future.set_exception(error)
+            else:
+                task.future.set_result(result)
+        except InvalidStateError:
+            # 刚好在此期间被取消
+            pass
+
+    def _hedge_delay(self, lane):
+        with self.lock:
+            if len(lane.latencies) < self.hedge_min_samples:
+                return None
+            p95 = lane.percentile(0.95)
+        return max(p95, self.hedge_min_ms / 1000)
+
+    def _fire_hedge(self, task):
+        with self.lock:
+            if task.done or task.hedge_fired:
+                return
+            task.hedge_fired = True
+            task.lane.hedged += 1
+            # 备份请求排在队首，不受其他排队任务影响
+            task.lane.pending.appendleft(task)
+            self._dispatch(task.lane)
+
+    def _schedule(self, delay, callback, *args):
+        """delay秒后在定时线程中调用callback"""
+        with self.timer_condition:
+            deadline = time.monotonic() + delay
+            heapq.heappush(
+                self.timers, (deadline, next(self.timer_sequence), callback, args)
+            )
+            if self.timer_thread is None:
+                self.timer_thread = threading.Thread(
+                    target=self._timer_loop, name="tts-scheduler", daemon=True
+                )
+                self.timer_thread.start()
+            self.timer_condition.notify()
+
+    def _timer_loop(self):
+        while True:
+            with self.timer_condition:
+                while not self.timers or self.timers[0][0] > time.monotonic():
+                    timeout = (
+                        self.timers[0][0] - time.monotonic() if self.timers else None
+                    )
+                    self.timer_condition.wait(timeout)
+                _, _, callback, args = heapq.heappop(self.timers)
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"TTS调度定时任务出错: {e}")
+
+    def stats(self):
+        """每个TTS队列的排队数、进行中的请求数、耗时分位数和备份请求次数"""
+        with self.lock:
+            result = {}
+            for lane in self.lanes.values():
+                p50, p95 = lane.percentile(0.5), lane.percentile(0.95)
+                result[lane.name] = {
+                    "queued": sum(1 for task in lane.pending if not task.done),
+                    "in_flight": lane.in_flight,
+                    "max_concurrency": lane.max_concurrency,
+                    "completed": lane.completed,
+                    "failed": lane.failed,
+                    "hedged": lane.hedged,
+                    "hedge_wins": lane.hedge_wins,
+                    "p50_ms": round(p50 * 1000) if p50 is not None else None,
+                    "p95_ms": round(p95 * 1000) if p95 is not None else None,
+                }
+            return result
+
+    async def report(self, report_seconds):
+        """定期在日志中输出每个TTS队列的情况"""
+        while True:
+            await asyncio.sleep(report_seconds)
+            for name, stats in self.stats().items():
+                logger.bind(tag=TAG).info(
+                    f"TTS调度 {name}: 排队={stats['queued']}, "
+                    f"进行中={stats['in_flight']}/{stats['max_concurrency'] or '不限'}, "
+                    f"完成={stats['completed']}, 失败={stats['failed']}, "
+                    f"p50={stats['p50_ms']}ms, p95={stats['p95_ms']}ms, "
+                    f"备份请求={stats['hedged']}(先完成{stats['hedge_wins']})"
+                )
+
+
+# 进程内唯一的TTS调度器
+tts_scheduler = TTSScheduler()
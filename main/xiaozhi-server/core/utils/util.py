@@ -4,7 +4,8 @@ import subprocess
 import re
 import requests
 from typing import Dict, Any
-from core.utils import tts, llm, intent, memory, vad, asr
+from core.utils import llm, intent, memory, vad, asr
+from core.utils.tts_pool import tts_pool
 
 TAG = __name__
 
@@ -245,7 +246,9 @@ def initialize_modules(
             if "type" not in config["TTS"][select_tts_module]
             else config["TTS"][select_tts_module]["type"]
         )
-        modules["tts"] = tts.create_instance(
+        # 配置相同的设备共用实例池中已初始化的TTS实例
+        modules["tts"] = tts_pool.acquire(
+            select_tts_module,
             tts_type,
             config["TTS"][select_tts_module],
             str(config.get("delete_audio", True)).lower() in ("true", "1", "yes"),
@@ -1,7 +1,14 @@
 import asyncio
 import websockets
+from concurrent.futures import ThreadPoolExecutor
 from config.logger import setup_logging
 from core.connection import ConnectionHandler
+from core.utils.loop_monitor import LoopLagMonitor
+from core.utils.http_client_pool import http_client_pool
+from core.utils.tts_cache import tts_cache
+from core.utils.tts_scheduler import tts_scheduler
+from core.utils.tts_pool import tts_pool
+from core.utils.audio_assets import audio_assets
 from core.utils.util import get_local_ip, initialize_modules
 
 TAG = __name__
@@ -11,6 +18,18 @@ class WebSocketServer:
     def __init__(self, config: dict):
         self.config = config
         self.logger = setup_logging()
+        # 旧版本的配置名为llm_client_pool
+        self.http_client_pool_config = self.config.get(
+            "http_client_pool", self.config.get("llm_client_pool", {})
+        )
+        http_client_pool.configure(self.http_client_pool_config)
+        tts_cache.configure(self.config.get("tts_cache", {}))
+        tts_scheduler.configure(self.config.get("tts_scheduler", {}))
+        tts_pool.configure(self.config.get("tts_pool", {}))
+        # 固定提示音启动时编码为Opus帧，播放时不再解码
+        audio_assets_config = self.config.get("audio_assets", {})
+        audio_assets.configure(audio_assets_config)
+        audio_assets.preload(audio_assets_config.get("dir", "config/assets"))
         modules = initialize_modules(
             self.logger, self.config, True, True, True, True, True, True
         )
@@ -22,6 +41,23 @@ class WebSocketServer:
         self._memory = modules["memory"]
         self.active_connections = set()
 
+        # 音频接入线程池：Opus解码与VAD不在事件循环中执行
+        audio_ingest_config = self.config.get("audio_ingest", {})
+        worker_threads = int(audio_ingest_config.get("worker_threads", 4))
+        self._audio_executor = (
+            ThreadPoolExecutor(
+                max_workers=worker_threads, thread_name_prefix="audio-ingest"
+            )
+            if worker_threads > 0
+            else None
+        )
+        # 阻塞任务线程池：所有连接共享，线程数不随连接数增长
+        task_executor_config = self.config.get("task_executor", {})
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(task_executor_config.get("worker_threads", 32)),
+            thread_name_prefix="conn-task",
+        )
+
     async def start(self):
         server_config = self.config["server"]
         host = server_config.get("ip", "0.0.0.0")
@@ -39,6 +75,30 @@ class WebSocketServer:
         self.logger.bind(tag=TAG).info(
             "=============================================================\n"
         )
+        loop_lag_config = self.config.get("loop_lag_monitor", {})
+        if loop_lag_config.get("enabled", False):
+            monitor = LoopLagMonitor(
+                int(loop_lag_config.get("interval_ms", 100)),
+                int(loop_lag_config.get("report_seconds", 60)),
+            )
+            asyncio.create_task(monitor.run())
+        report_seconds = int(self.http_client_pool_config.get("report_seconds", 0))
+        if report_seconds > 0:
+            asyncio.create_task(http_client_pool.report(report_seconds))
+        report_seconds = int(self.config.get("tts_cache", {}).get("report_seconds", 0))
+        if report_seconds > 0:
+            asyncio.create_task(tts_cache.report(report_seconds))
+        report_seconds = int(
+            self.config.get("tts_scheduler", {}).get("report_seconds", 0)
+        )
+        if report_seconds > 0:
+            asyncio.create_task(tts_scheduler.report(report_seconds))
+        asyncio.create_task(
+            tts_pool.maintain(
+                int(self.config.get("tts_pool", {}).get("maintain_seconds", 60))
+            )
+        )
+
         async with websockets.serve(self._handle_connection, host, port):
             await asyncio.Future()
 
@@ -53,6 +113,8 @@ class WebSocketServer:
             self._tts,
             self._memory,
             self._intent,
+            self._audio_executor,
+            self._executor,
         )
         self.active_connections.add(handler)
         try:
@@ -0,0 +1,162 @@
+import os
+import time
+import asyncio
+import statistics
+import opuslib_next
+from pydub import AudioSegment
+from tabulate import tabulate
+from config.settings import load_config
+from core.utils.asr import create_instance as create_asr_instance
+import logging
+
+# 设置全局日志级别为WARNING，抑制INFO级别日志
+logging.basicConfig(level=logging.WARNING)
+
+SAMPLE_DIR = "models/SenseVoiceSmall/example"
+REPEAT = 10
+# 压测：模拟并发设备数与持续时间(秒)
+LOAD_CONCURRENCY = [1, 8, 32]
+LOAD_SECONDS = 20
+
+
+def load_opus_packets(file_path):
+    """把示例音频编码为设备上行的60ms Opus数据包"""
+    audio = AudioSegment.from_file(file_path, parameters=["-nostdin"])
+    audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
+    raw_data = audio.raw_data
+    encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
+    frame_bytes = 960 * 2
+    packets = []
+    for i in range(0, len(raw_data), frame_bytes):
+        chunk = raw_data[i : i + frame_bytes]
+        if len(chunk) < frame_bytes:
+            chunk += b"\x00" * (frame_bytes - len(chunk))
+        packets.append(encoder.encode(chunk, 960))
+    return packets, len(audio) / 1000.0
+
+
+def recognize_from_file(asr, file_path):
+    """旧流程：从WAV文件读取后识别"""
+    if hasattr(asr, "read_wave"):
+        s = asr.model.create_stream()
+        samples, sample_rate = asr.read_wave(file_path)
+        s.accept_waveform(sample_rate, samples)
+        asr.model.decode_stream(s)
+        return s.result.text
+    result = asr.model.generate(
+        input=file_path, cache={}, language="auto", use_itn=True, batch_size_s=60
+    )
+    return result[0]["text"]
+
+
+class ASRPerformanceTester:
+    def __init__(self):
+        self.config = load_config()
+        asr_name = self.config["selected_module"]["ASR"]
+        self.asr_name = asr_name
+        self.asr_config = self.config["ASR"][asr_name]
+        self.asr_type = self.asr_config.get("type", asr_name)
+
+    async def _test_file_vs_memory(self, asr, packets):
+        file_times, memory_times = [], []
+        for i in range(REPEAT):
+            start = time.perf_counter()
+            file_path = asr.save_audio_to_file(packets, f"perf_{i}")
+            recognize_from_file(asr, file_path)
+            os.remove(file_path)
+            file_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asr.speech_to_text(packets, f"perf_{i}")
+            memory_times.append(time.perf_counter() - start)
+        return statistics.mean(file_times), statistics.mean(memory_times)
+
+    async def _load_test(self, asr, utterances, concurrency):
+        """多个模拟设备持续不断地提交整句识别，统计持续吞吐"""
+        deadline = time.perf_counter() + LOAD_SECONDS
+        completed = 0
+
+        async def device(index):
+            nonlocal completed
+            i = index
+            while time.perf_counter() < deadline:
+                await asr.speech_to_text(utterances[i % len(utterances)], f"load_{index}")
+                completed += 1
+                i += 1
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        await asyncio.gather(*(device(i) for i in range(concurrency)))
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.process_time() - cpu_start
+        cores = os.cpu_count() or 1
+        throughput = completed / wall_time
+        return {
+            "throughput": throughput,
+            "per_core": throughput / cores,
+            "cpu_usage": cpu_time / wall_time / cores * 100,
+        }
+
+    async def run(self):
+        if self.asr_type not in ("fun_local", "sherpa_onnx_local"):
+            print(f"⏭️  ASR {self.asr_name} 不是本地模型，已跳过")
+            return
+        asr = create_asr_instance(self.asr_type, self.asr_config, True)
+        print(f"🎧 测试 ASR: {self.asr_name}")
+
+        results = []
+        for file_name in sorted(os.listdir(SAMPLE_DIR)):
+            packets, duration = load_opus_packets(os.path.join(SAMPLE_DIR, file_name))
+            # 预热一次，排除模型首次加载的耗时
+            await asr.speech_to_text(packets, "warmup")
+            file_time, memory_time = await self._test_file_vs_memory(asr, packets)
+            results.append(
+                [
+                    file_name,
+                    f"{duration:.2f}",
+                    f"{file_time * 1000:.1f}",
+                    f"{memory_time * 1000:.1f}",
+                    f"{(file_time - memory_time) * 1000:.1f}",
+                ]
+            )
+
+        print(
+            tabulate(
+                results,
+                headers=[
+                    "音频",
+                    "时长(秒)",
+                    "WAV文件流程(ms)",
+                    "内存流程(ms)",
+                    "节省(ms)",
+                ],
+                tablefmt="github",
+            )
+        )
+
+        utterances = [
+            load_opus_packets(os.path.join(SAMPLE_DIR, file_name))[0]
+            for file_name in sorted(os.listdir(SAMPLE_DIR))
+        ]
+        load_results = []
+        for concurrency in LOAD_CONCURRENCY:
+            print(f"🔥 压测: {concurrency} 路并发, 持续{LOAD_SECONDS}秒")
+            result = await self._load_test(asr, utterances, concurrency)
+            load_results.append(
+                [
+                    concurrency,
+                    f"{result['throughput']:.2f}",
+                    f"{result['per_core']:.3f}",
+                    f"{result['cpu_usage']:.1f}%",
+                ]
+            )
+        print(
+            tabulate(
+                load_results,
+                headers=["并发设备数", "句/秒", "句/秒/核", "CPU利用率"],
+                tablefmt="github",
+            )
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(ASRPerformanceTester().run())
@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import statistics
+import numpy as np
+import opuslib_next
+from tabulate import tabulate
+from core.utils.asr import create_instance as create_asr_instance
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "test"))
+from fake_doubao_asr_server import FakeDoubaoASRServer
+from fake_sense_voice import FRAME_SAMPLES, create_fake_provider
+
+# 设置全局日志级别为WARNING，抑制INFO级别日志
+logging.basicConfig(level=logging.WARNING)
+
+SPEECH_SECONDS = 3
+ROUNDS = 3
+FRAME_SECONDS = 0.06
+# 本地流式识别的分窗时长，以及超过窗口时长的测试语音
+WINDOW_SECONDS = 30
+LONG_SPEECH_SECONDS = [10, 45, 120]
+
+
+def make_opus_packets(seconds):
+    """生成设备上行的60ms Opus数据包"""
+    samples = np.arange(int(seconds * 16000))
+    pcm = (np.sin(2 * np.pi * 220 * samples / 16000) * 8000).astype(np.int16).tobytes()
+    encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
+    frame_bytes = 960 * 2
+    packets = []
+    for i in range(0, len(pcm), frame_bytes):
+        chunk = pcm[i : i + frame_bytes]
+        if len(chunk) < frame_bytes:
+            chunk += b"\x00" * (frame_bytes - len(chunk))
+        packets.append(encoder.encode(chunk, 960))
+    return packets
+
+
+async def measure_full(asr, packets):
+    """一次性识别：说完后才把整段音频发给服务端"""
+    for _ in packets:
+        await asyncio.sleep(FRAME_SECONDS)
+    start = time.perf_counter()
+    text, _ = await asr.speech_to_text(packets, "test")
+    return (time.perf_counter() - start) * 1000, text, 0
+
+
+async def measure_stream(asr, packets):
+    """流式识别：说话过程中按设备上行节奏送入音频，说完只需等最后一包的结果"""
+    stream = asr.start_stream("test")
+    partials = 0
+    for packet in packets:
+        if await stream.feed_opus_async(packet):
+            partials += 1
+        await asyncio.sleep(FRAME_SECONDS)
+    start = time.perf_counter()
+    text = await stream.finish_async()
+    return (time.perf_counter() - start) * 1000, text, partials
+
+
+class ASRStreamPerformanceTester:
+    """
+    对比豆包ASR一次性识别与流式识别从说完到拿到结果的耗时
+    使用test/fake_doubao_asr_server.py模拟的服务，音频按60ms一包实时送入
+    """
+
+    async def run(self):
+        server = await FakeDoubaoASRServer(expected_seconds=SPEECH_SECONDS).start()
+        packets = make_opus_packets(SPEECH_SECONDS)
+        results = []
+        try:
+            for streaming in (False, True):
+                asr = create_asr_instance(
+                    "doubao",
+                    {
+                        "appid": "test",
+                        "cluster": "test",
+                        "access_token": "test",
+                        "output_dir": "tmp/",
+                        "ws_url": server.ws_url,
+                        "streaming": streaming,
+                    },
+                    True,
+                )
+                measure = measure_stream if streaming else measure_full
+                latencies, text, partials = [], None, 0
+                for _ in range(ROUNDS):
+                    latency, text, partials = await measure(asr, packets)
+                    latencies.append(latency)
+                await asr.ws_pool.close()
+                results.append(
+                    [
+                        "流式" if streaming else "一次性",
+                        f"{statistics.mean(latencies):.0f}",
+                        f"{max(latencies):.0f}",
+                        partials,
+                        text,
+                    ]
+                )
+        finally:
+            await server.stop()
+
+        print(
+            tabulate(
+                results,
+                headers=["识别方式", "说完到出结果(ms)", "最慢(ms)", "中间结果数", "识别文本"],
+                tablefmt="github",
+            )
+        )
+
+
+class SherpaLongStreamTester:
+    """
+    本地流式识别(SherpaASRStream)送入超过max_stream_seconds的语音：
+    最终结果必须包含全部音频，解码的音频总量应随语音时长线性增长
+    使用test/fake_sense_voice.py模拟的识别器，每60ms音频识别为一个字
+    """
+
+    async def run(self):
+        from core.providers.asr.sherpa_onnx_local import SherpaASRStream
+
+        results = []
+        complete = True
+        for seconds in LONG_SPEECH_SECONDS:
+            provider = create_fake_provider(WINDOW_SECONDS)
+            packets = make_opus_packets(seconds)
+            stream = SherpaASRStream(provider)
+            for packet in packets:
+                await stream.feed_opus_async(packet)
+            text = await stream.finish_async()
+            recognizer = provider.recognizer
+            complete = complete and len(text) == len(packets)
+            results.append(
+                [
+                    seconds,
+                    len(packets),
+                    len(text),
+                    "是" if len(text) == len(packets) else "否",
+                    recognizer.calls,
+                    f"{recognizer.decoded_samples / FRAME_SAMPLES / len(packets):.1f}",
+                ]
+            )
+
+        print(
+            tabulate(
+                results,
+                headers=["语音(秒)", "帧数", "识别字数", "结果完整", "解码次数", "解码量/语音时长"],
+                tablefmt="github",
+            )
+        )
+        return complete
+
+
+async def main():
+    await ASRStreamPerformanceTester().run()
+    print()
+    # 长语音末尾丢失时以非0状态退出
+    return await SherpaLongStreamTester().run()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
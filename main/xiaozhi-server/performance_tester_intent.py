@@ -0,0 +1,107 @@
+import sys
+import time
+import statistics
+from collections import Counter
+from tabulate import tabulate
+from plugins_func.loadplugins import auto_import_modules
+from core.providers.intent.base import IntentProviderBase
+from core.providers.intent.local_classifier import LocalIntentClassifier
+
+# 标注样本：每行“用户说的话<TAB>期望意图”，#开头为注释
+SAMPLE_FILE = "test/intent_samples.tsv"
+REPEAT = 100
+
+
+class _IntentOptions(IntentProviderBase):
+    async def detect_intent(self, conn, dialogue_history, text):
+        return None
+
+
+def load_samples(file_path):
+    samples = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            text, label = line.split("\t")
+            samples.append((text, label))
+    return samples
+
+
+class IntentPerformanceTester:
+    def __init__(self, sample_file, threshold=0.7):
+        auto_import_modules("plugins_func.functions")
+        intent_options = _IntentOptions({}).intent_options
+        self.classifier = LocalIntentClassifier.from_registry(intent_options, threshold)
+        self.samples = load_samples(sample_file)
+
+    def run(self):
+        latencies = []
+        per_intent = {}
+        mistakes = []
+        for text, label in self.samples:
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                result = self.classifier.classify(text)
+            latencies.append((time.perf_counter() - start) * 1e6 / REPEAT)
+
+            counts = per_intent.setdefault(label, Counter())
+            counts["total"] += 1
+            if result is None:
+                # 置信度不足，交给大模型
+                counts["fallback"] += 1
+            elif result[0] == label:
+                counts["correct"] += 1
+            else:
+                mistakes.append([text, label, result[0], f"{result[2]:.2f}"])
+
+        rows = []
+        for label, counts in sorted(per_intent.items()):
+            resolved = counts["total"] - counts["fallback"]
+            rows.append(
+                [
+                    label,
+                    counts["total"],
+                    f"{resolved / counts['total']:.0%}",
+                    f"{counts['correct'] / resolved:.0%}" if resolved else "-",
+                ]
+            )
+        total = len(self.samples)
+        fallback = sum(c["fallback"] for c in per_intent.values())
+        correct = sum(c["correct"] for c in per_intent.values())
+        resolved = total - fallback
+        rows.append(
+            [
+                "合计",
+                total,
+                f"{resolved / total:.0%}",
+                f"{correct / resolved:.0%}" if resolved else "-",
+            ]
+        )
+        print(
+            tabulate(
+                rows,
+                headers=["意图", "样本数", "本地识别比例", "本地识别准确率"],
+                tablefmt="github",
+            )
+        )
+        print(
+            f"\n平均耗时: {statistics.mean(latencies):.1f}μs, "
+            f"最大耗时: {max(latencies):.1f}μs, 其余{fallback}条交给大模型识别"
+        )
+        if mistakes:
+            print("\n识别错误：")
+            print(
+                tabulate(
+                    mistakes,
+                    headers=["文本", "期望意图", "本地识别", "置信度"],
+                    tablefmt="github",
+                )
+            )
+        return not mistakes
+
+
+if __name__ == "__main__":
+    # 本地识别错误会跳过大模型直接执行，有错误时以非0状态退出
+    sys.exit(0 if IntentPerformanceTester(SAMPLE_FILE).run() else 1)
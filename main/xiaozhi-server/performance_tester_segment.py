@@ -0,0 +1,108 @@
+import time
+import random
+from tabulate import tabulate
+from core.utils.sentence_segmenter import SentenceSegmenter
+
+# 模拟的大模型输出长度(字符数)
+TEXT_LENGTHS = [1000, 10000, 50000]
+PUNCTUATIONS = "。？！；："
+CHARACTERS = "我们今天天气不错去公园散步然后吃饭这个问题很有意思需要仔细想一想"
+
+
+def make_tokens(length, seed=0):
+    """生成类似大模型流式输出的token：每个token 1~3个字符，句子长度随机，偶尔很长"""
+    rng = random.Random(seed)
+    text = []
+    while len(text) < length:
+        sentence_length = rng.choice([8, 15, 30, 60, 300])
+        text.extend(rng.choice(CHARACTERS) for _ in range(sentence_length))
+        text.append(rng.choice(PUNCTUATIONS))
+    text = "".join(text[:length])
+    tokens = []
+    i = 0
+    while i < len(text):
+        step = rng.randint(1, 3)
+        tokens.append(text[i : i + step])
+        i += step
+    return tokens
+
+
+def legacy_segment(tokens):
+    """原先的分句方式：每个token都重新拼接全文并逐个标点rfind"""
+    response_message = []
+    processed_chars = 0
+    segments = []
+    for content in tokens:
+        response_message.append(content)
+        full_text = "".join(response_message)
+        current_text = full_text[processed_chars:]
+        last_punct_pos = -1
+        for punct in PUNCTUATIONS:
+            pos = current_text.rfind(punct)
+            if pos > last_punct_pos:
+                last_punct_pos = pos
+        if last_punct_pos != -1:
+            segment_text_raw = current_text[: last_punct_pos + 1]
+            segments.append(segment_text_raw)
+            processed_chars += len(segment_text_raw)
+    remaining_text = "".join(response_message)[processed_chars:]
+    if remaining_text:
+        segments.append(remaining_text)
+    return segments
+
+
+def segmenter_segment(tokens):
+    segmenter = SentenceSegmenter(terminators=PUNCTUATIONS)
+    segments = []
+    for content in tokens:
+        segments.extend(segmenter.feed(content))
+    remaining_text = segmenter.flush()
+    if remaining_text:
+        segments.append(remaining_text)
+    return segments
+
+
+def measure(func, tokens):
+    start = time.perf_counter()
+    result = func(tokens)
+    return result, (time.perf_counter() - start) * 1000
+
+
+class SegmentPerformanceTester:
+    def run(self):
+        results = []
+        for length in TEXT_LENGTHS:
+            tokens = make_tokens(length)
+            legacy_result, legacy_ms = measure(legacy_segment, tokens)
+            new_result, new_ms = measure(segmenter_segment, tokens)
+            results.append(
+                [
+                    length,
+                    len(tokens),
+                    f"{legacy_ms:.2f}",
+                    f"{new_ms:.2f}",
+                    f"{legacy_ms * 1000 / len(tokens):.2f}",
+                    f"{new_ms * 1000 / len(tokens):.2f}",
+                    "✅" if legacy_result == new_result else "❌",
+                ]
+            )
+
+        print(
+            tabulate(
+                results,
+                headers=[
+                    "文本长度",
+                    "token数",
+                    "原分句耗时(ms)",
+                    "SentenceSegmenter耗时(ms)",
+                    "原每token(μs)",
+                    "新每token(μs)",
+                    "结果一致",
+                ],
+                tablefmt="github",
+            )
+        )
+
+
+if __name__ == "__main__":
+    SegmentPerformanceTester().run()
@@ -0,0 +1,150 @@
+import io
+import os
+import time
+import wave
+import shutil
+import asyncio
+import resource
+import tempfile
+import numpy as np
+import opuslib_next
+from tabulate import tabulate
+from pydub import AudioSegment
+from core.providers.tts.base import TTSProviderBase
+from core.utils.audio_codec import FRAME_BYTES
+
+# 测试句子，模拟的TTS按每个字0.2秒生成音频
+TEST_SENTENCES = [
+    "你好",
+    "今天天气不错",
+    "我们去公园散步吧，顺便买点水果",
+    "量子计算利用量子叠加和纠缠来处理信息，在某些问题上比传统计算机快得多",
+]
+ROUNDS = 20
+# 常见TTS服务返回的采样率
+SAMPLE_RATE = 24000
+
+
+def make_wav(seconds):
+    samples = np.arange(int(SAMPLE_RATE * seconds))
+    pcm = (np.sin(2 * np.pi * 440 * samples / SAMPLE_RATE) * 8000).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+class FakeTTSProvider(TTSProviderBase):
+    """不请求网络，直接返回预先生成的音频，只测量服务端本地的开销"""
+
+    def __init__(self, audio_format, output_dir):
+        super().__init__({"output_dir": output_dir}, delete_audio_file=True)
+        self.format = audio_format
+        self.audios = {}
+        for text in TEST_SENTENCES:
+            audio = make_wav(len(text) * 0.2)
+            if audio_format != "wav":
+                segment = AudioSegment.from_file(io.BytesIO(audio), format="wav")
+                buffer = io.BytesIO()
+                segment.export(buffer, format=audio_format)
+                audio = buffer.getvalue()
+            self.audios[text] = audio
+
+    def generate_filename(self):
+        return os.path.join(self.output_file, f"tts-{time.time_ns()}.{self.format}")
+
+    async def text_to_audio(self, text):
+        return self.audios[text]
+
+
+def legacy_flow(tts, text):
+    """原先的流程：asyncio.run合成并写入文件，pydub(ffmpeg)解码重采样，每句新建Opus编码器，最后删除文件"""
+    tts_file = tts.generate_filename()
+    asyncio.run(tts.text_to_speak(text, tts_file))
+    audio = AudioSegment.from_file(tts_file, format=tts.format, parameters=["-nostdin"])
+    raw_data = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2).raw_data
+    encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
+    opus_datas = []
+    for i in range(0, len(raw_data), FRAME_BYTES):
+        chunk = raw_data[i : i + FRAME_BYTES]
+        if len(chunk) < FRAME_BYTES:
+            chunk += b"\x00" * (FRAME_BYTES - len(chunk))
+        opus_datas.append(encoder.encode(chunk, FRAME_BYTES // 2))
+    os.remove(tts_file)
+    return opus_datas
+
+
+def memory_flow(tts, text):
+    """内存流程：音频数据不落盘，进程内解码重采样后编码"""
+    audio = tts.to_tts_audio(text)
+    opus_datas, _ = tts.audio_bytes_to_opus_data(audio)
+    return opus_datas
+
+
+def cpu_seconds():
+    """本进程及子进程(ffmpeg)消耗的CPU时间"""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def measure(func, tts, rounds):
+    latencies = []
+    cpu_start = cpu_seconds()
+    for _ in range(rounds):
+        for text in TEST_SENTENCES:
+            start = time.perf_counter()
+            func(tts, text)
+            latencies.append((time.perf_counter() - start) * 1000)
+    cpu_ms = (cpu_seconds() - cpu_start) * 1000 / len(latencies)
+    latencies.sort()
+    return (
+        sum(latencies) / len(latencies),
+        latencies[int(len(latencies) * 0.95) - 1],
+        cpu_ms,
+    )
+
+
+class TTSAudioPerformanceTester:
+    def run(self, rounds=ROUNDS):
+        # wav原先由pydub在进程内解析，mp3原先每句启动一个ffmpeg进程
+        formats = ["wav"]
+        if shutil.which("ffmpeg"):
+            formats.append("mp3")
+        else:
+            print("⏭️  未安装ffmpeg，跳过mp3测试")
+
+        results = []
+        with tempfile.TemporaryDirectory() as output_dir:
+            for audio_format in formats:
+                tts = FakeTTSProvider(audio_format, output_dir)
+                for name, func in (("文件+ffmpeg", legacy_flow), ("内存+进程内解码", memory_flow)):
+                    # 预热
+                    func(tts, TEST_SENTENCES[0])
+                    avg_ms, p95_ms, cpu_ms = measure(func, tts, rounds)
+                    results.append(
+                        [
+                            audio_format,
+                            name,
+                            f"{avg_ms:.2f}",
+                            f"{p95_ms:.2f}",
+                            f"{cpu_ms:.2f}",
+                        ]
+                    )
+
+        print(
+            tabulate(
+                results,
+                headers=["格式", "流程", "平均延迟(ms)", "P95延迟(ms)", "每句CPU(ms)"],
+                tablefmt="github",
+            )
+        )
+
+
+if __name__ == "__main__":
+    TTSAudioPerformanceTester().run()
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+from tabulate import tabulate
+from core.utils.tts import create_instance as create_tts_instance
+from core.utils.tts_cache import TTSPhraseCache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "test"))
+from fake_tts_server import FakeTTSServer
+
+# 设置全局日志级别为WARNING，抑制INFO级别日志
+logging.basicConfig(level=logging.WARNING)
+
+# 模拟多轮对话中的回复片段，常用短句会反复出现
+TEST_SENTENCES = [
+    "好的",
+    "好的，马上为您处理",
+    "今天北京晴，气温二十度",
+    "好的",
+    "没问题",
+    "再见，有需要随时叫我",
+    "好的，马上为您处理",
+    "没问题",
+    "我们去公园散步吧，顺便买点水果",
+    "好的",
+    "再见，有需要随时叫我",
+    "没问题",
+]
+
+
+def synthesize(tts, cache, text):
+    """与ConnectionHandler.speak_and_play相同的流程：先查缓存，未命中时合成、编码并写入缓存"""
+    opus_datas = cache.get(tts, text) if cache is not None else None
+    if opus_datas is None:
+        audio = tts.to_tts_audio(text)
+        opus_datas, _ = tts.audio_bytes_to_opus_data(audio)
+        if cache is not None:
+            cache.put(tts, text, opus_datas)
+    return opus_datas
+
+
+class TTSCachePerformanceTester:
+    """
+    对比不使用缓存、使用内存缓存、服务重启后只剩磁盘缓存时的合成耗时
+    使用test/fake_tts_server.py模拟的OpenAI TTS服务
+    """
+
+    def run(self):
+        server = FakeTTSServer().start()
+        disk_dir = tempfile.mkdtemp(prefix="tts_cache_")
+        config = {
+            "type": "openai",
+            "api_key": "test-key",
+            "api_url": f"{server.base_url}/v1/audio/speech",
+            "output_dir": "tmp/",
+        }
+        cache_config = {"max_memory_mb": 8, "disk_dir": disk_dir, "max_disk_mb": 64}
+        results = []
+        try:
+            tts = create_tts_instance(config["type"], config, True)
+            memory_cache = TTSPhraseCache()
+            memory_cache.configure(cache_config)
+            # 模拟服务重启：内存为空，从磁盘目录加载
+            restarted_cache = TTSPhraseCache()
+            cases = [
+                ("无缓存", None),
+                ("内存+磁盘缓存", memory_cache),
+                ("重启后(仅磁盘缓存)", restarted_cache),
+            ]
+            for name, cache in cases:
+                if cache is restarted_cache:
+                    cache.configure(cache_config)
+                start = time.perf_counter()
+                for text in TEST_SENTENCES:
+                    synthesize(tts, cache, text)
+                total_ms = (time.perf_counter() - start) * 1000
+                stats = cache.stats() if cache is not None else None
+                results.append(
+                    [
+                        name,
+                        len(TEST_SENTENCES),
+                        f"{total_ms:.0f}",
+                        f"{total_ms / len(TEST_SENTENCES):.0f}",
+                        f"{stats['hit_rate']:.0%}" if stats else "-",
+                        f"{stats['memory_hits']}/{stats['disk_hits']}" if stats else "-",
+                        f"{stats['bytes_saved'] / 1024:.1f}" if stats else "-",
+                    ]
+                )
+        finally:
+            server.stop()
+            shutil.rmtree(disk_dir, ignore_errors=True)
+
+        print(
+            tabulate(
+                results,
+                headers=[
+                    "缓存",
+                    "句数",
+                    "总耗时(ms)",
+                    "平均每句(ms)",
+                    "命中率",
+                    "内存/磁盘命中",
+                    "节省音频(KB)",
+                ],
+                tablefmt="github",
+            )
+        )
+
+
+if __name__ == "__main__":
+    TTSCachePerformanceTester().run()
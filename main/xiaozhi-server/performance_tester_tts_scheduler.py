@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+import random
+import logging
+from tabulate import tabulate
+from core.utils.tts import create_instance as create_tts_instance
+from core.utils.tts_scheduler import TTSScheduler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "test"))
+from fake_tts_server import FakeTTSServer
+
+# 设置全局日志级别为WARNING，抑制INFO级别日志
+logging.basicConfig(level=logging.WARNING)
+
+# 一次回复切出的句子
+REPLY_SENTENCES = [
+    "好的",
+    "今天北京晴，气温二十度",
+    "适合出门散步",
+    "记得带上水杯",
+    "傍晚可能有点风",
+    "出门前加件外套",
+]
+REPLY_ROUNDS = 8
+WARMUP_SENTENCES = 30
+
+
+def synthesize(tts, text):
+    """与ConnectionHandler.synthesize相同：合成并编码为Opus帧"""
+    audio = tts.to_tts_audio(text)
+    if audio is None:
+        return None
+    opus_datas, _ = tts.audio_bytes_to_opus_data(audio)
+    return opus_datas
+
+
+def run_reply(scheduler, tts, parallel):
+    """
+    模拟一次回复：返回每句可以开始播放的时间(ms)
+    按顺序播放，第N句要等前面的句子都合成完
+    """
+    start = time.perf_counter()
+    ready = []
+    if parallel:
+        futures = [
+            scheduler.submit(tts, synthesize, tts, text, hedge=True)
+            for text in REPLY_SENTENCES
+        ]
+        for future in futures:
+            future.result()
+            ready.append((time.perf_counter() - start) * 1000)
+    else:
+        for text in REPLY_SENTENCES:
+            synthesize(tts, text)
+            ready.append((time.perf_counter() - start) * 1000)
+    return ready
+
+
+class TTSSchedulerPerformanceTester:
+    """
+    对比逐句合成、调度器并行合成、并行+备份请求三种方式下一次回复的就绪时间
+    模拟服务有10%的请求额外慢2秒(云服务的长尾延迟)
+    """
+
+    def run(self):
+        server = FakeTTSServer(
+            first_chunk_delay=0.2, realtime_factor=8, slow_rate=0.1, slow_delay=2
+        ).start()
+        cases = [
+            ("逐句合成", 1, False, False),
+            ("并行合成", 4, True, False),
+            ("并行合成+备份请求", 4, True, True),
+        ]
+        results = []
+        try:
+            for name, max_concurrency, parallel, hedge in cases:
+                random.seed(0)
+                tts = create_tts_instance(
+                    "openai",
+                    {
+                        "type": "openai",
+                        "api_key": "test-key",
+                        "api_url": f"{server.base_url}/v1/audio/speech",
+                        "output_dir": "tmp/",
+                        "max_concurrency": max_concurrency,
+                    },
+                    True,
+                )
+                scheduler = TTSScheduler()
+                scheduler.configure(
+                    {"hedge": {"enabled": hedge, "min_samples": 20, "min_ms": 300}}
+                )
+                # 预热，积累计算p95所需的合成耗时
+                for future in [
+                    scheduler.submit(tts, synthesize, tts, REPLY_SENTENCES[i % 3])
+                    for i in range(WARMUP_SENTENCES)
+                ]:
+                    future.result()
+
+                first_ms, last_ms, worst_ms = [], [], 0
+                for _ in range(REPLY_ROUNDS):
+                    ready = run_reply(scheduler, tts, parallel)
+                    first_ms.append(ready[0])
+                    last_ms.append(ready[-1])
+                    worst_ms = max(worst_ms, ready[-1])
+                stats = next(iter(scheduler.stats().values()))
+                results.append(
+                    [
+                        name,
+                        max_concurrency,
+                        f"{sum(first_ms) / len(first_ms):.0f}",
+                        f"{sum(last_ms) / len(last_ms):.0f}",
+                        f"{worst_ms:.0f}",
+                        f"{stats['hedged']}/{stats['hedge_wins']}" if hedge else "-",
+                    ]
+                )
+        finally:
+            server.stop()
+
+        print(
+            tabulate(
+                results,
+                headers=[
+                    "方式",
+                    "并发数",
+                    "首句就绪(ms)",
+                    "整段就绪(ms)",
+                    "最慢一次整段就绪(ms)",
+                    "备份请求/先完成",
+                ],
+                tablefmt="github",
+            )
+        )
+
+
+if __name__ == "__main__":
+    TTSSchedulerPerformanceTester().run()
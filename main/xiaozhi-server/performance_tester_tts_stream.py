@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import logging
+from tabulate import tabulate
+from core.utils.tts import create_instance as create_tts_instance
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "test"))
+from fake_tts_server import FakeTTSServer
+
+# 设置全局日志级别为WARNING，抑制INFO级别日志
+logging.basicConfig(level=logging.WARNING)
+
+TEST_SENTENCES = [
+    "你好",
+    "今天天气不错",
+    "我们去公园散步吧，顺便买点水果",
+    "量子计算利用量子叠加和纠缠来处理信息，在某些问题上比传统计算机快得多",
+]
+
+
+def provider_configs(base_url):
+    """指向本地模拟服务的TTS配置"""
+    return {
+        "openai": {
+            "type": "openai",
+            "api_key": "test-key",
+            "api_url": f"{base_url}/v1/audio/speech",
+            "output_dir": "tmp/",
+        },
+        "fishspeech": {
+            "type": "fishspeech",
+            "api_key": "test-key",
+            "api_url": f"{base_url}/v1/tts",
+            "output_dir": "tmp/",
+        },
+    }
+
+
+def measure_full(tts, text):
+    """非流式：合成完成后整段编码，首帧延迟即总耗时"""
+    start = time.perf_counter()
+    audio = tts.to_tts_audio(text)
+    opus_datas, _ = tts.audio_bytes_to_opus_data(audio)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, elapsed, len(opus_datas)
+
+
+def measure_stream(tts, text):
+    """流式：记录第一批Opus帧产生的时间"""
+    start = time.perf_counter()
+    first_frame = None
+    frames = 0
+
+    def on_frames(opus_datas):
+        nonlocal first_frame, frames
+        if first_frame is None:
+            first_frame = (time.perf_counter() - start) * 1000
+        frames += len(opus_datas)
+
+    tts.to_tts_stream(text, on_frames)
+    return first_frame, (time.perf_counter() - start) * 1000, frames
+
+
+class TTSStreamPerformanceTester:
+    """
+    对比非流式与流式合成的首帧延迟，使用test/fake_tts_server.py模拟的服务
+    EdgeTTS依赖微软在线服务，无法本地模拟，不在此测试
+    """
+
+    def run(self):
+        server = FakeTTSServer().start()
+        results = []
+        try:
+            for name, config in provider_configs(server.base_url).items():
+                for streaming in (False, True):
+                    tts = create_tts_instance(
+                        config["type"], {**config, "streaming": streaming}, True
+                    )
+                    measure = measure_stream if streaming else measure_full
+                    for text in TEST_SENTENCES:
+                        first_ms, total_ms, frames = measure(tts, text)
+                        results.append(
+                            [
+                                name,
+                                "流式" if streaming else "非流式",
+                                len(text),
+                                f"{first_ms:.0f}",
+                                f"{total_ms:.0f}",
+                                frames,
+                            ]
+                        )
+        finally:
+            server.stop()
+
+        print(
+            tabulate(
+                results,
+                headers=["TTS", "模式", "字数", "首帧延迟(ms)", "总耗时(ms)", "Opus帧数"],
+                tablefmt="github",
+            )
+        )
+
+
+if __name__ == "__main__":
+    TTSStreamPerformanceTester().run()
@@ -0,0 +1,101 @@
+import time
+import threading
+import numpy as np
+from tabulate import tabulate
+from config.settings import load_config
+from core.utils.vad import create_instance as create_vad_instance
+import logging
+
+# 设置全局日志级别为WARNING，抑制INFO级别日志
+logging.basicConfig(level=logging.WARNING)
+
+# 每个模拟设备发送的音频时长(秒)
+AUDIO_SECONDS = 3
+# Silero每次推理的窗口为512采样点(32ms)
+WINDOW_SAMPLES = 512
+DEVICE_COUNTS = [1, 50, 200]
+
+
+def make_device_audio(seed):
+    """生成模拟设备的音频：背景噪声中夹杂一段类语音的正弦信号"""
+    rng = np.random.default_rng(seed)
+    total = 16000 * AUDIO_SECONDS
+    audio = rng.normal(0, 0.01, total).astype(np.float32)
+    t = np.arange(total // 2) / 16000
+    audio[total // 4 : total // 4 + total // 2] += 0.3 * np.sin(
+        2 * np.pi * (200 + 50 * (seed % 7)) * t
+    ).astype(np.float32)
+    windows = len(audio) // WINDOW_SAMPLES
+    return audio[: windows * WINDOW_SAMPLES].reshape(windows, WINDOW_SAMPLES)
+
+
+class VADPerformanceTester:
+    def __init__(self):
+        self.config = load_config()
+        vad_name = self.config["selected_module"]["VAD"]
+        self.vad_config = dict(self.config["VAD"][vad_name])
+        self.vad_type = self.vad_config.get("type", vad_name)
+
+    def _run(self, vad, device_count):
+        """每个设备一个线程，按顺序推送自己的音频窗口，统计进程CPU耗时"""
+        devices = [
+            (vad.create_context(), make_device_audio(i)) for i in range(device_count)
+        ]
+
+        def feed(vad_context, windows):
+            for window in windows:
+                if vad.batcher is not None:
+                    vad.batcher.submit(vad_context, window).result()
+                else:
+                    vad.speech_probs([vad_context], [window])
+
+        threads = [
+            threading.Thread(target=feed, args=device) for device in devices
+        ]
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cpu_time = time.process_time() - cpu_start
+        wall_time = time.perf_counter() - wall_start
+        return {
+            # 每路音频流每秒音频消耗的CPU毫秒数
+            "cpu_ms_per_stream_sec": cpu_time * 1000 / (device_count * AUDIO_SECONDS),
+            "wall_time": wall_time,
+        }
+
+    def run(self):
+        results = []
+        for batch_window_ms in (0, 5):
+            config = dict(self.vad_config, batch_window_ms=batch_window_ms)
+            vad = create_vad_instance(self.vad_type, config)
+            mode = "批量推理" if batch_window_ms > 0 else "逐路推理"
+            for device_count in DEVICE_COUNTS:
+                print(f"🎙️ 测试 VAD: {mode}, {device_count} 路设备")
+                result = self._run(vad, device_count)
+                results.append(
+                    [
+                        mode,
+                        device_count,
+                        f"{result['cpu_ms_per_stream_sec']:.2f}",
+                        f"{result['wall_time']:.2f}",
+                    ]
+                )
+
+        print(
+            tabulate(
+                results,
+                headers=[
+                    "模式",
+                    "并发设备数",
+                    "每路每秒音频CPU耗时(ms)",
+                    "总耗时(秒)",
+                ],
+                tablefmt="github",
+            )
+        )
+
+
+if __name__ == "__main__":
+    VADPerformanceTester().run()
@@ -217,12 +217,11 @@ async def play_local_music(conn, specific_file=None):
         conn.tts_first_text_index = 0
         conn.tts_last_text_index = 0
 
-        tts_file = await asyncio.to_thread(conn.tts.to_tts, text)
-        if tts_file is not None and os.path.exists(tts_file):
+        # 播放提示语经过TTS短句缓存，常见的提示语不必每次合成
+        opus_packets, _, _ = await asyncio.to_thread(conn.speak_and_play, text)
+        if opus_packets:
             conn.tts_last_text_index = 1
-            opus_packets, _ = conn.tts.audio_to_opus_data(tts_file)
             conn.audio_play_queue.put((opus_packets, None, 0))
-            os.remove(tts_file)
 
         conn.llm_finish_task = True
 
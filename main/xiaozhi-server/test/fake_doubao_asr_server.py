@@ -0,0 +1,136 @@
+"""
+本地模拟的豆包流式语音识别服务(二进制websocket协议)，用于测试DoubaoASR，不需要真实的火山引擎账号
+- 第一包为请求参数(CLIENT_FULL_REQUEST)，返回code=1000
+- 之后每个音频包(CLIENT_AUDIO_ONLY_REQUEST)按音频时长/realtime_factor模拟识别耗时后返回当前结果
+- 最后一包(NEG_SEQUENCE)返回的sequence为负数，随后关闭连接
+识别结果为固定文本，按已收到的音频比例逐步“识别”出来
+
+单独运行：python test/fake_doubao_asr_server.py --port 8766
+"""
+
+import sys
+import gzip
+import json
+import asyncio
+import argparse
+import websockets
+
+CLIENT_FULL_REQUEST = 0b0001
+CLIENT_AUDIO_ONLY_REQUEST = 0b0010
+NEG_SEQUENCE = 0b0010
+SERVER_FULL_RESPONSE = 0b1001
+SUCCESS_CODE = 1000
+BYTES_PER_SECOND = 16000 * 2
+
+
+def pack_response(payload):
+    body = gzip.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+    # 协议版本1，头部1个单位；JSON序列化，GZIP压缩
+    header = bytes([0x11, SERVER_FULL_RESPONSE << 4, 0x11, 0x00])
+    return header + len(body).to_bytes(4, "big", signed=True) + body
+
+
+def unpack_request(message):
+    header_size = message[0] & 0x0F
+    message_type = message[1] >> 4
+    flags = message[1] & 0x0F
+    offset = header_size * 4
+    size = int.from_bytes(message[offset : offset + 4], "big")
+    payload = gzip.decompress(message[offset + 4 : offset + 4 + size])
+    return message_type, flags, payload
+
+
+class FakeDoubaoASRServer:
+    """
+    text: 最终识别结果
+    expected_seconds: 按多长的音频把text全部“识别”出来
+    realtime_factor: 识别速度是实时的几倍
+    """
+
+    def __init__(
+        self,
+        port=0,
+        text="今天天气怎么样",
+        expected_seconds=3,
+        realtime_factor=8,
+    ):
+        self.port = port
+        self.text = text
+        self.expected_seconds = expected_seconds
+        self.realtime_factor = realtime_factor
+        self.server = None
+        self.requests = []
+
+    @property
+    def ws_url(self):
+        return f"ws://127.0.0.1:{self.port}"
+
+    async def start(self):
+        self.server = await websockets.serve(self._handle, "127.0.0.1", self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def _partial_text(self, received_bytes):
+        ratio = min(1.0, received_bytes / BYTES_PER_SECOND / self.expected_seconds)
+        return self.text[: round(len(self.text) * ratio)]
+
+    async def _handle(self, websocket):
+        try:
+            await self._recognize(websocket)
+        except websockets.ConnectionClosed:
+            # 客户端放弃本段识别(如语音太短)时会直接关闭连接
+            pass
+
+    async def _recognize(self, websocket):
+        received_bytes = 0
+        sequence = 1
+        async for message in websocket:
+            message_type, flags, payload = unpack_request(message)
+            if message_type == CLIENT_FULL_REQUEST:
+                self.requests.append(json.loads(payload))
+                await websocket.send(
+                    pack_response({"code": SUCCESS_CODE, "sequence": sequence})
+                )
+                continue
+            if message_type != CLIENT_AUDIO_ONLY_REQUEST:
+                continue
+            received_bytes += len(payload)
+            sequence += 1
+            last = flags == NEG_SEQUENCE
+            # 模拟识别这一包音频的耗时
+            await asyncio.sleep(
+                len(payload) / BYTES_PER_SECOND / self.realtime_factor
+            )
+            text = self.text if last else self._partial_text(received_bytes)
+            await websocket.send(
+                pack_response(
+                    {
+                        "code": SUCCESS_CODE,
+                        "sequence": -sequence if last else sequence,
+                        "result": [{"text": text}],
+                    }
+                )
+            )
+            if last:
+                await websocket.close()
+                return
+
+
+async def _main(port):
+    server = await FakeDoubaoASRServer(port).start()
+    print(f"模拟豆包ASR服务已启动: {server.ws_url}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地模拟的豆包流式语音识别服务")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args.port))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,47 @@
+"""
+模拟的SenseVoice识别器，不加载模型测试SherpaASRStream的分窗解码
+- 每60ms(960个采样)的音频识别为一个字，识别结果的字数等于送入的帧数，末尾丢失时可以直接看出来
+- 记录解码次数和解码的音频总量，用于观察长语音的解码量
+"""
+
+import types
+import threading
+from core.providers.asr.base import ASRWorkerPool
+from core.utils.latency_stats import LatencyStats
+
+FRAME_SAMPLES = 960
+
+
+class FakeSenseVoice:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.decoded_samples = 0
+
+
+def recognize_batch(recognizer, samples_list):
+    texts = []
+    for samples in samples_list:
+        with recognizer.lock:
+            recognizer.calls += 1
+            recognizer.decoded_samples += len(samples)
+        texts.append("字" * (len(samples) // FRAME_SAMPLES))
+    return texts
+
+
+def create_fake_provider(max_stream_seconds=30, partial_interval_ms=600):
+    """返回SherpaASRStream需要的provider属性，识别由FakeSenseVoice完成"""
+    recognizer = FakeSenseVoice()
+    return types.SimpleNamespace(
+        recognizer=recognizer,
+        stream_max_seconds=max_stream_seconds,
+        stream_partial_samples=int(16000 * partial_interval_ms / 1000),
+        pool=ASRWorkerPool(
+            "fake-sense-voice",
+            [recognizer],
+            recognize_batch,
+            0,
+            8,
+            LatencyStats("FakeSenseVoice", 3600),
+        ),
+    )
@@ -0,0 +1,151 @@
+"""
+本地模拟的TTS服务，用于测试流式/非流式合成，不需要真实的TTS账号
+- POST /v1/audio/speech  OpenAI接口，response_format为pcm时按生成进度分块返回24kHz PCM
+- POST /v1/tts           FishSpeech接口(msgpack)，streaming为true时先返回wav头再分块返回PCM
+非流式请求等全部“合成”完成后一次返回，模拟的音频时长为每个字0.2秒
+slow_rate大于0时，按该比例随机让请求额外等待slow_delay秒，模拟云服务的长尾延迟
+
+单独运行：python test/fake_tts_server.py --port 8091
+"""
+
+import io
+import json
+import time
+import wave
+import random
+import argparse
+import threading
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECONDS_PER_CHAR = 0.2
+
+
+def make_pcm(text, sample_rate):
+    samples = np.arange(int(len(text) * SECONDS_PER_CHAR * sample_rate))
+    tone = np.sin(2 * np.pi * 440 * samples / sample_rate) * 8000
+    return tone.astype(np.int16).tobytes()
+
+
+def make_wav_header(sample_rate, data_size=0):
+    """data_size为0时与流式服务一样，头部不包含数据长度"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(b"")
+    header = bytearray(buffer.getvalue())
+    header[40:44] = data_size.to_bytes(4, "little")
+    header[4:8] = (36 + data_size).to_bytes(4, "little")
+    return bytes(header)
+
+
+class FakeTTSHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.startswith("/v1/audio/speech"):
+            request = json.loads(body)
+            sample_rate = 24000
+            pcm = make_pcm(request["input"], sample_rate)
+            streaming = request.get("response_format") == "pcm"
+            header = b"" if streaming else make_wav_header(sample_rate, len(pcm))
+        elif self.path.startswith("/v1/tts"):
+            import ormsgpack
+
+            request = ormsgpack.unpackb(body)
+            sample_rate = 44100
+            pcm = make_pcm(request["text"], sample_rate)
+            streaming = bool(request.get("streaming"))
+            header = make_wav_header(sample_rate, 0 if streaming else len(pcm))
+        else:
+            self.send_error(404)
+            return
+
+        server = self.server
+        chunk_size = int(sample_rate * server.chunk_ms / 1000) * 2
+        chunks = [pcm[i : i + chunk_size] for i in range(0, len(pcm), chunk_size)]
+        # 每块音频的生成耗时
+        chunk_seconds = server.chunk_ms / 1000 / server.realtime_factor
+
+        if random.random() < server.slow_rate:
+            time.sleep(server.slow_delay)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/wav" if header else "audio/pcm")
+        if not streaming:
+            time.sleep(server.first_chunk_delay + chunk_seconds * len(chunks))
+            audio = header + pcm
+            self.send_header("Content-Length", str(len(audio)))
+            self.end_headers()
+            self.wfile.write(audio)
+            return
+
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(server.first_chunk_delay)
+        if header:
+            self._write_chunk(header)
+        for chunk in chunks:
+            time.sleep(chunk_seconds)
+            self._write_chunk(chunk)
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeTTSServer:
+    """
+    first_chunk_delay: 第一块音频的生成耗时(秒)
+    realtime_factor: 生成速度是实时播放的几倍
+    chunk_ms: 流式返回时每块音频的时长(毫秒)
+    slow_rate: 额外等待slow_delay秒的请求比例
+    """
+
+    def __init__(
+        self,
+        port=0,
+        first_chunk_delay=0.3,
+        realtime_factor=4,
+        chunk_ms=200,
+        slow_rate=0,
+        slow_delay=3,
+    ):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), FakeTTSHandler)
+        self.httpd.first_chunk_delay = first_chunk_delay
+        self.httpd.realtime_factor = realtime_factor
+        self.httpd.chunk_ms = chunk_ms
+        self.httpd.slow_rate = slow_rate
+        self.httpd.slow_delay = slow_delay
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地模拟的TTS服务")
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--first-chunk-delay", type=float, default=0.3)
+    parser.add_argument("--realtime-factor", type=float, default=4)
+    args = parser.parse_args()
+    server = FakeTTSServer(args.port, args.first_chunk_delay, args.realtime_factor)
+    print(f"模拟TTS服务已启动: {server.base_url}")
+    server.httpd.serve_forever()